@@ -49,8 +49,11 @@ if "bpy" in locals():
     imp.reload(archipack_progressbar)
     imp.reload(archipack_material)
     imp.reload(archipack_snap)
+    imp.reload(archipack_scheduler)
     imp.reload(archipack_manipulator)
     imp.reload(archipack_reference_point)
+    imp.reload(archipack_depsgraph)
+    imp.reload(archipack_worker)
     imp.reload(archipack_autoboolean)
     imp.reload(archipack_door)
     imp.reload(archipack_window)
@@ -77,8 +80,11 @@ else:
     from . import archipack_progressbar
     from . import archipack_material
     from . import archipack_snap
+    from . import archipack_scheduler
     from . import archipack_manipulator
     from . import archipack_reference_point
+    from . import archipack_depsgraph
+    from . import archipack_worker
     from . import archipack_autoboolean
     from . import archipack_door
     from . import archipack_window
@@ -116,6 +122,10 @@ from bpy.props import (
     )
 
 from bpy.utils import previews
+from .geometry_cache import geometry_cache
+from .archipack_scheduler import scheduler
+from .roof_kernel import pan_pool
+from .archipack_worker import geometry_worker
 icons_collection = {}
 
 
@@ -139,6 +149,23 @@ def update_panel(self, context):
     bpy.utils.register_class(TOOLS_PT_Archipack_Create)
 
 
+def update_cache(self, context):
+    prefs = context.user_preferences.addons[__name__].preferences
+    geometry_cache.setup(prefs.cache_size, prefs.cache_memory * 1024 * 1024,
+        bpy.path.abspath(prefs.cache_path))
+
+
+def update_scheduler(self, context):
+    prefs = context.user_preferences.addons[__name__].preferences
+    scheduler.setup(prefs.update_delay, prefs.update_budget)
+
+
+def update_workers(self, context):
+    prefs = context.user_preferences.addons[__name__].preferences
+    pan_pool.setup(prefs.max_workers)
+    geometry_worker.setup(prefs.background_build)
+
+
 class Archipack_Pref(AddonPreferences):
     bl_idname = __name__
 
@@ -182,6 +209,57 @@ class Archipack_Pref(AddonPreferences):
             description="absolute path to material library folder",
             default=""
             )
+    cache_size = IntProperty(
+            name="Cache size",
+            description="Max number of generated geometry kept in memory",
+            min=0,
+            default=64,
+            update=update_cache
+            )
+    cache_memory = IntProperty(
+            name="Cache memory",
+            description="Max size of generated geometry kept in memory (MB)",
+            min=0,
+            default=256,
+            update=update_cache
+            )
+    cache_path = StringProperty(
+            name="Cache folder",
+            description="absolute path to generated geometry disk cache folder, disabled when empty",
+            subtype='DIR_PATH',
+            default="",
+            update=update_cache
+            )
+    update_delay = FloatProperty(
+            name="Update delay",
+            description="Delay without changes before delayed updates run (seconds)",
+            min=0.05,
+            max=5,
+            default=0.5,
+            update=update_scheduler
+            )
+    update_budget = FloatProperty(
+            name="Time budget",
+            description="Max time spent by delayed updates before giving back hand to ui (seconds)",
+            min=0.01,
+            max=5,
+            default=0.1,
+            update=update_scheduler
+            )
+    max_workers = IntProperty(
+            name="Workers",
+            description="Number of processes building roof tiles, 0 for number of cpu, 1 to disable",
+            min=0,
+            max=64,
+            default=0,
+            update=update_workers
+            )
+    background_build = BoolProperty(
+            name="Background",
+            description="Build floor and roof tiles in a background thread, showing slab outline and roof without tiles meanwhile",
+            default=False,
+            update=update_workers
+            )
     # Font sizes and basic colour scheme
     # kept outside of addon prefs until now
     # as for a generic toolkit it is not appropriate
@@ -293,6 +371,25 @@ class Archipack_Pref(AddonPreferences):
         col.label(text="Material library:")
         col.prop(self, "matlib_path")
 
+        box = layout.box()
+        box.label("Generated geometry cache")
+        row = box.row()
+        row.prop(self, "cache_size")
+        row.prop(self, "cache_memory")
+        row.prop(self, "cache_path")
+
+        box = layout.box()
+        box.label("Delayed updates")
+        row = box.row()
+        row.prop(self, "update_delay")
+        row.prop(self, "update_budget")
+
+        box = layout.box()
+        box.label("Parallel processing")
+        row = box.row()
+        row.prop(self, "max_workers")
+        row.prop(self, "background_build")
+
         box = layout.box()
         row = box.row()
         col = row.column()
@@ -729,6 +826,9 @@ def register():
     archipack_snap.register()
     archipack_manipulator.register()
     archipack_reference_point.register()
+    archipack_scheduler.register()
+    archipack_depsgraph.register()
+    archipack_worker.register()
     archipack_autoboolean.register()
     archipack_door.register()
     archipack_window.register()
@@ -751,6 +851,9 @@ def register():
     WindowManager.archipack = PointerProperty(type=archipack_data)
     bpy.utils.register_class(Archipack_Pref)
     update_panel(None, bpy.context)
+    update_cache(None, bpy.context)
+    update_scheduler(None, bpy.context)
+    update_workers(None, bpy.context)
     bpy.utils.register_class(ARCHIPACK_create_menu)
     bpy.types.INFO_MT_mesh_add.append(menu_func)
 
@@ -772,6 +875,9 @@ def unregister():
     archipack_snap.unregister()
     archipack_manipulator.unregister()
     archipack_reference_point.unregister()
+    archipack_scheduler.unregister()
+    archipack_depsgraph.unregister()
+    archipack_worker.unregister()
     archipack_autoboolean.unregister()
     archipack_door.unregister()
     archipack_window.unregister()
@@ -29,6 +29,8 @@ from math import sin, cos, pi, atan2, sqrt, acos
 import bpy
 # allow to draw parts with gl for debug puropses
 from .archipack_gl import GlBaseLine
+from .pygeos.shared import Envelope
+from .pygeos.index_strtree import STRtree
 
 
 class Projection(GlBaseLine):
@@ -155,6 +157,15 @@ class Line(Projection):
         """
         return self.v.length
 
+    @property
+    def bounds(self):
+        """
+            2d bounds as minx, miny, maxx, maxy
+        """
+        x0, y0 = self.p0.to_2d()
+        x1, y1 = self.p1.to_2d()
+        return min(x0, x1), min(y0, y1), max(x0, x1), max(y0, y1)
+
     @property
     def angle(self):
         """
@@ -579,6 +590,23 @@ class Arc(Circle):
         """
         return self.r * abs(self.da)
 
+    @property
+    def bounds(self):
+        """
+            2d bounds as minx, miny, maxx, maxy
+            endpoints and circle extremes lying on arc
+        """
+        pts = [self.p0, self.p1]
+        a0 = self.a0
+        if self.da < 0:
+            a0 += self.da
+        for i in range(4):
+            if (0.5 * i * pi - a0) % (2 * pi) <= abs(self.da):
+                pts.append(self.c + self.r * Vector((cos(0.5 * i * pi), sin(0.5 * i * pi))))
+        x = [p.x for p in pts]
+        y = [p.y for p in pts]
+        return min(x), min(y), max(x), max(y)
+
     @property
     def oposite(self):
         a0 = self.a0 + self.da
@@ -966,3 +994,40 @@ class Line3d(Line):
 
     def tangeant(self, t, da, radius):
         raise NotImplementedError
+
+
+class SegmentIndex():
+    """
+        STR packed R-tree over 2d segments (Line and Arc)
+        envelopes are buffered, so query for a point
+        return segments closer than buffer
+    """
+    def __init__(self, segs, buffer=0):
+        self.segs = segs
+        self.buffer = buffer
+        self.tree = STRtree()
+        for i, seg in enumerate(segs):
+            minx, miny, maxx, maxy = seg.bounds
+            self.tree.insert(Envelope(
+                minx - buffer, miny - buffer,
+                maxx + buffer, maxy + buffer), i)
+        self.tree.build()
+
+    def query(self, minx, miny, maxx, maxy):
+        """
+            Index of segments with buffered envelope
+            intersecting bounds, in segments order
+        """
+        if len(self.segs) < 1:
+            return []
+        found = []
+        self.tree.query(Envelope(minx, miny, maxx, maxy), found)
+        return sorted(found)
+
+    def query_point(self, pt):
+        """
+            Index of segments closer than buffer from pt
+            may include false positives
+        """
+        x, y = pt.x, pt.y
+        return self.query(x, y, x, y)
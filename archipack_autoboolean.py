@@ -29,6 +29,79 @@ import numpy as np
 from bpy.types import Operator
 from bpy.props import EnumProperty, BoolProperty
 from mathutils import Vector
+from .bmesh_utils import BmeshEdit as bmed
+from .pygeos.shared import Envelope
+from .pygeos.index_strtree import STRtree
+
+
+def world_bounds(objects):
+    """
+        World axis aligned bounding boxes of objects
+        return (N, 6) array of minx, miny, minz, maxx, maxy, maxz
+    """
+    n_objs = len(objects)
+    if n_objs < 1:
+        return np.zeros((0, 6), dtype=np.float64)
+    # (N, 8, 3) local corners and (N, 4, 4) matrix
+    pts = np.array([[tuple(b) for b in o.bound_box] for o in objects], dtype=np.float64)
+    tM = np.array([[tuple(row) for row in o.matrix_world] for o in objects], dtype=np.float64)
+    pts = np.einsum('nij,nkj->nki', tM[:, 0:3, 0:3], pts) + tM[:, None, 0:3, 3]
+    return np.concatenate((pts.min(axis=1), pts.max(axis=1)), axis=1)
+
+
+class SceneBoundsIndex():
+    """
+        STR packed R-tree over world bounding boxes of mesh objects
+        Build once, then query for many walls
+    """
+    def __init__(self, objects):
+        self.objects = [o for o in objects if o.type == 'MESH']
+        self.bounds = world_bounds(self.objects)
+        self._build()
+
+    def _build(self):
+        self.tree = STRtree()
+        for i, (minx, miny, minz, maxx, maxy, maxz) in enumerate(self.bounds.tolist()):
+            self.tree.insert(Envelope(minx, miny, maxx, maxy), i)
+        self.tree.build()
+
+    def update(self, objects):
+        """
+            Refresh bounds of modified objects,
+            packed tree is rebuilt only when bounds did change
+        """
+        index = [i for i, o in enumerate(self.objects) if o in objects]
+        if len(index) < 1:
+            return
+        bounds = world_bounds([self.objects[i] for i in index])
+        if np.allclose(self.bounds[index], bounds):
+            return
+        self.bounds[index] = bounds
+        self._build()
+
+    def query(self, bounds):
+        """
+            Objects with bounding box intersecting bounds
+            bounds: minx, miny, minz, maxx, maxy, maxz
+            return objects in scene order
+        """
+        minx, miny, minz, maxx, maxy, maxz = bounds
+        found = []
+        self.tree.query(Envelope(minx, miny, maxx, maxy), found)
+        if len(found) < 1:
+            return []
+        found = np.array(sorted(found), dtype=np.int64)
+        b = self.bounds[found]
+        found = found[(b[:, 5] >= minz) & (b[:, 2] <= maxz)]
+        return [self.objects[i] for i in found]
+
+    def query_many(self, bounds):
+        """
+            Objects intersecting each of bounds
+            bounds: (N, 6) array
+            return list of N lists of objects
+        """
+        return [self.query(b) for b in bounds.tolist()]
 
 
 class ArchipackBoolManager():
@@ -36,11 +109,13 @@ class ArchipackBoolManager():
         Handle hybrid methods for booleans
         merge holes with boolean and use result on wall
     """
-    def __init__(self, solver_mode='CARVE'):
+    def __init__(self, solver_mode='CARVE', merge_mode='BOOLEAN'):
         """
             mode in 'ROBUST', 'INTERACTIVE', 'HYBRID'
+            merge_mode in 'BOOLEAN', 'MESH'
         """
         self.solver_mode = solver_mode
+        self.merge_mode = merge_mode
         # internal variables
         self.itM = None
         self.min_x = 0
@@ -51,11 +126,7 @@ class ArchipackBoolManager():
         self.max_z = 0
 
     def _world_bounding_box(self, o):
-        tM = o.matrix_world
-        bpts = np.array([list(tM * Vector(b)) for b in o.bound_box]).transpose()
-        minx, miny, minz = bpts.min(axis=1)
-        maxx, maxy, maxz = bpts.max(axis=1)
-        return minx, miny, minz, maxx, maxy, maxz
+        return tuple(world_bounds([o])[0])
 
     def _init_bounding_box(self, wall):
         self.minx, self.miny, self.minz, \
@@ -66,21 +137,19 @@ class ArchipackBoolManager():
             self.miny + 0.5 * (self.maxy - self.miny),
             self.minz + 0.5 * (self.maxz - self.minz)))
 
-    def _contains(self, o):
-        # check for bounding boxes intersections
-        minx, miny, minz, maxx, maxy, maxz = self._world_bounding_box(o)
-        if (maxx < self.minx or minx > self.maxx or
-                maxy < self.miny or miny > self.maxy or
-                maxz < self.minz or minz > self.maxz):
-            return False
-
-        return True
-
     def filter_wall(self, wall):
         d = wall.data
         return d is not None and (
                'archipack_wall2' in d or 'archipack_wall' in d)
 
+    def mesh_openings(self, wall):
+        """
+            Wall cut windows and doors openings in mesh
+        """
+        d = wall.data
+        return (d is not None and 'archipack_wall2' in d and
+            d.archipack_wall2[0].openings == 'MESH')
+
     def datablock(self, o):
         """
             get datablock from windows and doors
@@ -201,7 +270,6 @@ class ArchipackBoolManager():
                 many modifisers on wall taged with "archipack_hole"
                 keep objects
         """
-        existing = []
         to_delete = []
 
         # remove modifier and holes not found in new list
@@ -221,13 +289,37 @@ class ArchipackBoolManager():
 
         self.prepare_hole(hole_obj)
 
+        self.update_merge_basis(context, hole_obj, holes, self.merge_mode)
+
+        # AutoBoolean will be child of reference point
+        childs.append(hole_obj)
+
+    def update_merge_basis(self, context, hole_obj, holes, merge_mode):
+        """
+            Merge holes into hole_obj
+            BOOLEAN: one union modifier by hole
+            MESH: copy holes meshes into hole_obj mesh,
+                union modifiers only for overlapping holes
+        """
+        existing = []
         to_delete = []
 
+        if merge_mode == 'MESH':
+            union_holes = self.merge_holes(context, hole_obj, holes)
+        else:
+            if "archipack_mergedhole" in hole_obj:
+                del hole_obj["archipack_mergedhole"]
+                bmed._clear(hole_obj.data)
+            union_holes = holes
+
         # mixed-> mixed
         for m in hole_obj.modifiers:
             h = m.object
-            if h in holes:
+            if h in union_holes:
                 existing.append(h)
+            elif h in holes:
+                # merged hole, keep object
+                to_delete.append([m, None])
             else:
                 to_delete.append([m, h])
 
@@ -235,18 +327,136 @@ class ArchipackBoolManager():
         self.remove_modif_and_object(context, hole_obj, to_delete)
 
         # add modifier and holes not found in existing
-        for h in holes:
+        for h in union_holes:
             if h not in existing:
                 self.union(hole_obj, h)
 
-        # AutoBoolean will be child of reference point
-        childs.append(hole_obj)
+    def merge_holes(self, context, hole_obj, holes):
+        """
+            Copy non overlapping holes meshes into hole_obj mesh
+            return overlapping holes, to merge using union
+        """
+        bounds = world_bounds(holes)
+        # overlapping bounding boxes, touching ones included
+        overlap = np.all(
+            (bounds[:, None, 0:3] <= bounds[None, :, 3:6]) &
+            (bounds[:, None, 3:6] >= bounds[None, :, 0:3]), axis=2)
+        np.fill_diagonal(overlap, False)
+        overlap = overlap.any(axis=1)
+
+        merged = [h for h, o in zip(holes, overlap) if not o]
+        verts, loops, totals, matids, uvs = [], [], [], [], []
+        itM = hole_obj.matrix_world.inverted()
+        n_verts = 0
+        for h in merged:
+            me = h.data
+            nv, nl, nf = len(me.vertices), len(me.loops), len(me.polygons)
+            tM = np.array([tuple(row) for row in itM * h.matrix_world], dtype=np.float64)
+            co = np.empty(nv * 3, dtype=np.float32)
+            me.vertices.foreach_get("co", co)
+            verts.append(co.reshape(-1, 3).dot(tM[0:3, 0:3].T) + tM[0:3, 3])
+            index = np.empty(nl, dtype=np.int32)
+            me.loops.foreach_get("vertex_index", index)
+            start = np.empty(nf, dtype=np.int32)
+            me.polygons.foreach_get("loop_start", start)
+            total = np.empty(nf, dtype=np.int32)
+            me.polygons.foreach_get("loop_total", total)
+            mat = np.empty(nf, dtype=np.int32)
+            me.polygons.foreach_get("material_index", mat)
+            uv = np.zeros(nl * 2, dtype=np.float32)
+            if me.uv_layers.active is not None:
+                me.uv_layers.active.data.foreach_get("uv", uv)
+            # loops in polygons order, reversed when mirrored
+            offset = np.repeat(np.cumsum(total) - total, total)
+            k = np.arange(nl) - offset
+            if np.linalg.det(tM[0:3, 0:3]) < 0:
+                k = np.repeat(total, total) - 1 - k
+            order = np.repeat(start, total) + k
+            loops.append(index[order] + n_verts)
+            uvs.append(uv.reshape(-1, 2)[order])
+            totals.append(total)
+            matids.append(mat)
+            n_verts += nv
+
+        hole_obj["archipack_mergedhole"] = "\n".join([h.name for h in merged])
+
+        if len(merged) > 0:
+            bmed.buildmesh_arrays(context, hole_obj,
+                np.concatenate(verts),
+                np.concatenate(loops),
+                np.concatenate(totals),
+                matids=np.concatenate(matids),
+                uvs=np.concatenate(uvs),
+                auto_smooth=False)
+        else:
+            bmed._clear(hole_obj.data)
+
+        return [h for h, o in zip(holes, overlap) if o]
 
-    def autoboolean(self, context, wall):
+    def merged_holes(self, hole_obj):
         """
-            Entry point for multi-boolean operations like
-            in T panel autoBoolean
+            Holes of a merge basis, either merged or union
+        """
+        holes = []
+        if "archipack_mergedhole" in hole_obj:
+            for name in hole_obj["archipack_mergedhole"].split("\n"):
+                h = bpy.data.objects.get(name)
+                if h is not None:
+                    holes.append(h)
+        for m in hole_obj.modifiers:
+            if m.type == 'BOOLEAN' and m.object is not None and m.object not in holes:
+                holes.append(m.object)
+        return holes
+
+    def refresh_merged(self, context, hole_obj):
+        """
+            Rebuild merge basis mesh after holes changes
+        """
+        if "archipack_mergedhole" in hole_obj:
+            # ensure holes world matrix are up to date
+            context.scene.update()
+            self.update_merge_basis(context, hole_obj, self.merged_holes(hole_obj), 'MESH')
+
+    def refresh_wall(self, context, wall):
+        """
+            Rebuild merge basis mesh of a wall
+        """
+        m = wall.modifiers.get("AutoMixedBoolean")
+        if m is not None and m.object is not None:
+            self.refresh_merged(context, m.object)
+
+    def refresh_hole(self, context, o):
+        """
+            Rebuild merge basis meshes using hole of o
+            o is either a window or a door
         """
+        if o.parent is None:
+            return
+        names = set([o.name] + [c.name for c in o.children])
+        for c in o.parent.children:
+            if "archipack_mergedhole" in c:
+                if names.intersection(c["archipack_mergedhole"].split("\n")):
+                    self.refresh_merged(context, c)
+            elif self.mesh_openings(c):
+                d = c.data.archipack_wall2[0]
+                if any([child.child_name == o.name for child in d.childs]):
+                    rejected = d.update_openings(context, c)
+                    # opening overlap another one or segment ends,
+                    # or did move back in place, so boolean hole
+                    # must be added or removed
+                    m = c.modifiers.get("AutoMixedBoolean")
+                    has_hole = (m is not None and m.object is not None and
+                        any([h.name in names for h in self.merged_holes(m.object)]))
+                    if (o.name in rejected) != has_hole:
+                        active = context.scene.objects.active
+                        selected = context.selected_objects[:]
+                        self.autoboolean(context, c)
+                        bpy.ops.object.select_all(action='DESELECT')
+                        for s in selected:
+                            s.select = True
+                        context.scene.objects.active = active
+
+    def _ensure_wall_modifier(self, context, wall):
         if wall.data is not None and "archipack_wall2" in wall.data:
             # ensure wall modifier is there before any boolean
             # to support "revival" of applied modifiers
@@ -256,21 +466,69 @@ class ArchipackBoolManager():
                 context.scene.objects.active = wall
                 wall.data.archipack_wall2[0].update(context)
 
+    def scene_index(self, context, walls):
+        """
+            Multi walls mode, index scene once
+            walls: ensure wall modifier before indexing
+            return SceneBoundsIndex
+        """
+        for wall in walls:
+            self._ensure_wall_modifier(context, wall)
+        return SceneBoundsIndex(context.scene.objects)
+
+    def find_candidates(self, context, walls):
+        """
+            Multi walls mode, index scene once and
+            find objects inside each wall bounding box in one pass
+            return list of objects lists, in walls order
+        """
+        index = self.scene_index(context, walls)
+        return index.query_many(world_bounds(walls))
+
+    def find_walls(self, context, o):
+        """
+            Walls with bounding box intersecting the one of o
+        """
+        walls = [wall for wall in context.scene.objects if self.filter_wall(wall)]
+        return SceneBoundsIndex(walls).query(world_bounds([o])[0])
+
+    def autoboolean(self, context, wall, candidates=None):
+        """
+            Entry point for multi-boolean operations like
+            in T panel autoBoolean
+            candidates: objects in wall bounding box, found using
+            find_candidates when not provided
+        """
+        if candidates is None:
+            candidates = self.find_candidates(context, [wall])[0]
+        else:
+            self._ensure_wall_modifier(context, wall)
+
         bpy.ops.object.select_all(action='DESELECT')
         context.scene.objects.active = None
         childs = []
         holes = []
-        # get wall bounds to find what's inside
+        # get wall bounds to sort holes
         self._init_bounding_box(wall)
+        mesh_openings = self.mesh_openings(wall)
+        rejected = set()
+        if mesh_openings:
+            d = wall.data.archipack_wall2[0]
+            rejected = d.rejected_openings(context, d.get_generator())
 
         # either generate hole or get existing one
-        for o in context.scene.objects:
-            # filter holes found in wall bounding box
-            if o.type == 'MESH' and self._contains(o):
-                h = self._generate_hole(context, o)
-                if h is not None:
-                    holes.append(h)
-                    childs.append(o)
+        for o in candidates:
+            # wall cut windows and doors openings by itself,
+            # rejected ones still use a boolean hole
+            if (mesh_openings and o.name not in rejected and
+                    self.datablock(o) is not None):
+                childs.append(o)
+                continue
+            # holes found in wall bounding box
+            h = self._generate_hole(context, o)
+            if h is not None:
+                holes.append(h)
+                childs.append(o)
 
         # sort from center to border
         self.sort_holes(wall, holes)
@@ -285,7 +543,12 @@ class ArchipackBoolManager():
             self.prepare_hole(hole)
 
         # update / remove / add  boolean modifier
-        self.update_hybrid(context, wall, childs, holes)
+        if mesh_openings and len(holes) < 1:
+            m = wall.modifiers.get("AutoMixedBoolean")
+            if m is not None:
+                self.remove_modif_and_object(context, wall, [[m, m.object]])
+        else:
+            self.update_hybrid(context, wall, childs, holes)
 
         bpy.ops.object.select_all(action='DESELECT')
         # parenting childs to wall reference point
@@ -325,35 +588,44 @@ class ArchipackBoolManager():
 
         hole = None
         hole_obj = None
+        # wall cut windows and doors openings by itself
+        mesh_openings = d is not None and self.mesh_openings(wall)
 
-        if d is not None:
+        if d is not None and not mesh_openings:
             hole = d.interactive_hole(context, o)
 
-        if hole is None:
+        if hole is None and not mesh_openings:
             return
 
-        hole.data.materials.clear()
-        for mat in wall.data.materials:
-            hole.data.materials.append(mat)
-
-        self.prepare_hole(hole)
+        if hole is not None:
+            hole.data.materials.clear()
+            for mat in wall.data.materials:
+                hole.data.materials.append(mat)
 
-        # find or add merge basis to wall
-        m = wall.modifiers.get('AutoMixedBoolean')
+            self.prepare_hole(hole)
 
-        if m is None:
-            m = wall.modifiers.new('AutoMixedBoolean', 'BOOLEAN')
-            m.operation = 'DIFFERENCE'
-            m.solver = self.solver_mode
+            # find or add merge basis to wall
+            m = wall.modifiers.get('AutoMixedBoolean')
 
-        if m.object is None:
-            hole_obj = self.create_merge_basis(context, wall)
-            m.object = hole_obj
-        else:
-            hole_obj = m.object
+            if m is None:
+                m = wall.modifiers.new('AutoMixedBoolean', 'BOOLEAN')
+                m.operation = 'DIFFERENCE'
+                m.solver = self.solver_mode
 
-        # add hole to merge basis
-        self.union(hole_obj, hole)
+            if m.object is None:
+                hole_obj = self.create_merge_basis(context, wall)
+                m.object = hole_obj
+            else:
+                hole_obj = m.object
+
+            # add hole to merge basis
+            if "archipack_mergedhole" in hole_obj:
+                holes = self.merged_holes(hole_obj)
+                if hole not in holes:
+                    holes.append(hole)
+                self.update_merge_basis(context, hole_obj, holes, 'MESH')
+            else:
+                self.union(hole_obj, hole)
 
         bpy.ops.object.select_all(action='DESELECT')
 
@@ -383,6 +655,10 @@ class ArchipackBoolManager():
             g = d.get_generator()
             d.setup_childs(wall, g)
             d.relocate_childs(context, wall, g)
+            if mesh_openings and o.name in d.update_openings(context, wall):
+                # mesh can't cut opening, use a boolean hole
+                self.autoboolean(context, wall)
+                return
 
         if hole_obj is not None:
             self.prepare_hole(hole_obj)
@@ -451,20 +727,34 @@ class ARCHIPACK_OT_auto_boolean(Operator):
             ),
         default='BMESH'
         )
+    merge_mode = EnumProperty(
+        name="Merge",
+        items=(
+            ('BOOLEAN', 'BOOLEAN', 'One union modifier by hole, follow holes moves', 0),
+            ('MESH', 'MESH', 'Copy holes into a single mesh, union overlapping holes only, '
+                'fast with many holes but require to run again after moving doors or windows', 1)
+            ),
+        default='BOOLEAN'
+        )
 
     def draw(self, context):
         layout = self.layout
         row = layout.row()
         row.prop(self, 'solver_mode')
+        row = layout.row()
+        row.prop(self, 'merge_mode')
 
     def execute(self, context):
         if context.mode == "OBJECT":
-            manager = ArchipackBoolManager(solver_mode=self.solver_mode)
+            manager = ArchipackBoolManager(solver_mode=self.solver_mode, merge_mode=self.merge_mode)
             active = context.scene.objects.active
             walls = [wall for wall in context.selected_objects if manager.filter_wall(wall)]
             bpy.ops.object.select_all(action='DESELECT')
+            index = manager.scene_index(context, walls)
             for wall in walls:
-                manager.autoboolean(context, wall)
+                # query at wall turn, as previous walls may change
+                manager.autoboolean(context, wall, index.query(world_bounds([wall])[0]))
+                index.update([wall])
                 bpy.ops.object.select_all(action='DESELECT')
                 wall.select = True
                 context.scene.objects.active = wall
@@ -542,9 +832,7 @@ class ARCHIPACK_OT_custom_hole(Operator):
             else:
                 o["archipack_custom_hole"] = 1
                 manager = ArchipackBoolManager()
-                manager._init_bounding_box(o)
-                walls = [wall for wall in context.scene.objects 
-                    if manager.filter_wall(wall) and manager._contains(wall)]
+                walls = manager.find_walls(context, o)
                 for wall in walls:
                     wall.select = True
                     context.scene.objects.active = wall
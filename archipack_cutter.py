@@ -28,12 +28,14 @@ from mathutils import Vector, Matrix
 from mathutils.geometry import interpolate_bezier
 from math import cos, sin, pi, atan2
 import bmesh
-from random import uniform
+import numpy as np
 from bpy.props import (
     FloatProperty, IntProperty, BoolProperty,
     StringProperty, EnumProperty
     )
 from .archipack_2d import Line
+from .clip2d import points_inside
+from .pygeos.index_intervaltree import SortedPackedIntervalRTree
 
 
 class CutterSegment(Line):
@@ -197,6 +199,103 @@ class CutterGenerator():
             edges.append([i, i + 1])
 
 
+class RayCrossingVisitor():
+    """
+        Count segments crossed by an horizontal ray
+        starting at pt to the right
+    """
+    def __init__(self, pt):
+        self.x, self.y = pt
+        self.counter = 0
+
+    def visitItem(self, item):
+        x0, y0, x1, y1 = item
+        # half open rule, so vertex are counted once
+        if (y0 > self.y) != (y1 > self.y):
+            x = x0 + (self.y - y0) * (x1 - x0) / (y1 - y0)
+            if self.x < x:
+                self.counter += 1
+
+
+def ray_items(segs, step_angle=0.104):
+    """
+        Segments as (x0, y0, x1, y1) tuples for ray crossing tests
+        curved segments are converted to lines
+    """
+    items = []
+    for s in segs:
+        if hasattr(s, "r"):
+            dt, steps = s.steps_by_angle(step_angle)
+            lines = s.as_lines(steps)
+        else:
+            lines = [s]
+        for line in lines:
+            x0, y0 = line.p0.to_2d()
+            x1, y1 = line.p1.to_2d()
+            items.append((x0, y0, x1, y1))
+    return items
+
+
+class PolygonLocator():
+    """
+        Prepared point in polygon locator
+        Segments are indexed by y extent, so a point query
+        only visit segments crossing the horizontal ray.
+        Build once per boundary or hole and query many times.
+        Results are deterministic: an horizontal ray is used and
+        vertices are handled with a half open rule.
+    """
+    def __init__(self, segs, step_angle=0.104):
+        self.items = ray_items(segs, step_angle)
+        coords = np.array(self.items, dtype=np.float64).reshape(-1, 4)
+        self.a = coords[:, 0:2]
+        self.b = coords[:, 2:4]
+        # index is built on first point query
+        self.index = None
+
+    def _build_index(self):
+        self.index = SortedPackedIntervalRTree()
+        for item in self.items:
+            x0, y0, x1, y1 = item
+            if y0 > y1:
+                y0, y1 = y1, y0
+            self.index.insert(y0, y1, item)
+
+    def inside(self, pt):
+        """
+            Point inside polygon
+        """
+        if self.index is None:
+            self._build_index()
+        visitor = RayCrossingVisitor(tuple(pt[0:2]))
+        if len(self.items) > 0:
+            self.index.query(visitor.y, visitor.y, visitor)
+        return visitor.counter % 2 == 1
+
+    def inside_many(self, pts):
+        """
+            Batch point inside polygon
+            pts: (N, 2) or (N, 3) array like of points
+            return (N,) bool array
+        """
+        pts = np.asarray(pts, dtype=np.float64)
+        if pts.shape[0] < 1:
+            return np.zeros(0, dtype=np.bool_)
+        return points_inside(pts[:, 0:2], self.a, self.b)
+
+
+def locator_key(segs):
+    """
+        Cheap signature of segs geometry, change whenever
+        a seg is added, removed or moved, so a cached
+        locator is rebuilt only when required
+    """
+    return tuple(
+        (s.p0.x, s.p0.y, s.p1.x, s.p1.y, getattr(s, "da", 0))
+        for s in segs
+        )
+
+
 class CutAblePolygon():
     """
         Simple boolean operations
@@ -205,6 +304,7 @@ class CutAblePolygon():
         - segs
         - holes
         - convex
+        Locators are cached by slot: boundary and last other segs
     """
     def as_lines(self, step_angle=0.104):
         """
@@ -219,22 +319,33 @@ class CutAblePolygon():
                 segs.append(s)
         self.segs = segs
 
+    def locator(self, segs=None):
+        """
+            Prepared point in polygon locator for segs
+            default to boundary segs
+            Cached on the polygon, rebuilt when segs change
+        """
+        slot = segs is None
+        if slot:
+            segs = self.segs
+        cache = getattr(self, "_locators", None)
+        if cache is None:
+            cache = {}
+            self._locators = cache
+        key = locator_key(segs)
+        cached = cache.get(slot)
+        if cached is None or cached[0] is not segs or cached[1] != key:
+            cached = (segs, key, PolygonLocator(segs))
+            cache[slot] = cached
+        return cached[2]
+
     def inside(self, pt, segs=None):
         """
             Point inside poly (raycast method)
             support concave polygons
-            TODO:
-            make s1 angle different than all othr segs
+            When testing many points use locator() instead
         """
-        s1 = Line(pt, Vector((min(10000, 100 * self.xsize), uniform(-0.5, 0.5))))
-        counter = 0
-        if segs is None:
-            segs = self.segs
-        for s in segs:
-            res, p, t, u = s.intersect_ext(s1)
-            if res:
-                counter += 1
-        return counter % 2 == 1
+        return self.locator(segs).inside(pt)
 
     def get_index(self, index):
         n_segs = len(self.segs)
@@ -396,10 +507,11 @@ class CutAblePolygon():
         
         # find if all points of the object are inside cutter
         # so there is no need to cut when mode is intersection
+        c_locator = self.locator(c_segs)
         if keep_inside:
             one_outside = False
             for i, s in enumerate(f_segs):
-                res = self.inside(s.p0, c_segs)
+                res = c_locator.inside(s.p0)
                 if not res:
                     one_outside = True
                     break
@@ -408,7 +520,7 @@ class CutAblePolygon():
                 
         # find a point of this pitch inside cutter
         for i, s in enumerate(f_segs):
-            res = self.inside(s.p0, c_segs)
+            res = c_locator.inside(s.p0)
             if res:
                 is_inside = True
             if res == keep_inside:
@@ -418,8 +530,9 @@ class CutAblePolygon():
                 break
 
         # seek for point of cutter inside pitch
+        f_locator = self.locator(f_segs)
         for i, s in enumerate(c_segs):
-            res = self.inside(s.p0)
+            res = f_locator.inside(s.p0)
             if res:
                 is_inside = True
             # no pitch point found inside cutter
@@ -481,6 +594,30 @@ class CutAbleGenerator():
             clear_inner=clear_inner
             )
 
+    def faces_inside(self, bm, locator, outside=False):
+        """
+            Return faces of bm with center inside locator's polygon
+            or outside when outside is True
+        """
+        faces = bm.faces[:]
+        centers = [f.calc_center_median().to_2d() for f in faces]
+        res = locator.inside_many(np.array(centers, dtype=np.float64).reshape(-1, 2))
+        if outside:
+            res = ~res
+        return [faces[i] for i in np.flatnonzero(res)]
+
+    def clip_ring(self, segs):
+        """
+            2d ring of segments for tiles or faces pre-clipping
+            return None when segs contains curved parts
+        """
+        ring = []
+        for s in segs:
+            if hasattr(s, "r"):
+                return None
+            ring.extend([tuple(s.p0.to_2d()), tuple(s.p1.to_2d())])
+        return ring
+
     def cut_holes(self, bm, cutable, offset={'DEFAULT': 0}):
         o_keys = offset.keys()
         has_offset = len(o_keys) > 1 or offset['DEFAULT'] != 0
@@ -526,10 +663,7 @@ class CutAbleGenerator():
                 segs = hole.segs
             if len(segs) > 0:
                 # when hole segs are found clear parts inside hole
-                f_geom = [f for f in bm.faces
-                    if cutable.inside(
-                        f.calc_center_median().to_2d(),
-                        segs=segs)]
+                f_geom = self.faces_inside(bm, cutable.locator(segs))
                 if len(f_geom) > 0:
                     bmesh.ops.delete(bm, geom=f_geom, context=5)
 
@@ -554,8 +688,7 @@ class CutAbleGenerator():
                     self.bissect(bm, s.p0.to_3d(), n.to_3d(), clear_outer=cutable.convex)
 
         if not cutable.convex:
-            f_geom = [f for f in bm.faces
-                if not cutable.inside(f.calc_center_median().to_2d())]
+            f_geom = self.faces_inside(bm, cutable.locator(), outside=True)
             if len(f_geom) > 0:
                 bmesh.ops.delete(bm, geom=f_geom, context=5)
 
@@ -0,0 +1,228 @@
+# -*- coding:utf-8 -*-
+
+# ##### BEGIN GPL LICENSE BLOCK #####
+#
+#  This program is free software; you can redistribute it and/or
+#  modify it under the terms of the GNU General Public License
+#  as published by the Free Software Foundation; either version 2
+#  of the License, or (at your option) any later version.
+#
+#  This program is distributed in the hope that it will be useful,
+#  but WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#  GNU General Public License for more details.
+#
+#  You should have received a copy of the GNU General Public License
+#  along with this program; if not, write to the Free Software Foundation,
+#  Inc., 51 Franklin Street, Fifth Floor, Boston, MA 02110-1301, USA.
+#
+# ##### END GPL LICENSE BLOCK #####
+
+# <pep8 compliant>
+
+# ----------------------------------------------------------
+# Author: Stephen Leger (s-leger)
+#
+# ----------------------------------------------------------
+# Dependency graph between archipack objects
+# Edges are (upstream, downstream, relation) and store a digest
+# of upstream inputs the downstream object depends on.
+# An edge is dirty when digest change, so edits only
+# recompute downstream objects depending on changed inputs.
+# Blender reuse names of deleted and renamed objects, so edges
+# ends are (name, pointer) of objects, and edges of deleted
+# objects are pruned on scene update, along with registered
+# per object caches keyed the same way.
+#   wall -> window / door   relation 'wall_child'
+#   window / door -> hole   relation 'hole'
+#   hole -> AutoBoolean     follow 'hole' edge
+#   roof -> roof T child    relation 'roof_child'
+#   roof T child -> cutter  relation 'roof_hole'
+#   slab -> balcony fence   relation 'slab_child'
+# ----------------------------------------------------------
+import bpy
+from bpy.types import Operator, Panel
+from bpy.props import BoolProperty
+from bpy.app.handlers import persistent
+from collections import deque
+from .geometry_cache import digest
+
+
+def node(o):
+    """
+        Edge end of object o, name alone may be reused
+        by a new object with same parameters
+    """
+    if o is None:
+        return None
+    return (o.name, o.as_pointer())
+
+
+class DependencyGraph():
+    """
+        Per edge dirty flags
+        log: last recomputed edges and why, for debug purposes
+    """
+    def __init__(self, max_log=100):
+        # (upstream, downstream, relation): digest
+        self.edges = {}
+        # number of objects on last prune
+        self.n_objects = 0
+        self.log = deque(maxlen=max_log)
+        self.recomputed = 0
+        self.skipped = 0
+        # when disabled, every edge is dirty
+        self.enabled = True
+        # per object caches keyed by node(o), pruned and cleared with edges
+        self.caches = []
+
+    def register_cache(self, cache):
+        """
+            Prune and clear a dict keyed by node(o) along with edges
+        """
+        if cache not in self.caches:
+            self.caches.append(cache)
+
+    def unregister_cache(self, cache):
+        if cache in self.caches:
+            self.caches.remove(cache)
+
+    def changed(self, upstream, downstream, relation, *inputs):
+        """
+            Check edge dirty flag
+            upstream, downstream: objects, downstream may be None
+            inputs: all upstream inputs downstream depends on
+            return True when downstream must be recomputed,
+            caller must clean the edge after recompute
+        """
+        key = (node(upstream), node(downstream), relation)
+        signature = digest(*inputs)
+        last = self.edges.get(key, "")
+        if self.enabled and last == signature:
+            self.skipped += 1
+            return False
+        if not self.enabled:
+            reason = "graph disabled"
+        elif last == "":
+            reason = "new edge"
+        else:
+            reason = "inputs changed"
+        self.recomputed += 1
+        self.log.append((relation, upstream.name, getattr(downstream, "name", ""), reason))
+        return True
+
+    def clean(self, upstream, downstream, relation, *inputs):
+        """
+            Store digest of inputs after successful downstream
+            recompute, as recompute may change inputs
+        """
+        self.edges[(node(upstream), node(downstream), relation)] = digest(*inputs)
+
+    def prune(self, objects):
+        """
+            Remove edges from and to deleted objects,
+            a new object may reuse both name and pointer
+        """
+        alive = set([node(o) for o in objects])
+        alive.add(None)
+        for key in [key for key in self.edges.keys()
+                if key[0] not in alive or key[1] not in alive]:
+            del self.edges[key]
+        for cache in self.caches:
+            for key in [key for key in cache.keys() if key not in alive]:
+                del cache[key]
+        self.n_objects = len(objects)
+
+    def clear(self):
+        self.edges.clear()
+        for cache in self.caches:
+            cache.clear()
+
+    def clear_log(self):
+        self.log.clear()
+        self.recomputed = 0
+        self.skipped = 0
+
+
+depsgraph = DependencyGraph()
+
+
+@persistent
+def depsgraph_reset(dummy):
+    """
+        Undo and file load restore objects state
+        without updates, so every edge may be wrong
+    """
+    depsgraph.clear()
+
+
+@persistent
+def depsgraph_prune(scene):
+    """
+        Prune edges of deleted objects,
+        only when number of objects did decrease
+    """
+    objects = bpy.data.objects
+    if len(objects) < depsgraph.n_objects:
+        depsgraph.prune(objects)
+    else:
+        depsgraph.n_objects = len(objects)
+
+
+class ARCHIPACK_OT_depsgraph(Operator):
+    bl_idname = "archipack.depsgraph"
+    bl_label = "Dependencies"
+    bl_description = "Enable / disable or clear dependency graph"
+    bl_options = {'INTERNAL'}
+
+    clear = BoolProperty(default=False)
+
+    def execute(self, context):
+        if self.clear:
+            depsgraph.clear()
+            depsgraph.clear_log()
+        else:
+            depsgraph.enabled = not depsgraph.enabled
+        return {'FINISHED'}
+
+
+class ARCHIPACK_PT_depsgraph(Panel):
+    bl_idname = "ARCHIPACK_PT_depsgraph"
+    bl_label = "Dependencies"
+    bl_space_type = 'VIEW_3D'
+    bl_region_type = 'UI'
+    bl_category = 'ArchiPack'
+    bl_options = {'DEFAULT_CLOSED'}
+
+    def draw(self, context):
+        layout = self.layout
+        row = layout.row(align=True)
+        if depsgraph.enabled:
+            row.operator("archipack.depsgraph", text="Disable", icon="CHECKBOX_HLT").clear = False
+        else:
+            row.operator("archipack.depsgraph", text="Enable", icon="CHECKBOX_DEHLT").clear = False
+        row.operator("archipack.depsgraph", text="Clear", icon="X").clear = True
+        layout.label("Recomputed: %s Skipped: %s" % (depsgraph.recomputed, depsgraph.skipped))
+        box = layout.box()
+        for relation, upstream, downstream, reason in reversed(depsgraph.log):
+            box.label("%s -> %s (%s): %s" % (upstream, downstream, relation, reason))
+
+
+def register():
+    bpy.utils.register_class(ARCHIPACK_OT_depsgraph)
+    bpy.utils.register_class(ARCHIPACK_PT_depsgraph)
+    bpy.app.handlers.undo_post.append(depsgraph_reset)
+    bpy.app.handlers.redo_post.append(depsgraph_reset)
+    bpy.app.handlers.load_post.append(depsgraph_reset)
+    bpy.app.handlers.scene_update_post.append(depsgraph_prune)
+
+
+def unregister():
+    bpy.app.handlers.scene_update_post.remove(depsgraph_prune)
+    bpy.app.handlers.undo_post.remove(depsgraph_reset)
+    bpy.app.handlers.redo_post.remove(depsgraph_reset)
+    bpy.app.handlers.load_post.remove(depsgraph_reset)
+    bpy.utils.unregister_class(ARCHIPACK_PT_depsgraph)
+    bpy.utils.unregister_class(ARCHIPACK_OT_depsgraph)
+    depsgraph.clear()
+    depsgraph.clear_log()
@@ -36,13 +36,16 @@ from bpy.props import (
 from mathutils import Vector
 # door component objects (panels, handles ..)
 from .bmesh_utils import BmeshEdit as bmed
-from .panel import Panel as DoorPanel
+from .panel import Panel as DoorPanel, PanelMesh
 from .archipack_handle import create_handle, door_handle_horizontal_01
 from .archipack_manipulator import Manipulable
 from .archipack_preset import ArchipackPreset, PresetMenuOperator
 from .archipack_object import ArchipackObject, ArchipackCreateTool, ArchpackDrawTool
 from .archipack_gl import FeedbackPanel
 from .archipack_keymaps import Keymaps
+from .archipack_autoboolean import ArchipackBoolManager
+from .archipack_depsgraph import depsgraph
+from .geometry_cache import properties
 
 
 SPACING = 0.005
@@ -289,8 +292,7 @@ class archipack_door_panel(ArchipackObject, PropertyGroup):
 
         return side, face, back
 
-    @property
-    def verts(self):
+    def panel_mesh(self):
         if self.panels_distrib == 'REGULAR':
             subdiv_y = self.panels_y - 1
         else:
@@ -314,8 +316,11 @@ class archipack_door_panel(ArchipackObject, PropertyGroup):
         origin = Vector((-pivot * 0.5 * self.x, 0, 0))
         offset = Vector((0, 0, 0))
         size = Vector((self.x, self.z, 0))
-        verts = side.vertices(curve_steps, offset, center, origin,
-            size, radius, 0, pivot, shape_z=shape_z, path_type=path_type)
+        mesh = PanelMesh(curve_steps)
+        mesh.add_panel(side, path_type, 1, 0,
+            offset, center, origin, size, radius, 0, pivot, 0, self.panel_border,
+            shape_z=shape_z)
+
         if face is not None:
             p_radius = radius.copy()
             p_radius.x -= x1
@@ -332,11 +337,11 @@ class archipack_door_panel(ArchipackObject, PropertyGroup):
                         offset = Vector(((pivot * 0.5 * self.x) + p_size.x * (i + 0.5) - 0.5 * size.x + x1,
                             bottom_z + p_size.y * j + x1, 0))
                         origin = Vector((p_size.x * (i + 0.5) - 0.5 * size.x + x1, bottom_z + p_size.y * j + x1, 0))
-                        verts += face.vertices(curve_steps, offset, center, origin,
-                            p_size, p_radius, 0, 0, shape_z=None, path_type=shape)
+                        mesh.add_panel(face, shape, 1, 1,
+                            offset, center, origin, p_size, p_radius, 0, 0)
                         if back is not None:
-                            verts += back.vertices(curve_steps, offset, center, origin,
-                                p_size, p_radius, 0, 0, shape_z=None, path_type=shape)
+                            mesh.add_panel(back, shape, 0, 0,
+                                offset, center, origin, p_size, p_radius, 0, 0)
             else:
                 ####################################
                 # Ratio vertical panels 1/3 - 2/3
@@ -344,198 +349,20 @@ class archipack_door_panel(ArchipackObject, PropertyGroup):
                 p_size = Vector(((self.x - 2 * x1) / self.panels_x, (self.z - 2 * x1 - bottom_z) / 3, 0))
                 p_size_2x = Vector((p_size.x, p_size.y * 2, 0))
                 for i in range(self.panels_x):
-                    j = 0
-                    offset = Vector(((pivot * 0.5 * self.x) + p_size.x * (i + 0.5) - 0.5 * size.x + x1,
-                        bottom_z + p_size.y * j + x1, 0))
-                    origin = Vector((p_size.x * (i + 0.5) - 0.5 * size.x + x1, bottom_z + p_size.y * j + x1, 0))
-                    shape = 'RECTANGLE'
-                    face.subdiv_y = 0
-                    verts += face.vertices(curve_steps, offset, center, origin,
-                        p_size, p_radius, 0, 0, shape_z=None, path_type=shape)
-                    if back is not None:
-                        back.subdiv_y = 0
-                        verts += back.vertices(curve_steps, offset, center, origin,
-                            p_size, p_radius, 0, 0, shape_z=None, path_type=shape)
-                    j = 1
-                    offset = Vector(((pivot * 0.5 * self.x) + p_size.x * (i + 0.5) - 0.5 * size.x + x1,
-                        bottom_z + p_size.y * j + x1, 0))
-                    origin = Vector((p_size.x * (i + 0.5) - 0.5 * size.x + x1,
-                        bottom_z + p_size.y * j + x1, 0))
-                    shape = path_type
-                    face.subdiv_y = 1
-                    verts += face.vertices(curve_steps, offset, center, origin,
-                        p_size_2x, p_radius, 0, 0, shape_z=None, path_type=path_type)
-                    if back is not None:
-                        back.subdiv_y = 1
-                        verts += back.vertices(curve_steps, offset, center, origin,
-                            p_size_2x, p_radius, 0, 0, shape_z=None, path_type=path_type)
-
-        return verts
-
-    @property
-    def faces(self):
-        if self.panels_distrib == 'REGULAR':
-            subdiv_y = self.panels_y - 1
-        else:
-            subdiv_y = 2
-
-        path_type = 'RECTANGLE'
-        curve_steps = 16
-        side, face, back = self.panels
-
-        faces = side.faces(curve_steps, path_type=path_type)
-        faces_offset = side.n_verts(curve_steps, path_type=path_type)
-
-        if face is not None:
-            if self.panels_distrib == 'REGULAR':
-                for i in range(self.panels_x):
-                    for j in range(self.panels_y):
-                        if j < subdiv_y:
-                            shape = 'RECTANGLE'
-                        else:
-                            shape = path_type
-                        faces += face.faces(curve_steps, path_type=shape, offset=faces_offset)
-                        faces_offset += face.n_verts(curve_steps, path_type=shape)
-                        if back is not None:
-                            faces += back.faces(curve_steps, path_type=shape, offset=faces_offset)
-                            faces_offset += back.n_verts(curve_steps, path_type=shape)
-            else:
-                ####################################
-                # Ratio vertical panels 1/3 - 2/3
-                ####################################
-                for i in range(self.panels_x):
-                    j = 0
-                    shape = 'RECTANGLE'
-                    face.subdiv_y = 0
-                    faces += face.faces(curve_steps, path_type=shape, offset=faces_offset)
-                    faces_offset += face.n_verts(curve_steps, path_type=shape)
-                    if back is not None:
-                        back.subdiv_y = 0
-                        faces += back.faces(curve_steps, path_type=shape, offset=faces_offset)
-                        faces_offset += back.n_verts(curve_steps, path_type=shape)
-                    j = 1
-                    shape = path_type
-                    face.subdiv_y = 1
-                    faces += face.faces(curve_steps, path_type=path_type, offset=faces_offset)
-                    faces_offset += face.n_verts(curve_steps, path_type=path_type)
-                    if back is not None:
-                        back.subdiv_y = 1
-                        faces += back.faces(curve_steps, path_type=path_type, offset=faces_offset)
-                        faces_offset += back.n_verts(curve_steps, path_type=path_type)
-
-        return faces
-
-    @property
-    def uvs(self):
-        if self.panels_distrib == 'REGULAR':
-            subdiv_y = self.panels_y - 1
-        else:
-            subdiv_y = 2
-
-        radius = Vector((0.8, 0.5, 0))
-        center = Vector((0, self.z - radius.x, 0))
-
-        if self.direction == 0:
-            pivot = 1
-        else:
-            pivot = -1
-
-        path_type = 'RECTANGLE'
-        curve_steps = 16
-        side, face, back = self.panels
-
-        x1 = max(0.001, self.panel_border - 0.5 * self.panel_spacing)
-        bottom_z = self.panel_bottom
-        origin = Vector((-pivot * 0.5 * self.x, 0, 0))
-        size = Vector((self.x, self.z, 0))
-        uvs = side.uv(curve_steps, center, origin, size, radius, 0, pivot, 0, self.panel_border, path_type=path_type)
-        if face is not None:
-            p_radius = radius.copy()
-            p_radius.x -= x1
-            p_radius.y -= x1
-            if self.panels_distrib == 'REGULAR':
-                p_size = Vector(((self.x - 2 * x1) / self.panels_x, (self.z - 2 * x1 - bottom_z) / self.panels_y, 0))
-                for i in range(self.panels_x):
-                    for j in range(self.panels_y):
-                        if j < subdiv_y:
-                            shape = 'RECTANGLE'
-                        else:
-                            shape = path_type
-                        origin = Vector((p_size.x * (i + 0.5) - 0.5 * size.x + x1, bottom_z + p_size.y * j + x1, 0))
-                        uvs += face.uv(curve_steps, center, origin, p_size, p_radius, 0, 0, 0, 0, path_type=shape)
+                    for j, shape, _size in ((0, 'RECTANGLE', p_size), (1, path_type, p_size_2x)):
+                        offset = Vector(((pivot * 0.5 * self.x) + p_size.x * (i + 0.5) - 0.5 * size.x + x1,
+                            bottom_z + p_size.y * j + x1, 0))
+                        origin = Vector((p_size.x * (i + 0.5) - 0.5 * size.x + x1,
+                            bottom_z + p_size.y * j + x1, 0))
+                        face.subdiv_y = j
+                        mesh.add_panel(face, shape, 1, 1,
+                            offset, center, origin, _size, p_radius, 0, 0)
                         if back is not None:
-                            uvs += back.uv(curve_steps, center, origin,
-                                p_size, p_radius, 0, 0, 0, 0, path_type=shape)
-            else:
-                ####################################
-                # Ratio vertical panels 1/3 - 2/3
-                ####################################
-                p_size = Vector(((self.x - 2 * x1) / self.panels_x, (self.z - 2 * x1 - bottom_z) / 3, 0))
-                p_size_2x = Vector((p_size.x, p_size.y * 2, 0))
-                for i in range(self.panels_x):
-                    j = 0
-                    origin = Vector((p_size.x * (i + 0.5) - 0.5 * size.x + x1, bottom_z + p_size.y * j + x1, 0))
-                    shape = 'RECTANGLE'
-                    face.subdiv_y = 0
-                    uvs += face.uv(curve_steps, center, origin, p_size, p_radius, 0, 0, 0, 0, path_type=shape)
-                    if back is not None:
-                        back.subdiv_y = 0
-                        uvs += back.uv(curve_steps, center, origin, p_size, p_radius, 0, 0, 0, 0, path_type=shape)
-                    j = 1
-                    origin = Vector((p_size.x * (i + 0.5) - 0.5 * size.x + x1, bottom_z + p_size.y * j + x1, 0))
-                    shape = path_type
-                    face.subdiv_y = 1
-                    uvs += face.uv(curve_steps, center, origin, p_size_2x, p_radius, 0, 0, 0, 0, path_type=path_type)
-                    if back is not None:
-                        back.subdiv_y = 1
-                        uvs += back.uv(curve_steps, center, origin,
-                            p_size_2x, p_radius, 0, 0, 0, 0, path_type=path_type)
-        return uvs
+                            back.subdiv_y = j
+                            mesh.add_panel(back, shape, 0, 0,
+                                offset, center, origin, _size, p_radius, 0, 0)
 
-    @property
-    def matids(self):
-        if self.panels_distrib == 'REGULAR':
-            subdiv_y = self.panels_y - 1
-        else:
-            subdiv_y = 2
-
-        path_type = 'RECTANGLE'
-        curve_steps = 16
-        side, face, back = self.panels
-
-        mat = side.mat(curve_steps, 1, 0, path_type=path_type)
-
-        if face is not None:
-            if self.panels_distrib == 'REGULAR':
-                for i in range(self.panels_x):
-                    for j in range(self.panels_y):
-                        if j < subdiv_y:
-                            shape = 'RECTANGLE'
-                        else:
-                            shape = path_type
-                        mat += face.mat(curve_steps, 1, 1, path_type=shape)
-                        if back is not None:
-                            mat += back.mat(curve_steps, 0, 0, path_type=shape)
-            else:
-                ####################################
-                # Ratio vertical panels 1/3 - 2/3
-                ####################################
-                for i in range(self.panels_x):
-                    j = 0
-                    shape = 'RECTANGLE'
-                    face.subdiv_y = 0
-                    mat += face.mat(curve_steps, 1, 1, path_type=shape)
-                    if back is not None:
-                        back.subdiv_y = 0
-                        mat += back.mat(curve_steps, 0, 0, path_type=shape)
-                    j = 1
-                    shape = path_type
-                    face.subdiv_y = 1
-                    mat += face.mat(curve_steps, 1, 1, path_type=shape)
-                    if back is not None:
-                        back.subdiv_y = 1
-                        mat += back.mat(curve_steps, 0, 0, path_type=shape)
-        return mat
+        return mesh
 
     def find_handle(self, o):
         for child in o.children:
@@ -568,7 +395,8 @@ class archipack_door_panel(ArchipackObject, PropertyGroup):
         if o is None:
             return
 
-        bmed.buildmesh(context, o, self.verts, self.faces, matids=self.matids, uvs=self.uvs, weld=True)
+        mesh = self.panel_mesh()
+        bmed.buildmesh_arrays(context, o, *mesh.arrays(), weld=True)
 
         if self.handle == 'NONE':
             self.remove_handle(context, o)
@@ -783,6 +611,14 @@ class ARCHIPACK_OT_select_parent(Operator):
             return {'CANCELLED'}
 
 
+# properties without effect on hole
+HOLE_UNRELATED = {
+    'direction', 'model', 'n_panels', 'chanfer',
+    'panel_spacing', 'panel_bottom', 'panel_border',
+    'panels_x', 'panels_y', 'panels_distrib', 'handle'
+    }
+
+
 class archipack_door(ArchipackObject, Manipulable, PropertyGroup):
     """
         The frame is the door main object
@@ -989,26 +825,13 @@ class archipack_door(ArchipackObject, Manipulable, PropertyGroup):
             side_cap_back=0     # cap index
             )
 
-    @property
-    def verts(self):
+    def panel_mesh(self):
         # door inner space
         v = Vector((0, 0, 0))
         size = Vector((self.x, self.z, self.y))
-        return self.frame.vertices(16, v, v, v, size, v, 0, 0, shape_z=None, path_type='RECTANGLE')
-
-    @property
-    def faces(self):
-        return self.frame.faces(16, path_type='RECTANGLE')
-
-    @property
-    def matids(self):
-        return self.frame.mat(16, 0, 0, path_type='RECTANGLE')
-
-    @property
-    def uvs(self):
-        v = Vector((0, 0, 0))
-        size = Vector((self.x, self.z, self.y))
-        return self.frame.uv(16, v, v, size, v, 0, 0, 0, 0, path_type='RECTANGLE')
+        mesh = PanelMesh(16)
+        mesh.add_panel(self.frame, 'RECTANGLE', 0, 0, v, v, v, size, v, 0, 0)
+        return mesh
 
     def setup_manipulators(self):
         if len(self.manipulators) == 3:
@@ -1284,12 +1107,24 @@ class archipack_door(ArchipackObject, Manipulable, PropertyGroup):
         self.setup_manipulators()
 
         if childs_only is False:
-            bmed.buildmesh(context, o, self.verts, self.faces, self.matids, self.uvs)
+            mesh = self.panel_mesh()
+            bmed.buildmesh_arrays(context, o, *mesh.arrays())
 
         self.update_childs(context, o)
 
-        if childs_only is False and self.find_hole(o) is not None:
-            self.interactive_hole(context, o)
+        # update hole, merged holes and walls cutting openings
+        # only when hole inputs did change
+        def hole_inputs(hole_obj):
+            return (o.matrix_world, properties(self, HOLE_UNRELATED),
+                hole_obj is not None and len(hole_obj.data.vertices))
+
+        hole_obj = self.find_hole(o)
+        if childs_only is False and depsgraph.changed(o, hole_obj, 'hole', *hole_inputs(hole_obj)):
+            if hole_obj is not None:
+                self.interactive_hole(context, o)
+            ArchipackBoolManager().refresh_hole(context, o)
+            hole_obj = self.find_hole(o)
+            depsgraph.clean(o, hole_obj, 'hole', *hole_inputs(hole_obj))
 
         # support for instances childs, update at object level
         self.synch_childs(context, o)
@@ -1309,6 +1144,16 @@ class archipack_door(ArchipackObject, Manipulable, PropertyGroup):
                 return child
         return None
 
+    @property
+    def opening(self):
+        """
+            Outline of hole through wall in x, z
+            for walls cutting openings in mesh
+        """
+        x = 0.5 * self.x + self.frame_x
+        z = self.z + self.frame_x
+        return [(-x, 0), (-x, z), (x, z), (x, 0)]
+
     def interactive_hole(self, context, o):
         hole_obj = self.find_hole(o)
         if hole_obj is None:
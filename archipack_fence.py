@@ -1467,16 +1467,19 @@ class archipack_fence(ArchipackObject, Manipulable, PropertyGroup):
 
         g = self.get_generator()
 
+        # posts only while manipulating
+        proxy = self.manipulable_use_proxy(manipulable_refresh)
+
         # depth at bottom
         # self.manipulators[1].set_pts([(0, 0, 0), (0, 0, self.height), (1, 0, 0)])
 
-        if self.user_defined_post_enable:
+        if self.user_defined_post_enable and not proxy:
             # user defined posts
             user_def_post = context.scene.objects.get(self.user_defined_post)
             if user_def_post is not None and user_def_post.type == 'MESH':
                 g.setup_user_defined_post(user_def_post, self.post_x, self.post_y, self.post_z, self.post_rotation)
 
-        if self.post:
+        if self.post or proxy:
             g.make_post(0.5 * self.post_x, 0.5 * self.post_y, self.post_z,
                     self.post_alt, self.x_offset,
                     int(self.idmat_post), verts, faces, matids, uvs)
@@ -1484,6 +1487,11 @@ class archipack_fence(ArchipackObject, Manipulable, PropertyGroup):
         # reset user def posts
         g.user_defined_post = None
 
+        if proxy:
+            bmed.buildmesh(context, o, verts, faces, matids=matids, uvs=uvs, weld=False, clean=False)
+            self.restore_context(context)
+            return
+
         # user defined subs
         if self.user_defined_subs_enable:
             user_def_subs = context.scene.objects.get(self.user_defined_subs)
@@ -1611,6 +1619,7 @@ class ARCHIPACK_PT_fence(Panel):
         layout = self.layout
         row = layout.row(align=True)
         row.operator('archipack.fence_manipulate', icon='HAND')
+        row.prop(prop, 'proxy_level', text="")
         box = layout.box()
         # box.label(text="Styles")
         row = box.row(align=True)
@@ -32,14 +32,16 @@ from bpy.props import (
     )
 from mathutils import Vector, Matrix
 from mathutils.geometry import interpolate_bezier
-from random import uniform
-from math import radians, cos, sin, pi, atan2, sqrt
+from math import radians, cos, sin, pi, atan2
 import bmesh
 from .bmesh_utils import BmeshEdit as bmed
 from .archipack_2d import Line, Arc
 from .archipack_manipulator import Manipulable, archipack_manipulator
 from .archipack_preset import ArchipackPreset, PresetMenuOperator
 from .archipack_object import ArchipackCreateTool, ArchipackObject
+from .floor_patterns import clip_pattern
+from .archipack_worker import geometry_worker, Snapshot
+from .geometry_cache import geometry_cache, digest, properties, segments
 from .archipack_cutter import (
     CutAblePolygon, CutAbleGenerator,
     ArchipackCutter,
@@ -274,28 +276,14 @@ class FloorGenerator(CutAblePolygon, CutAbleGenerator):
                 g.change_coordsys(b.matrix_world, o.matrix_world)
                 self.slice(g)
 
-    def floor(self, context, o, d):
-
-        verts, faces, matids, uvs = [], [], [], []
-
-        if d.bevel:
-            bevel = d.bevel_amount
-        else:
-            bevel = 0
-
-        if d.add_grout:
-            thickness = min(d.thickness - d.mortar_depth, d.thickness - 0.0001)
-            bottom = min(d.thickness - (d.mortar_depth + bevel), d.thickness - 0.0001)
-        else:
-            thickness = d.thickness
-            bottom = 0
-
-        self.top = d.thickness
+    def floor_tiles(self, context, o, d, bottom, pattern):
+        """
+            Build tiles as a temporary bmesh
+            pattern: clip_pattern result
+        """
+        tiles, inside, clipped = pattern
 
-        self.generate_pattern(d, verts, faces, matids, uvs)
-        bm = bmed.buildmesh(
-                context, o, verts, faces, matids=matids, uvs=uvs,
-                weld=False, clean=False, auto_smooth=True, temporary=True)
+        bm = bmed.from_arrays(tiles)
 
         self.cut_holes(bm, self)
         self.cut_boundary(bm, self)
@@ -307,6 +295,12 @@ class FloorGenerator(CutAblePolygon, CutAbleGenerator):
                     edges=bm.edges,
                     delimit=1)
 
+        if inside is not None:
+            bmed.extend_arrays(bm, inside)
+
+        if clipped is not None:
+            bmed.extend_arrays(bm, clipped)
+
         bm.verts.ensure_lookup_table()
 
         if d.solidify:
@@ -340,7 +334,59 @@ class FloorGenerator(CutAblePolygon, CutAbleGenerator):
                     clamp_overlap=False,
                     material=-1)
 
-        bm.to_mesh(o.data)
+        return bm
+
+    def heights(self, d):
+        """
+            Grout thickness and bottom of tiles
+        """
+        if d.bevel:
+            bevel = d.bevel_amount
+        else:
+            bevel = 0
+
+        if d.add_grout:
+            thickness = min(d.thickness - d.mortar_depth, d.thickness - 0.0001)
+            bottom = min(d.thickness - (d.mortar_depth + bevel), d.thickness - 0.0001)
+        else:
+            thickness = d.thickness
+            bottom = 0
+
+        return thickness, bottom
+
+    def floor(self, context, o, d):
+
+        self.top = d.thickness
+
+        # tiles are cached by content, key on all generator inputs
+        key = digest(
+            "floor",
+            properties(d),
+            segments(self.segs),
+            [segments(hole.segs) for hole in self.holes])
+        arrays = geometry_cache.get(key)
+        if arrays is not None:
+            self.floor_mesh(context, o, d, bmed.from_arrays(arrays))
+            return
+
+        def apply(context, o, pattern):
+            d = archipack_floor.datablock(o)
+            thickness, bottom = self.heights(d)
+            bm = self.floor_tiles(context, o, d, bottom, pattern)
+            geometry_cache.set(key, bmed.arrays(bm))
+            self.floor_mesh(context, o, d, bm)
+
+        # pattern is computed in background, show slab outline meanwhile
+        if geometry_worker.submit(context, o, clip_pattern, self.pattern_args(d), apply):
+            self.proxy(context, o, d)
+
+    def floor_mesh(self, context, o, d, bm):
+        """
+            Replace mesh by tiles bmesh and add grout
+        """
+        thickness, bottom = self.heights(d)
+
+        bmed.to_mesh(bm, o.data)
         bm.free()
 
         # Grout
@@ -376,464 +422,39 @@ class FloorGenerator(CutAblePolygon, CutAbleGenerator):
 
         bpy.ops.object.mode_set(mode='OBJECT')
 
-    # ---------------------------------------------------
-    # Patterns
-    # ---------------------------------------------------
-
-    def regular_tile(self, d, verts, faces, matids, uvs):
-        """
-         ____  ____  ____
-        |    ||    ||    | Regular tile, rows can be offset, either manually or randomly
-        |____||____||____|
-           ____  ____  ____
-          |    ||    ||    |
-          |____||____||____|
-        """
-        off = False
-        o = 1 / (100 / d.offset) if d.offset != 0 else 0
-        y = self.ymin
-
-        while y < self.ymax:
-            x = self.xmin
-            tl2 = d.tile_length
-            if y < self.ymax < y + d.tile_length:
-                tl2 = self.ymax - y
-
-            while x < self.xmax:
-                tw2 = d.tile_width
-
-                if x < self.xmax < x + d.tile_width:
-                    tw2 = self.xmax - x
-                elif x == self.xmin and off and not d.random_offset:
-                    tw2 = d.tile_width * o
-                elif x == self.xmin and d.random_offset:
-                    v = d.tile_width * d.offset_variance * 0.0049
-                    tw2 = (d.tile_width / 2) + uniform(-v, v)
-
-                self.add_plane(d, verts, faces, matids, uvs, x, y, tw2, tl2)
-                x += tw2 + d.spacing
-
-            y += tl2 + d.spacing
-            off = not off
-
-    def hopscotch(self, d, verts, faces, matids, uvs):
-        """
-         ____  _  Large tile, plus small one on top right corner
-        |    ||_|
-        |____| ____  _  But shifted up so next large one is right below previous small one
-              |    ||_|
-              |____|
-        """
-        sp = d.spacing
-
-        # movement variables
-        row = 0
-
-        tw = d.tile_width
-        tl = d.tile_length
-        s_tw = (tw - sp) / 2  # small tile width
-        s_tl = (tl - sp) / 2  # small tile length
-        y = self.ymin - s_tl
-
-        pre_y = y
-        while y < self.ymax + s_tl or (row == 2 and y - sp < self.ymax):
-            x = self.xmin
-            step_back = True
-
-            if row == 1:  # row start indented slightly
-                x = self.xmin + s_tw + sp
-
-            while x < self.xmax:
-                if row == 0 or row == 1:
-                    # adjust for if there is a need to cut off the bottom of the tile
-                    if y < self.ymin - s_tl:
-                        self.add_plane(d, verts, faces, matids, uvs, x, y, tw, tl + y - self.ymin)  # large one
-                    else:
-                        self.add_plane(d, verts, faces, matids, uvs, x, y, tw, tl)  # large one
-
-                    self.add_plane(d, verts, faces, matids, uvs, x + tw + sp, y + s_tl + sp, s_tw, s_tl)  # small one
-
-                    if step_back:
-                        x += tw + sp
-                        y -= s_tl + sp
-                    else:
-                        x += tw + s_tw + 2 * sp
-                        y += s_tl + sp
-
-                    step_back = not step_back
-                else:
-                    if x == self.xmin:  # half width for starting position
-                        self.add_plane(d, verts, faces, matids, uvs, x, y, s_tw, tl)  # large one
-                        # small one on right
-                        self.add_plane(d, verts, faces, matids, uvs, x + s_tw + sp, y + s_tl + sp, s_tw, s_tl)
-                        # small one on bottom
-                        self.add_plane(d, verts, faces, matids, uvs, x, y - sp - s_tl, s_tw, s_tl)
-                        x += (2 * s_tw) + tw + (3 * sp)
-                    else:
-                        self.add_plane(d, verts, faces, matids, uvs, x, y, tw, tl)  # large one
-                        # small one on right
-                        self.add_plane(d, verts, faces, matids, uvs, x + tw + sp, y + s_tl + sp, s_tw, s_tl)
-                        x += (2 * tw) + (3 * sp) + s_tw
-
-            if row == 0 or row == 2:
-                y = pre_y + tl + sp
-            else:
-                y = pre_y + s_tl + sp
-            pre_y = y
-
-            row = (row + 1) % 3  # keep wrapping rows
-
-    def stepping_stone(self, d, verts, faces, matids, uvs):
-        """
-         ____  __  ____
-        |    ||__||    | Row of large one, then two small ones stacked beside it
-        |    | __ |    |
-        |____||__||____|
-         __  __  __  __
-        |__||__||__||__| Row of smalls
-        """
-        sp = d.spacing
-        y = self.ymin
-        row = 0
-
-        tw = d.tile_width
-        tl = d.tile_length
-        s_tw = (tw - sp) / 2
-        s_tl = (tl - sp) / 2
-
-        while y < self.ymax:
-            x = self.xmin
-
-            while x < self.xmax:
-                if row == 0:  # large one then two small ones stacked beside it
-                    self.add_plane(d, verts, faces, matids, uvs, x, y, tw, tl)
-                    self.add_plane(d, verts, faces, matids, uvs, x + tw + sp, y, s_tw, s_tl,)
-                    self.add_plane(d, verts, faces, matids, uvs, x + tw + sp, y + s_tl + sp, s_tw, s_tl)
-                    x += tw + s_tw + (2 * sp)
-                else:  # row of small ones
-                    self.add_plane(d, verts, faces, matids, uvs, x, y, s_tw, s_tl)
-                    self.add_plane(d, verts, faces, matids, uvs, x + s_tw + sp, y, s_tw, s_tl)
-                    x += tw + sp
-
-            if row == 0:
-                y += tl + sp
-            else:
-                y += s_tl + sp
-
-            row = (row + 1) % 2
-
-    def hexagon(self, d, verts, faces, matids, uvs):
-        """
-          __  Hexagon tiles
-        /   \
-        \___/
-        """
-        sp = d.spacing
-        width = d.tile_width
-        dia = (width / 2) / cos(radians(30))
-        #               top of current, half way up next,    vertical spacing component
-        vertical_spacing = dia * (1 + sin(radians(30))) + (sp * sin(radians(60)))  # center of one row to next row
-        da = pi / 3
-        base_points = [(sin(i * da), cos(i * da)) for i in range(6)]
-
-        y = self.ymin
-        offset = False
-        while y - width / 2 < self.ymax:  # place tile as long as bottom is still within bounds
-            if offset:
-                x = self.xmin + width / 2
-            else:
-                x = self.xmin - sp / 2
-
-            while x - width / 2 < self.xmax:  # place tile as long as left is still within bounds
-                f = len(verts)
-
-                if d.vary_thickness and d.thickness_variance > 0:
-                    v = d.thickness / 100 * d.thickness_variance
-                    z = uniform(self.top, self.top + v)
-                else:
-                    z = self.top
-
-                for pt in base_points:
-                    verts.append((dia * pt[0] + x, dia * pt[1] + y, z))
-
-                faces.append([f] + [i for i in range(f + 1, len(verts))])
-                uvs.append(base_points)
-                self.add_matid(d, matids)
-
-                x += width + sp
-
-            y += vertical_spacing
-            offset = not offset
-
-    def windmill(self, d, verts, faces, matids, uvs):
-        """
-         __  ____
-        |  ||____| This also has a square one in the middle, totaling 5 tiles per pattern
-        |__|   __
-         ____ |  |
-        |____||__|
-        """
-        sp = d.spacing
-
-        tw = d.tile_width
-        tl = d.tile_length
-        s_tw = (tw - sp) / 2
-        s_tl = (tl - sp) / 2
-
-        y = self.ymin
-        while y < self.ymax:
-            x = self.xmin
-
-            while x < self.xmax:
-                self.add_plane(d, verts, faces, matids, uvs, x, y, tw, s_tl)  # bottom
-                self.add_plane(d, verts, faces, matids, uvs, x + tw + sp, y, s_tw, tl, rotate_uv=True)  # right
-                self.add_plane(d, verts, faces, matids, uvs, x + s_tw + sp, y + tl + sp, tw, s_tl)  # top
-                self.add_plane(d, verts, faces, matids, uvs, x, y + s_tl + sp, s_tw, tl, rotate_uv=True)  # left
-                self.add_plane(d, verts, faces, matids, uvs, x + s_tw + sp, y + s_tl + sp, s_tw, s_tl)  # center
-
-                x += tw + s_tw + (2 * sp)
-            y += tl + s_tl + (2 * sp)
-
-    def boards(self, d, verts, faces, matids, uvs):
-        """
-        ||| Typical wood boards
-        |||
-        """
-        x = self.xmin
-        bw, bl = d.board_width, d.board_length
-        off = False
-        o = 1 / (100 / d.offset) if d.offset != 0 else 0
-
-        while x < self.xmax:
-            if d.vary_width:
-                v = bw * (d.width_variance / 100) * 0.99
-                bw2 = bw + uniform(-v, v)
-            else:
-                bw2 = bw
-
-            if bw2 + x > self.xmax:
-                bw2 = self.xmax - x
-            y = self.ymin
-
-            counter = 1
-            while y < self.ymax:
-                bl2 = bl
-                if d.vary_length:
-                    v = bl * (d.length_variance / 100) * 0.99
-                    bl2 = bl + uniform(-v, v)
-                elif y == self.ymin and off and not d.random_offset:
-                    bl2 = bl * o
-                elif y == self.ymin and d.random_offset:
-                    v = bl * d.offset_variance * 0.0049
-                    bl2 = (bl / 2) + uniform(-v, v)
-
-                if (counter >= d.max_boards and d.vary_length) or y + bl2 > self.ymax:
-                    bl2 = self.ymax - y
-
-                self.add_plane(d, verts, faces, matids, uvs, x, y, bw2, bl2, rotate_uv=True)
-                y += bl2 + d.length_spacing
-                counter += 1
-            off = not off
-            x += bw2 + d.width_spacing
-
-    def square_parquet(self, d, verts, faces, matids, uvs):
-        """
-        ||--||-- Alternating groups oriented either horizontally, or forwards and backwards.
-        ||--||-- self.spacing is used because it is the same spacing for width and length
-        --||--|| Board width is calculated using number of boards and the length.
-        --||--||
-        """
-        x = self.xmin
-        start_orient_length = True
-
-        # figure board width
-        bl = d.short_board_length
-        bw = (bl - (d.boards_in_group - 1) * d.spacing) / d.boards_in_group
-        while x < self.xmax:
-            y = self.ymin
-            orient_length = start_orient_length
-            while y < self.ymax:
-
-                if orient_length:
-                    start_x = x
-
-                    for i in range(d.boards_in_group):
-                        if x < self.xmax and y < self.ymax:
-                            self.add_plane(d, verts, faces, matids, uvs, x, y, bw, bl, rotate_uv=True)
-                            x += bw + d.spacing
-
-                    x = start_x
-                    y += bl + d.spacing
-
-                else:
-                    for i in range(d.boards_in_group):
-                        if x < self.xmax and y < self.ymax:
-                            self.add_plane(d, verts, faces, matids, uvs, x, y, bl, bw)
-                            y += bw + d.spacing
-
-                orient_length = not orient_length
-
-            start_orient_length = not start_orient_length
-            x += bl + d.spacing
-
-    def herringbone(self, d, verts, faces, matids, uvs):
+    def proxy(self, context, o, d):
         """
-        Boards are at 45 degree angle, in chevron pattern, ends are angled
+            Slab outline, without tiles nor holes
         """
-        width_dif = d.board_width / cos(radians(45))
-        x_dif = d.short_board_length * cos(radians(45))
-        y_dif = d.short_board_length * sin(radians(45))
-        total_y_dif = width_dif + y_dif
-        sp_dif = d.spacing / cos(radians(45))
-
-        y = self.ymin - y_dif
-        while y < self.ymax:
-            x = self.xmin
-
-            while x < self.xmax:
-                # left side
-
-                self.add_face(d, verts, faces, matids, uvs,
-                    (x, y, 0), (x + x_dif, y + y_dif, 0),
-                    (x + x_dif, y + total_y_dif, 0), (x, y + width_dif, 0))
-
-                x += x_dif + d.spacing
-
-                # right side
-                if x < self.xmax:
-                    self.add_face(d, verts, faces, matids, uvs,
-                        (x, y + y_dif, 0), (x + x_dif, y, 0),
-                        (x + x_dif, y + width_dif, 0), (x, y + total_y_dif, 0))
-                    x += x_dif + d.spacing
-
-            y += width_dif + sp_dif  # adjust spacing amount for 45 degree angle
-
-    def herringbone_parquet(self, d, verts, faces, matids, uvs):
-        """
-        Boards are at 45 degree angle, in chevron pattern, ends are square, not angled
-        """
-
-        an_45 = 0.5 * sqrt(2)
-
-        x_dif = d.short_board_length * an_45
-        y_dif = d.short_board_length * an_45
-        y_dif_45 = d.board_width * an_45
-        x_dif_45 = d.board_width * an_45
-        total_y_dif = y_dif + y_dif_45
-
-        sp_dif = (d.spacing / an_45) / 2  # divide by two since it is used for both x and y
-        width_dif = d.board_width / an_45
-
-        y = self.ymin - y_dif
-        while y - y_dif_45 < self.ymax:  # continue as long as bottom left corner is still good
-            x = self.xmin
-
-            while x - x_dif_45 < self.xmax:  # continue as long as top left corner is still good
-                # left side
-
-                self.add_face(d, verts, faces, matids, uvs,
-                    (x, y, 0),
-                    (x + x_dif, y + y_dif, 0),
-                    (x + x_dif - x_dif_45, y + total_y_dif, 0),
-                    (x - x_dif_45, y + y_dif_45, 0))
-
-                x += x_dif - x_dif_45 + sp_dif
-                y0 = y + y_dif - y_dif_45 - sp_dif
-
-                if x < self.xmax:
-                    self.add_face(d, verts, faces, matids, uvs,
-                        (x, y0, 0),
-                        (x + x_dif, y0 - y_dif, 0),
-                        (x + x_dif + x_dif_45, y0 - y_dif + y_dif_45, 0),
-                        (x + x_dif_45, y0 + y_dif_45, 0))
-
-                    x += x_dif + x_dif_45 + sp_dif
-
-                else:  # we didn't place the right board, so step ahead far enough the the while loop for x breaks
-                    break
-
-            y += width_dif + (2 * sp_dif)
-
-    def add_matid(self, d, matids):
-        if d.vary_materials:
-            matid = uniform(1, d.matid)
-        else:
-            matid = d.matid
-        matids.append(matid)
-
-    def add_plane(self, d, verts, faces, matids, uvs, x, y, w, l, rotate_uv=False):
-        """
-        Adds vertices and faces for a place, clip to outer boundaries if clip is True
-        :param x: start x position
-        :param y: start y position
-        :param w: width (in x direction)
-        :param l: length (in y direction)
-        """
-
-        x1 = x + w
-        y1 = y + l
-
-        if d.vary_thickness and d.thickness_variance > 0:
-            v = d.thickness / 100 * d.thickness_variance
-            z = uniform(self.top, self.top + v)
-        else:
-            z = self.top
-
-        p = len(verts)
-        verts.extend([(x, y, z), (x1, y, z), (x1, y1, z), (x, y1, z)])
-        faces.append([p + 3, p + 2, p + 1, p])
-        if rotate_uv:
-            uvs.append([(0, 0), (0, 1), (1, 1), (1, 0)])
-        else:
-            uvs.append([(0, 0), (1, 0), (1, 1), (0, 1)])
-        self.add_matid(d, matids)
-
-    def add_face(self, d, verts, faces, matids, uvs, p0, p1, p2, p3):
-        """
-        Adds vertices and faces for a place, clip to outer boundaries if clip is True
-        :param x: start x position
-        :param y: start y position
-        :param w: width (in x direction)
-        :param l: length (in y direction)
-        """
-
-        if d.vary_thickness and d.thickness_variance > 0:
-            v = d.thickness / 100 * d.thickness_variance
-            z = uniform(self.top, self.top + v)
-        else:
-            z = self.top
-
-        p = len(verts)
-        verts.extend([(v[0], v[1], z) for v in [p0, p1, p2, p3]])
-        faces.append([p + 3, p + 2, p + 1, p])
-        uvs.append([(0, 0), (1, 0), (1, 1), (0, 1)])
-        self.add_matid(d, matids)
+        verts = []
+        self.get_verts(verts)
+        n_verts = len(verts)
+        if n_verts < 3:
+            return
+        verts.extend([Vector((v.x, v.y, d.thickness)) for v in verts])
+        faces = [list(range(n_verts - 1, -1, -1)), list(range(n_verts, 2 * n_verts))]
+        faces.extend([(i, (i + 1) % n_verts, n_verts + (i + 1) % n_verts, n_verts + i) for i in range(n_verts)])
+        bmed.buildmesh(context, o, verts, faces, weld=False, clean=False, auto_smooth=False)
 
     def add_manipulator(self, name, pt1, pt2, pt3):
         m = self.manipulators.add()
         m.prop1_name = name
         m.set_pts([pt1, pt2, pt3])
 
-    def generate_pattern(self, d, verts, faces, matids, uvs):
-
-        if d.pattern == "boards":
-            self.boards(d, verts, faces, matids, uvs)
-        elif d.pattern == "square_parquet":
-            self.square_parquet(d, verts, faces, matids, uvs)
-        elif d.pattern == "herringbone":
-            self.herringbone(d, verts, faces, matids, uvs)
-        elif d.pattern == "herringbone_parquet":
-            self.herringbone_parquet(d, verts, faces, matids, uvs)
-        elif d.pattern == "regular_tile":
-            self.regular_tile(d, verts, faces, matids, uvs)
-        elif d.pattern == "hopscotch":
-            self.hopscotch(d, verts, faces, matids, uvs)
-        elif d.pattern == "stepping_stone":
-            self.stepping_stone(d, verts, faces, matids, uvs)
-        elif d.pattern == "hexagon":
-            self.hexagon(d, verts, faces, matids, uvs)
-        elif d.pattern == "windmill":
-            self.windmill(d, verts, faces, matids, uvs)
+    def pattern_args(self, d):
+        """
+            Plain clip_pattern arguments, safe to use in worker thread
+        """
+        bounds = (self.xmin, self.ymin, self.xmax, self.ymax)
+        return (
+            Snapshot(d),
+            bounds,
+            self.top,
+            d.seed,
+            self.clip_ring(self.segs),
+            [self.clip_ring(hole.segs) for hole in self.holes],
+            self.convex
+            )
 
 
 def update(self, context):
@@ -1258,6 +879,12 @@ class archipack_floor(ArchipackObject, Manipulable, PropertyGroup):
             default=7,
             description="Material index maxi",
             update=update)
+    seed = IntProperty(
+            name="Seed",
+            min=0,
+            default=0,
+            description="Random seed for offset, thickness and material variations",
+            update=update)
     auto_update = BoolProperty(
             options={'SKIP_SAVE'},
             default=True,
@@ -1497,8 +1124,13 @@ class archipack_floor(ArchipackObject, Manipulable, PropertyGroup):
 
         g = self.update_parts(o)
 
-        g.cut(context, o)
-        g.floor(context, o, self)
+        # slab outline only while manipulating
+        if self.manipulable_use_proxy():
+            geometry_worker.cancel(o)
+            g.proxy(context, o, self)
+        else:
+            g.cut(context, o)
+            g.floor(context, o, self)
 
         # enable manipulators rebuild
         if manipulable_refresh:
@@ -1648,7 +1280,9 @@ class ARCHIPACK_PT_floor(Panel):
         # retrieve datablock of your object
         props = archipack_floor.datablock(o)
         # manipulate
-        layout.operator("archipack.floor_manipulate", icon="HAND")
+        row = layout.row(align=True)
+        row.operator("archipack.floor_manipulate", icon="HAND")
+        row.prop(props, "proxy_level", text="")
         layout.separator()
         box = layout.box()
         row = box.row(align=True)
@@ -1752,6 +1386,7 @@ class ARCHIPACK_PT_floor(Panel):
         box.prop(props, "vary_materials", icon="MATERIAL")
         if props.vary_materials:
             box.prop(props, "matid")
+        box.prop(props, "seed")
 
 
 class ARCHIPACK_PT_floor_cutter(Panel):
@@ -3843,6 +3843,13 @@ class archipack_kitchen(ArchipackObject, Manipulable, PropertyGroup):
 
         self.manipulators[0].set_pts([(0, 0, 0), (0, 0, z), (0.5, 0, 0)], normal=o.matrix_world[1].to_3d())
 
+        # cabinets only while manipulating
+        if self.manipulable_use_proxy(manipulable_refresh):
+            self.update_cabinets(context, verts, faces, matids, uvs)
+            bmed.buildmesh(context, o, verts, faces, matids)
+            self.restore_context(context)
+            return
+
         if self.counter:
             self.update_counter(verts, faces, matids, uvs)
 
@@ -3889,7 +3896,9 @@ class ARCHIPACK_PT_kitchen(Panel):
             return
 
         layout = self.layout
-        layout.operator('archipack.kitchen_manipulate', icon='HAND')
+        row = layout.row(align=True)
+        row.operator('archipack.kitchen_manipulate', icon='HAND')
+        row.prop(prop, 'proxy_level', text="")
         """
         row = layout.row(align=True)
         row.operator('archipack.kitchen', text="Refresh", icon='FILE_REFRESH').mode = 'REFRESH'
@@ -28,15 +28,17 @@ import logging
 logger = logging.getLogger("manipulator")
 
 import bpy
+from itertools import chain
 from math import atan2, pi
 from mathutils import Vector, Matrix
 from mathutils.geometry import intersect_line_plane, intersect_point_line, intersect_line_sphere
 from bpy_extras import view3d_utils
 from bpy.types import PropertyGroup, Operator
-from bpy.props import FloatVectorProperty, StringProperty, CollectionProperty, BoolProperty
+from bpy.props import FloatVectorProperty, StringProperty, CollectionProperty, BoolProperty, EnumProperty
 from bpy.app.handlers import persistent
 from .archipack_snap import snap_point
 from .archipack_keymaps import Keymaps
+from .archipack_scheduler import scheduler
 from .archipack_gl import (
     GlLine, GlArc, GlText,
     GlPolyline, GlPolygon,
@@ -2195,6 +2197,29 @@ class Manipulable():
             options={'SKIP_SAVE'},
             description="Flag make manipulators selectable"
             )
+    manipulable_drag = BoolProperty(
+            default=False,
+            options={'SKIP_SAVE'},
+            description="Flag drag session, from press to release of a manipulator"
+            )
+    manipulable_proxy = BoolProperty(
+            default=False,
+            options={'SKIP_SAVE'},
+            description="Flag a proxy was built while dragging, so full update is required on release"
+            )
+    manipulable_proxy_refresh = BoolProperty(
+            default=False,
+            options={'SKIP_SAVE'},
+            description="Flag a manipulators refresh was skipped by proxy, so release update must refresh"
+            )
+    proxy_level = EnumProperty(
+            name="Proxy",
+            items=(
+                ('FULL', 'Full', 'Build full detail while manipulating', 0),
+                ('PROXY', 'Proxy', 'Build simplified geometry while manipulating, full detail on release', 1)
+                ),
+            default='PROXY'
+            )
     keymap = None
 
     # selectable manipulators
@@ -2223,9 +2248,40 @@ class Manipulable():
             remove_manipulable(o.name)
             self.manip_stack = add_manipulable(o.name, self)
 
+        self.manipulable_end_drag(context)
         self.manipulate_mode = False
         self.select_mode = False
 
+    def manipulable_use_proxy(self, manipulable_refresh=False):
+        """
+            Generators supporting proxy call this in update()
+            manipulable_refresh: update() returning early for proxy
+            pass it here so release update does refresh manipulators
+            return True when a proxy should be built,
+            full detail update then run on release
+        """
+        if self.manipulable_drag and self.proxy_level == 'PROXY':
+            self.manipulable_proxy = True
+            if manipulable_refresh:
+                self.manipulable_proxy_refresh = True
+            return True
+        return False
+
+    def manipulable_end_drag(self, context):
+        """
+            Schedule full detail update when a proxy was built
+        """
+        self.manipulable_drag = False
+        if self.manipulable_proxy:
+            self.manipulable_proxy = False
+            kwargs = {}
+            if self.manipulable_proxy_refresh:
+                self.manipulable_proxy_refresh = False
+                kwargs['manipulable_refresh'] = True
+            o = context.active_object
+            if o is not None:
+                scheduler.update(context, o, self.__class__.__name__, delay=0, **kwargs)
+
     def manipulable_exit_selectmode(self, context):
         self.manipulable_area.disable()
         self.select_mode = False
@@ -2365,6 +2421,11 @@ class Manipulable():
 
             if manipulator is not None:
                 if manipulator.modal(context, event):
+                    if event.type in {'ESC', 'RIGHTMOUSE', 'RET', 'NUMPAD_ENTER'}:
+                        # cancel or keyboard entry ends drag session
+                        self.manipulable_end_drag(context)
+                    elif event.type in {'LEFTMOUSE', 'MOUSEMOVE'}:
+                        self.manipulable_drag = True
                     self.manipulable_manipulate(context, event, manipulator)
                     return {'RUNNING_MODAL'}
 
@@ -2409,6 +2470,7 @@ class Manipulable():
                     for manipulator in self.manip_stack:
                         if manipulator is not None and manipulator.selectable:
                             manipulator.selected = False
+                    self.manipulable_end_drag(context)
                     self.manipulable_release(context)
 
         elif self.select_mode and event.type == 'MOUSEMOVE' and event.value == 'PRESS':
@@ -2467,6 +2529,23 @@ def cleanup(dummy=None):
     empty_stack()
 
 
+@persistent
+def reset_drag(dummy=None):
+    """
+        SKIP_SAVE has no effect on PropertyGroup properties,
+        so drag session flags are saved with file, reset them on load
+    """
+    for data in chain(bpy.data.meshes, bpy.data.curves):
+        for key in data.keys():
+            if not key.startswith("archipack_"):
+                continue
+            for d in getattr(data, key, []):
+                if isinstance(d, Manipulable):
+                    d.manipulable_drag = False
+                    d.manipulable_proxy = False
+                    d.manipulable_proxy_refresh = False
+
+
 def register():
     # Register default manipulators
     global manips
@@ -2492,6 +2571,7 @@ def register():
     bpy.utils.register_class(ARCHIPACK_OT_disable_manipulate)
     bpy.utils.register_class(archipack_manipulator)
     bpy.app.handlers.load_pre.append(cleanup)
+    bpy.app.handlers.load_post.append(reset_drag)
 
 
 def unregister():
@@ -2505,3 +2585,4 @@ def unregister():
     bpy.utils.unregister_class(ARCHIPACK_OT_disable_manipulate)
     bpy.utils.unregister_class(archipack_manipulator)
     bpy.app.handlers.load_pre.remove(cleanup)
+    bpy.app.handlers.load_post.remove(reset_drag)
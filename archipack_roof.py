@@ -26,7 +26,6 @@
 # ----------------------------------------------------------
 # noinspection PyUnresolvedReferences
 import bpy
-import time
 # noinspection PyUnresolvedReferences
 from bpy.types import Operator, PropertyGroup, Mesh, Panel
 from bpy.props import (
@@ -35,8 +34,8 @@ from bpy.props import (
     CollectionProperty
     )
 from .bmesh_utils import BmeshEdit as bmed
-from random import randint
 import bmesh
+import copy
 from mathutils import Vector, Matrix
 from math import sin, cos, pi, atan2, sqrt, tan
 from .archipack_manipulator import Manipulable, archipack_manipulator
@@ -48,6 +47,12 @@ from .archipack_cutter import (
     ArchipackCutter,
     ArchipackCutterPart
     )
+from .roof_tiles import get_template
+from .roof_kernel import TilePan, pan_tiles, pan_pool
+from .geometry_cache import geometry_cache, digest, properties, segments
+from .archipack_scheduler import scheduler
+from .archipack_depsgraph import depsgraph, node
+from .archipack_worker import geometry_worker
 
 
 class Roof():
@@ -1606,117 +1611,24 @@ class RoofGenerator(CutAbleGenerator):
 
         sx, sy, sz = d.tile_size_x, d.tile_size_y, d.tile_size_z
 
-        """
-        /* Bevel offset_type slot values */
-        enum {
-          BEVEL_AMT_OFFSET,
-          BEVEL_AMT_WIDTH,
-          BEVEL_AMT_DEPTH,
-          BEVEL_AMT_PERCENT
-        };
-        """
-        offset_type = 3
-
         if d.tile_offset > 0:
             offset = - d.tile_offset / 100
         else:
             offset = 0
 
-        if d.tile_model == 'BRAAS2':
-            t_pts = [Vector(p) for p in [
-                (0.06, -1.0, 1.0), (0.19, -1.0, 0.5), (0.31, -1.0, 0.5), (0.44, -1.0, 1.0),
-                (0.56, -1.0, 1.0), (0.69, -1.0, 0.5), (0.81, -1.0, 0.5), (0.94, -1.0, 1.0),
-                (0.06, 0.0, 0.5), (0.19, 0.0, 0.0), (0.31, 0.0, 0.0), (0.44, 0.0, 0.5),
-                (0.56, 0.0, 0.5), (0.69, 0.0, 0.0), (0.81, 0.0, 0.0), (0.94, 0.0, 0.5),
-                (-0.0, -1.0, 1.0), (-0.0, 0.0, 0.5), (1.0, -1.0, 1.0), (1.0, 0.0, 0.5)]]
-            t_faces = [
-                (16, 0, 8, 17), (0, 1, 9, 8), (1, 2, 10, 9), (2, 3, 11, 10),
-                (3, 4, 12, 11), (4, 5, 13, 12), (5, 6, 14, 13), (6, 7, 15, 14), (7, 18, 19, 15)]
-        elif d.tile_model == 'BRAAS1':
-            t_pts = [Vector(p) for p in [
-                (0.1, -1.0, 1.0), (0.2, -1.0, 0.5), (0.6, -1.0, 0.5), (0.7, -1.0, 1.0),
-                (0.1, 0.0, 0.5), (0.2, 0.0, 0.0), (0.6, 0.0, 0.0), (0.7, 0.0, 0.5),
-                (-0.0, -1.0, 1.0), (-0.0, 0.0, 0.5), (1.0, -1.0, 1.0), (1.0, 0.0, 0.5)]]
-            t_faces = [(8, 0, 4, 9), (0, 1, 5, 4), (1, 2, 6, 5), (2, 3, 7, 6), (3, 10, 11, 7)]
-        elif d.tile_model == 'ETERNIT':
-            t_pts = [Vector(p) for p in [
-                (0.11, -1.0, 1.0), (0.9, -1.0, 1.0), (0.0, -0.79, 0.79),
-                (1.0, -0.79, 0.79), (0.0, 2.0, -2.0), (1.0, 2.0, -2.0)]]
-            t_faces = [(0, 1, 3, 5, 4, 2)]
-        elif d.tile_model == 'ONDULEE':
-            t_pts = [Vector(p) for p in [
-                (0.0, -1.0, 0.1), (0.05, -1.0, 1.0), (0.1, -1.0, 0.1),
-                (0.15, -1.0, 1.0), (0.2, -1.0, 0.1), (0.25, -1.0, 1.0),
-                (0.3, -1.0, 0.1), (0.35, -1.0, 1.0), (0.4, -1.0, 0.1),
-                (0.45, -1.0, 1.0), (0.5, -1.0, 0.1), (0.55, -1.0, 1.0),
-                (0.6, -1.0, 0.1), (0.65, -1.0, 1.0), (0.7, -1.0, 0.1),
-                (0.75, -1.0, 1.0), (0.8, -1.0, 0.1), (0.85, -1.0, 1.0),
-                (0.9, -1.0, 0.1), (0.95, -1.0, 1.0), (1.0, -1.0, 0.1),
-                (0.0, 0.0, 0.0), (0.05, 0.0, 0.9), (0.1, 0.0, 0.0),
-                (0.15, 0.0, 0.9), (0.2, 0.0, 0.0), (0.25, 0.0, 0.9),
-                (0.3, 0.0, 0.0), (0.35, 0.0, 0.9), (0.4, 0.0, 0.0),
-                (0.45, 0.0, 0.9), (0.5, 0.0, 0.0), (0.55, 0.0, 0.9),
-                (0.6, 0.0, 0.0), (0.65, 0.0, 0.9), (0.7, 0.0, 0.0),
-                (0.75, 0.0, 0.9), (0.8, 0.0, 0.0), (0.85, 0.0, 0.9),
-                (0.9, 0.0, 0.0), (0.95, 0.0, 0.9), (1.0, 0.0, 0.0)]]
-            t_faces = [
-                (0, 1, 22, 21), (1, 2, 23, 22), (2, 3, 24, 23),
-                (3, 4, 25, 24), (4, 5, 26, 25), (5, 6, 27, 26),
-                (6, 7, 28, 27), (7, 8, 29, 28), (8, 9, 30, 29),
-                (9, 10, 31, 30), (10, 11, 32, 31), (11, 12, 33, 32),
-                (12, 13, 34, 33), (13, 14, 35, 34), (14, 15, 36, 35),
-                (15, 16, 37, 36), (16, 17, 38, 37), (17, 18, 39, 38),
-                (18, 19, 40, 39), (19, 20, 41, 40)]
-        elif d.tile_model == 'METAL':
-            t_pts = [Vector(p) for p in [
-                (0.0, -1.0, 0.0), (0.99, -1.0, 0.0), (1.0, -1.0, 0.0),
-                (0.0, 0.0, 0.0), (0.99, 0.0, 0.0), (1.0, 0.0, 0.0),
-                (0.99, -1.0, 1.0), (1.0, -1.0, 1.0), (1.0, 0.0, 1.0), (0.99, 0.0, 1.0)]]
-            t_faces = [(0, 1, 4, 3), (7, 2, 5, 8), (1, 6, 9, 4), (6, 7, 8, 9)]
-        elif d.tile_model == 'LAUZE':
-            t_pts = [Vector(p) for p in [
-                (0.75, -0.8, 0.8), (0.5, -1.0, 1.0), (0.25, -0.8, 0.8),
-                (0.0, -0.5, 0.5), (1.0, -0.5, 0.5), (0.0, 0.5, -0.5), (1.0, 0.5, -0.5)]]
-            t_faces = [(1, 0, 4, 6, 5, 3, 2)]
-        elif d.tile_model == 'PLACEHOLDER':
-            t_pts = [Vector(p) for p in [(0.0, -1.0, 1.0), (1.0, -1.0, 1.0), (0.0, 0.0, 0.0), (1.0, 0.0, 0.0)]]
-            t_faces = [(0, 1, 3, 2)]
-        elif d.tile_model == 'ROMAN':
-            t_pts = [Vector(p) for p in [
-                (0.18, 0.0, 0.3), (0.24, 0.0, 0.58), (0.76, 0.0, 0.58),
-                (0.82, 0.0, 0.3), (0.05, -1.0, 0.5), (0.14, -1.0, 0.8),
-                (0.86, -1.0, 0.8), (0.95, -1.0, 0.5), (0.45, 0.0, 0.5),
-                (0.36, 0.0, 0.2), (-0.36, 0.0, 0.2), (-0.45, -0.0, 0.5),
-                (0.32, -1.0, 0.7), (0.26, -1.0, 0.42), (-0.26, -1.0, 0.42),
-                (-0.32, -1.0, 0.7), (0.5, 0.0, 0.74), (0.5, -1.0, 1.0),
-                (-0.0, -1.0, 0.26), (-0.0, 0.0, 0.0)]
-            ]
-            t_faces = [
-                (0, 4, 5, 1), (16, 17, 6, 2), (2, 6, 7, 3),
-                (13, 12, 8, 9), (18, 13, 9, 19), (15, 14, 10, 11),
-                (14, 18, 19, 10), (1, 5, 17, 16)
-            ]
-        elif d.tile_model == 'ROUND':
-            t_pts = [Vector(p) for p in [
-                (0.0, -0.5, 0.5), (1.0, -0.5, 0.5), (0.0, 0.0, 0.0),
-                (1.0, 0.0, 0.0), (0.93, -0.71, 0.71), (0.78, -0.88, 0.88),
-                (0.39, -0.97, 0.97), (0.61, -0.97, 0.97), (0.07, -0.71, 0.71),
-                (0.22, -0.88, 0.88)]
-            ]
-            t_faces = [(6, 7, 5, 4, 1, 3, 2, 0, 8, 9)]
-        else:
+        template = get_template(d.tile_model)
+        if template is None:
             return
 
-        n_faces = len(t_faces)
-        t_uvs = [[(t_pts[i].x, t_pts[i].y) for i in f] for f in t_faces]
-
         dx, dy = d.tile_space_x, d.tile_space_y
 
-        step = 100 / ttl
-
         if d.quick_edit:
             context.scene.archipack_progress_text = "Build tiles:"
 
+        # pans are independent, tiles are computed in worker
+        # processes and bissect on main thread
+        cached = []
+        todo = []
         for i, pan in enumerate(self.pans):
 
             seg = pan.fake_axis
@@ -1742,63 +1654,107 @@ class RoofGenerator(CutAbleGenerator):
             if d.tile_alternate:
                 n_y += 1
 
-            tM = Matrix([
+            tM = [
                 [vx.x, vy.x, vz.x, x0],
                 [vx.y, vy.y, vz.y, y0],
-                [vx.z, vy.z, vz.z, z0],
-                [0, 0, 0, 1]
-            ])
-
-            verts = []
-            faces = []
-            matids = []
-            uvs = []
-
-            # steps for this pan
-            substep = step / n_y
-            # print("step:%s sub:%s" % (step, substep))
-
-            for k in range(n_y):
-
-                progress = step * i + substep * k
-                # print("progress %s" % (progress))
-                if d.quick_edit:
-                    context.scene.archipack_progress = progress
+                [vx.z, vy.z, vz.z, z0]
+            ]
 
-                y = k * dy
+            x0 = offset * dx - d.tile_side
+
+            # pan tiles are cached by content, key on all generator inputs
+            key = digest(
+                "couverture",
+                i,
+                properties(d),
+                o.matrix_world,
+                tM,
+                (n_x, n_y, dx, dy, x0, pan.slope, pan.convex),
+                segments([pan.fake_axis]),
+                segments(pan.segs),
+                [segments(hole.segs) for hole in pan.holes])
+            arrays = geometry_cache.get(key)
+            if arrays is not None:
+                cached.append(arrays)
+                continue
 
-                x0 = offset * dx - d.tile_side
-                nx = n_x
+            # Build boundary including borders and bottom offsets
+            new_s = None
+            segs = []
+            for s in pan.segs:
+                if s.length > 0:
+                    if s.type == 'LINK_VALLEY':
+                        border = -d.tile_couloir
+                    elif s.type == 'BOTTOM':
+                        border = d.tile_border
+                    elif s.type == 'SIDE':
+                        border = d.tile_side
+                    else:
+                        border = 0
+                    new_s = s.make_offset(border, new_s)
+                    segs.append(new_s)
+
+            if len(segs) > 0:
+                # last / first intersection
+                res, p, t = segs[0].intersect(segs[-1])
+                if res:
+                    segs[0].p0 = p
+                    segs[-1].p1 = p
+
+            tile_pan = TilePan(
+                d.tile_model,
+                tM,
+                (sx, sy, sz),
+                (n_x, n_y, dx, dy, x0),
+                d.tile_alternate,
+                d.tile_offset > 0,
+                [d.tile_seed, i],
+                (idmat, rand),
+                self.clip_ring(segs),
+                [self.clip_ring(hole.segs) for hole in pan.holes])
+
+            todo.append((i, pan, key, segs, vz, z0, tile_pan))
+
+        def apply(context, o, results):
+            d = archipack_roof.datablock(o)
+            self.couverture_apply(context, o, d, cached, todo, results)
 
-                if d.tile_alternate and k % 2 == 1:
-                    x0 -= 0.5 * dx
-                    nx += 1
+        # tiles are computed in background when enabled, so roof
+        # shows without tiles meanwhile, background mode run
+        # scripts and renders, keep pool serial there
+        geometry_worker.submit(context, o, pan_pool.map,
+            (pan_tiles, [job[-1] for job in todo], not bpy.app.background),
+            apply)
 
-                if d.tile_offset > 0:
-                    nx += 1
+    def couverture_apply(self, context, o, d, cached, todo, results):
+        """
+            Bissect computed tiles of each pan and merge
+            all pans with object at once, on main thread
+            cached: arrays of pans found in cache
+            todo: pans jobs, results: pan_tiles result of each job
+        """
+        """
+        /* Bevel offset_type slot values */
+        enum {
+          BEVEL_AMT_OFFSET,
+          BEVEL_AMT_WIDTH,
+          BEVEL_AMT_DEPTH,
+          BEVEL_AMT_PERCENT
+        };
+        """
+        offset_type = 3
+        step = 100 / len(self.pans)
+        bms = [bmed.from_arrays(arrays) for arrays in cached]
 
-                for j in range(nx):
-                    x = x0 + j * dx
-                    lM = tM * Matrix([
-                        [sx, 0, 0, x],
-                        [0, sy, 0, -y],
-                        [0, 0, sz, 0],
-                        [0, 0, 0, 1]
-                    ])
+        for job, (inside, tiles) in zip(todo, results):
 
-                    v = len(verts)
+            i, pan, key, segs, vz, z0, tile_pan = job
 
-                    verts.extend([lM * p for p in t_pts])
-                    faces.extend([tuple(i + v for i in f) for f in t_faces])
-                    mid = randint(idmat, idmat + rand)
-                    t_mats = [mid for i in range(n_faces)]
-                    matids.extend(t_mats)
-                    uvs.extend(t_uvs)
+            if d.quick_edit:
+                context.scene.archipack_progress = step * i
 
             # build temp bmesh and bissect
-            bm = bmed.buildmesh(
-                context, o, verts, faces, matids=matids, uvs=uvs,
-                weld=False, clean=False, auto_smooth=True, temporary=True)
+            bm = bmed.extend_arrays(bmesh.new(), tiles)
 
             # clean outer on convex parts
             # pan.convex = False
@@ -1843,34 +1799,16 @@ class RoofGenerator(CutAbleGenerator):
                     DEL_ONLYTAGGED
                 };
                 """
-                # Build boundary including borders and bottom offsets
-                new_s = None
-                segs = []
-                for s in pan.segs:
-                    if s.length > 0:
-                        if s.type == 'LINK_VALLEY':
-                            offset = -d.tile_couloir
-                        elif s.type == 'BOTTOM':
-                            offset = d.tile_border
-                        elif s.type == 'SIDE':
-                            offset = d.tile_side
-                        else:
-                            offset = 0
-                        new_s = s.make_offset(offset, new_s)
-                        segs.append(new_s)
-
                 if len(segs) > 0:
-                    # last / first intersection
-                    res, p, t = segs[0].intersect(segs[-1])
-                    if res:
-                        segs[0].p0 = p
-                        segs[-1].p1 = p
-                    f_geom = [f for f in bm.faces if not pan.inside(f.calc_center_median().to_2d(), segs)]
+                    f_geom = self.faces_inside(bm, pan.locator(segs), outside=True)
                     if len(f_geom) > 0:
                         bmesh.ops.delete(bm, geom=f_geom, context=5)
 
             self.cut_holes(bm, pan)
 
+            if inside is not None:
+                bmed.extend_arrays(bm, inside)
+
             bmesh.ops.dissolve_limit(bm,
                         angle_limit=0.01,
                         use_dissolve_boundaries=False,
@@ -1897,8 +1835,12 @@ class RoofGenerator(CutAbleGenerator):
                 bmesh.ops.solidify(bm, geom=geom, thickness=0.0001)
                 bmesh.ops.translate(bm, vec=vz * d.tile_height, space=o.matrix_world, verts=verts)
 
-            # merge with object
-            bmed.bmesh_join(context, o, [bm], normal_update=True)
+            geometry_cache.set(key, bmed.arrays(bm))
+            bms.append(bm)
+
+        # merge all pans with object at once
+        if len(bms) > 0:
+            bmed.bmesh_join(context, o, bms, normal_update=True)
             bpy.ops.object.mode_set(mode='OBJECT')
 
         if d.quick_edit:
@@ -3349,6 +3291,7 @@ class RoofGenerator(CutAbleGenerator):
         wall_t = [[] for w in wg.segs]
 
         for pan in self.pans:
+            locator = pan.locator()
             # walls segment
             for widx, wseg in enumerate(wg.segs):
 
@@ -3368,11 +3311,11 @@ class RoofGenerator(CutAbleGenerator):
                     for step in range(12):
                         t = step / 12
                         p = wseg.line.lerp(t)
-                        if pan.inside(p):
+                        if locator.inside(p):
                             z = z0 + pan.altitude(p)
                             wall_t[widx].append((t, z, t * ls))
                 else:
-                    if pan.inside(wseg.line.p0):
+                    if locator.inside(wseg.line.p0):
                         z = z0 + pan.altitude(wseg.line.p0)
                         wall_t[widx].append((0, z, 0))
 
@@ -3470,6 +3413,42 @@ class RoofGenerator(CutAbleGenerator):
                 edges.append([f, f + 1])
 
 
+class RoofTopology():
+    """
+        Generator state after make_roof and after cutters slicing
+        so edits of decorations only skip straight to mesh build
+        Kept in memory by node(o), as objects
+        can't store python objects
+        Stored generators are read only but for parts,
+        set to current parts on use
+    """
+    def __init__(self, key, roof):
+        self.key = key
+        self.roof = roof
+        self.cut_key = None
+        self.cut = None
+
+
+# node(o): RoofTopology, pruned and cleared by depsgraph
+roof_topology = {}
+
+
+def copy_generator(g, parts):
+    """
+        Deep copy of generator, sharing bpy data
+        parts: parts collection of copy
+    """
+    # bpy collections can't be copied
+    memo = {}
+    for data in [g] + [hole for pan in g.pans for hole in pan.holes]:
+        bpy_parts = getattr(data, "parts", None)
+        if bpy_parts is not None:
+            memo[id(bpy_parts)] = None
+    res = copy.deepcopy(g, memo)
+    res.parts = parts
+    return res
+
+
 def update(self, context):
     self.update(context)
 
@@ -3739,6 +3718,16 @@ class archipack_roof_segment(ArchipackSegment, PropertyGroup):
                 update_childs=True)
 
 
+# properties defining roof shape, parts excepted
+ROOF_GEOMETRY = (
+    'z',
+    'slope_left', 'slope_right',
+    'width_left', 'width_right',
+    't_parent', 't_part', 't_dist_x', 't_dist_y',
+    'hole_offset_left', 'hole_offset_right', 'hole_offset_front'
+    )
+
+
 class archipack_roof(ArchipackLines, ArchipackObject, Manipulable, PropertyGroup):
     parts = CollectionProperty(type=archipack_roof_segment)
     z = FloatProperty(
@@ -3829,6 +3818,13 @@ class archipack_roof(ArchipackLines, ArchipackObject, Manipulable, PropertyGroup
             default=False,
             update=update_components
             )
+    tile_seed = IntProperty(
+            name="Seed",
+            description="Random seed for tiles material variations",
+            min=0,
+            default=0,
+            update=update_components
+            )
     tile_offset = FloatProperty(
             name="Offset",
             description="Offset from start",
@@ -4381,6 +4377,14 @@ class archipack_roof(ArchipackLines, ArchipackObject, Manipulable, PropertyGroup
                 s.type_key = 'SIZE'
                 s.prop1_name = "slope_right"
 
+    def geometry_inputs(self):
+        """
+            Properties defining roof shape,
+            skip decorations like tiles, gutters and so on
+        """
+        return ([getattr(self, key) for key in ROOF_GEOMETRY],
+            [properties(part) for part in self.parts])
+
     def get_generator(self, origin=Vector((0, 0, 0))):
         g = RoofGenerator(self, origin)
 
@@ -4403,7 +4407,7 @@ class archipack_roof(ArchipackLines, ArchipackObject, Manipulable, PropertyGroup
             bm.edges.new((bm.verts[ed[0]], bm.verts[ed[1]]))
         bm.edges.ensure_lookup_table()
         # bmesh.ops.contextual_create(bm, geom=bm.edges)
-        bm.to_mesh(o.data)
+        bmed.to_mesh(bm, o.data)
         bm.free()
 
     def find_parent(self, context):
@@ -4457,11 +4461,16 @@ class archipack_roof(ArchipackLines, ArchipackObject, Manipulable, PropertyGroup
         for child in o.children:
             d = archipack_roof.datablock(child)
             if d is not None and d.t_parent == o.name:
+                # skip when parent shape did not change
+                if not depsgraph.changed(o, child, 'roof_child',
+                        o.matrix_world, self.geometry_inputs()):
+                    continue
                 # print("upate_childs(%s)" % (child.name))
                 child.select = True
                 context.scene.objects.active = child
                 # regenerate hole
                 d.update(context, update_hole=True, update_parent=False)
+                depsgraph.clean(o, child, 'roof_child', o.matrix_world, self.geometry_inputs())
                 child.select = False
         o.select = True
         context.scene.objects.active = o
@@ -4603,23 +4612,63 @@ class archipack_roof(ArchipackLines, ArchipackObject, Manipulable, PropertyGroup
             n = f.sized_normal(0, self.width_right)
             self.manipulators[2].set_pts([n.p0.to_3d(), n.p1.to_3d(), (1, 0, 0)])
 
-        g.make_roof(context)
+        # topology only depends on shape of roof
+        key = digest("roof", self.geometry_inputs(), g.origin, g.z, [
+            (tuple(s.p0), tuple(s.v), s.v0_idx, s.constraint_type, s.angle_0, s.take_precedence)
+            for s in g.segs])
+        obj_key = node(o)
+        topology = roof_topology.get(obj_key)
+        if topology is not None and topology.key == key:
+            # make_hole and update_childs only read roof
+            g = topology.roof
+            g.parts = self.parts
+        else:
+            g.make_roof(context)
+            topology = RoofTopology(key, g)
+            # drop entry of this object under former name
+            for k in [k for k in roof_topology.keys() if k[1] == obj_key[1]]:
+                del roof_topology[k]
+            roof_topology[obj_key] = topology
 
         # update childs here so parent may use
         # new holes when parent shape does change
         if update_childs:
             self.update_childs(context, o, g)
 
-        # on t_child
+        # on t_child, skip when shape of child and parent did not change
         if d is not None and update_hole:
             hole_obj = self.find_hole(context, o)
-            g.make_hole(context, hole_obj, o, self, update_parent)
+            if hole_obj is None or depsgraph.changed(o, hole_obj, 'roof_hole',
+                    o.matrix_world, self.geometry_inputs(), d.geometry_inputs()):
+                g.make_hole(context, hole_obj, o, self, update_parent)
+                depsgraph.clean(o, self.find_hole(context, o), 'roof_hole',
+                    o.matrix_world, self.geometry_inputs(), d.geometry_inputs())
             # print("make_hole")
 
-        # add cutters
-        g.boundary(context, o)
+        # add cutters, childs and hole may change cutters
+        cutters = []
+        for b in o.children:
+            cd = archipack_roof_cutter.datablock(b)
+            if cd is not None:
+                cutters.append((b.name, b.matrix_world, properties(cd),
+                    [properties(part) for part in cd.parts]))
+        cut_key = digest(key, o.matrix_world, cutters)
+        if topology.cut_key == cut_key:
+            # mesh build only read generator
+            g = topology.cut
+            g.parts = self.parts
+        else:
+            # boundary slice pans, keep roof as is
+            g = copy_generator(topology.roof, self.parts)
+            g.boundary(context, o)
+            topology.cut_key = cut_key
+            topology.cut = g
 
-        if self.draft:
+        # mesh is rebuilt, pending tiles would apply over it
+        geometry_worker.cancel(o)
+
+        # roof surface only while manipulating
+        if self.draft or self.manipulable_use_proxy():
 
             g.draft(context, verts, edges)
             g.gutter(self, verts, faces, edges, matids, uvs)
@@ -4657,7 +4706,9 @@ class archipack_roof(ArchipackLines, ArchipackObject, Manipulable, PropertyGroup
 
             if self.quick_edit and not force_update:
                 if self.tile_enable:
-                    bpy.ops.archipack.roof_throttle_update(name=o.name)
+                    scheduler.update(context, o, "archipack_roof",
+                        force_update=True,
+                        update_parent=False)
             else:
                 # throttle here
                 if self.tile_enable:
@@ -4863,6 +4914,7 @@ class ARCHIPACK_PT_roof(Panel):
         layout = self.layout
         row = layout.row(align=True)
         row.operator('archipack.roof_manipulate', icon='HAND')
+        row.prop(prop, 'proxy_level', text="")
 
         box = layout.box()
         row = box.row(align=True)
@@ -4921,6 +4973,7 @@ class ARCHIPACK_PT_roof(Panel):
             box.separator()
             box.label(text="Distribution")
             box.prop(prop, 'tile_alternate', icon='NLA')
+            box.prop(prop, 'tile_seed')
             row = box.row(align=True)
             row.prop(prop, 'tile_fit_x', icon='ALIGN')
             row.prop(prop, 'tile_fit_y', icon='ALIGN')
@@ -5254,119 +5307,6 @@ class ARCHIPACK_OT_roof_cutter_manipulate(Operator):
         return {'FINISHED'}
 
 
-# Update throttle
-class ArchipackThrottleHandler():
-    """
-        One modal runs for each object at time
-        when call for 2nd one
-        update timer so first one wait more
-        and kill 2nd one
-    """
-    def __init__(self, context, delay):
-        self._timer = None
-        self.start = 0
-        self.update_state = False
-        self.delay = delay
-
-    def start_timer(self, context):
-        self.start = time.time()
-        self._timer = context.window_manager.event_timer_add(self.delay, context.window)
-
-    def stop_timer(self, context):
-        if self._timer is not None:
-            context.window_manager.event_timer_remove(self._timer)
-            self._timer = None
-
-    def execute(self, context):
-        """
-            refresh timer on execute
-            return
-                True if modal should run
-                False on complete
-        """
-        if self._timer is None:
-            self.update_state = False
-            self.start_timer(context)
-            return True
-
-        # allready a timer running
-        self.stop_timer(context)
-
-        # prevent race conditions when allready in update mode
-        if self.is_updating:
-            return False
-
-        self.start_timer(context)
-        return False
-
-    def modal(self, context, event):
-        if event.type == 'TIMER' and not self.is_updating:
-            if time.time() - self.start > self.delay:
-                self.update_state = True
-                self.stop_timer(context)
-                return True
-        return False
-
-    @property
-    def is_updating(self):
-        return self.update_state
-
-
-throttle_handlers = {}
-throttle_delay = 1
-
-
-class ARCHIPACK_OT_roof_throttle_update(Operator):
-    bl_idname = "archipack.roof_throttle_update"
-    bl_label = "Update childs with a delay"
-
-    name = StringProperty()
-
-    def kill_handler(self, context, name):
-        if name in throttle_handlers.keys():
-            throttle_handlers[name].stop_timer(context)
-            del throttle_handlers[self.name]
-
-    def get_handler(self, context, delay):
-        global throttle_handlers
-        if self.name not in throttle_handlers.keys():
-            throttle_handlers[self.name] = ArchipackThrottleHandler(context, delay)
-        return throttle_handlers[self.name]
-
-    def modal(self, context, event):
-        global throttle_handlers
-        if self.name in throttle_handlers.keys():
-            if throttle_handlers[self.name].modal(context, event):
-                act = context.active_object
-                o = context.scene.objects.get(self.name)
-                # print("delay update of %s" % (self.name))
-                if o is not None:
-                    selected = o.select
-                    o.select = True
-                    context.scene.objects.active = o
-                    d = o.data.archipack_roof[0]
-                    d.update(context,
-                        force_update=True,
-                        update_parent=False)
-                    # skip_parent_update=self.skip_parent_update)
-                    o.select = selected
-                context.scene.objects.active = act
-                del throttle_handlers[self.name]
-                return {'FINISHED'}
-            else:
-                return {'PASS_THROUGH'}
-        else:
-            return {'FINISHED'}
-
-    def execute(self, context):
-        global throttle_delay
-        handler = self.get_handler(context, throttle_delay)
-        if handler.execute(context):
-            context.window_manager.modal_handler_add(self)
-            return {'RUNNING_MODAL'}
-        return {'FINISHED'}
-
-
 # ------------------------------------------------------------------
 # Define operator class to load / save presets
 # ------------------------------------------------------------------
@@ -5407,10 +5347,13 @@ def register():
     bpy.utils.register_class(ARCHIPACK_OT_roof_preset)
     bpy.utils.register_class(ARCHIPACK_OT_roof_manipulate)
     bpy.utils.register_class(ARCHIPACK_OT_roof_from_curve)
-    bpy.utils.register_class(ARCHIPACK_OT_roof_throttle_update)
+    depsgraph.register_cache(roof_topology)
 
 
 def unregister():
+    depsgraph.unregister_cache(roof_topology)
+    roof_topology.clear()
+    pan_pool.shutdown()
     # bpy.utils.unregister_class(archipack_roof_material)
     bpy.utils.unregister_class(archipack_roof_cutter_segment)
     bpy.utils.unregister_class(archipack_roof_cutter)
@@ -5427,4 +5370,3 @@ def unregister():
     bpy.utils.unregister_class(ARCHIPACK_OT_roof_preset)
     bpy.utils.unregister_class(ARCHIPACK_OT_roof_manipulate)
     bpy.utils.unregister_class(ARCHIPACK_OT_roof_from_curve)
-    bpy.utils.unregister_class(ARCHIPACK_OT_roof_throttle_update)
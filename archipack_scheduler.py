@@ -0,0 +1,214 @@
+# -*- coding:utf-8 -*-
+
+# ##### BEGIN GPL LICENSE BLOCK #####
+#
+#  This program is free software; you can redistribute it and/or
+#  modify it under the terms of the GNU General Public License
+#  as published by the Free Software Foundation; either version 2
+#  of the License, or (at your option) any later version.
+#
+#  This program is distributed in the hope that it will be useful,
+#  but WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#  GNU General Public License for more details.
+#
+#  You should have received a copy of the GNU General Public License
+#  along with this program; if not, write to the Free Software Foundation,
+#  Inc., 51 Franklin Street, Fifth Floor, Boston, MA 02110-1301, USA.
+#
+# ##### END GPL LICENSE BLOCK #####
+
+# <pep8 compliant>
+
+# ----------------------------------------------------------
+# Author: Stephen Leger (s-leger)
+#
+# ----------------------------------------------------------
+# Debounced updates shared by all archipack objects
+# Objects opt in using:
+#   scheduler.update(context, o, "archipack_roof", force_update=True)
+# Repeated calls for the same object within delay are coalesced,
+# due updates run by priority, within a time budget by timer tick
+# Without a window running the timer, updates run at once
+# ----------------------------------------------------------
+import bpy
+import time
+from bpy.types import Operator
+
+
+# run order, lower first
+PRIORITY_WALL = 0
+PRIORITY_DEFAULT = 10
+
+
+class UpdateJob():
+    """
+        Pending update of an object
+        callback(context, o, **kwargs)
+    """
+    def __init__(self, name, callback, priority, due, kwargs):
+        self.name = name
+        self.callback = callback
+        self.priority = priority
+        self.due = due
+        self.kwargs = kwargs
+
+
+def datablock_update(context, o, datablock="", **kwargs):
+    """
+        Call update of object datablock
+        as it was the selected and active object
+    """
+    d = getattr(o.data, datablock, None)
+    if d is None or len(d) < 1:
+        return
+    act = context.active_object
+    selected = o.select
+    o.select = True
+    context.scene.objects.active = o
+    try:
+        d[0].update(context, **kwargs)
+    finally:
+        o.select = selected
+        context.scene.objects.active = act
+
+
+class UpdateScheduler():
+    """
+        Per object dirty queues, processed by a single modal timer
+        delay: seconds without changes before an update run
+        budget: max seconds spent by timer tick
+    """
+    def __init__(self, delay=0.5, budget=0.1):
+        self.delay = delay
+        self.budget = budget
+        # (object name, callback): UpdateJob
+        self.jobs = {}
+        self.running = False
+
+    def setup(self, delay, budget):
+        self.delay = delay
+        self.budget = budget
+
+    def deferred(self, context):
+        """
+            Jobs may be deferred only when a window
+            runs the modal timer, so not in background
+            mode, render or scripts
+        """
+        return not bpy.app.background and context.window is not None
+
+    def schedule(self, context, o, callback, priority=PRIORITY_DEFAULT, delay=None, **kwargs):
+        """
+            Queue callback(context, o, **kwargs) for object o
+            restart delay when allready queued, and merge kwargs
+        """
+        if delay is None:
+            delay = self.delay
+        due = time.time() + delay
+        key = (o.name, callback)
+        job = self.jobs.get(key)
+        if job is None:
+            job = UpdateJob(o.name, callback, priority, due, kwargs)
+            self.jobs[key] = job
+        else:
+            job.due = due
+            job.priority = min(job.priority, priority)
+            job.kwargs.update(kwargs)
+
+        if self.deferred(context) and not self.running:
+            try:
+                bpy.ops.archipack.update_scheduler()
+            except RuntimeError as ex:
+                print("UpdateScheduler timer failed, run at once: %s" % ex)
+
+        if not (self.deferred(context) and self.running):
+            del self.jobs[key]
+            callback(context, o, **job.kwargs)
+
+    def update(self, context, o, datablock, priority=PRIORITY_DEFAULT, delay=None, **kwargs):
+        """
+            Queue update of datablock of object o
+            kwargs are passed to datablock update
+        """
+        self.schedule(context, o, datablock_update, priority, delay,
+            datablock=datablock, **kwargs)
+
+    def cancel(self, o):
+        """
+            Remove pending updates of object o
+        """
+        for key in [key for key in self.jobs.keys() if key[0] == o.name]:
+            del self.jobs[key]
+
+    def clear(self):
+        self.jobs.clear()
+
+    def run(self, context):
+        """
+            Run due jobs in priority order until time budget is spent
+            return True when queue is empty
+        """
+        start = time.time()
+        due = sorted(
+            [(job.priority, job.due, key) for key, job in self.jobs.items() if job.due <= start],
+            key=lambda job: job[0:2])
+
+        for priority, t, key in due:
+            job = self.jobs.pop(key)
+            o = context.scene.objects.get(job.name)
+            if o is not None:
+                try:
+                    job.callback(context, o, **job.kwargs)
+                except Exception as ex:
+                    print("UpdateScheduler update of %s failed: %s" % (job.name, ex))
+            if time.time() - start > self.budget:
+                break
+
+        return len(self.jobs) < 1
+
+
+scheduler = UpdateScheduler()
+
+
+class ARCHIPACK_OT_update_scheduler(Operator):
+    bl_idname = "archipack.update_scheduler"
+    bl_label = "Update objects with a delay"
+    bl_options = {'INTERNAL'}
+
+    _timer = None
+
+    def modal(self, context, event):
+        # cant rely on TIMER event as another timer may run
+        # so scheduler check for due jobs
+        if event.type == 'TIMER':
+            if scheduler.run(context):
+                return self.cancel(context)
+        return {'PASS_THROUGH'}
+
+    def execute(self, context):
+        if scheduler.running or context.window is None:
+            return {'CANCELLED'}
+        wm = context.window_manager
+        # tick often enough to spread jobs over many ticks
+        self._timer = wm.event_timer_add(min(0.1, scheduler.delay), context.window)
+        wm.modal_handler_add(self)
+        scheduler.running = True
+        return {'RUNNING_MODAL'}
+
+    def cancel(self, context):
+        if self._timer is not None:
+            context.window_manager.event_timer_remove(self._timer)
+            self._timer = None
+        scheduler.running = False
+        return {'CANCELLED'}
+
+
+def register():
+    bpy.utils.register_class(ARCHIPACK_OT_update_scheduler)
+
+
+def unregister():
+    scheduler.clear()
+    scheduler.running = False
+    bpy.utils.unregister_class(ARCHIPACK_OT_update_scheduler)
@@ -40,6 +40,8 @@ from math import sin, cos, pi, atan2
 from .archipack_manipulator import Manipulable, archipack_manipulator
 from .archipack_object import ArchipackCreateTool, ArchipackObject
 from .archipack_2d import Line, Arc
+from .archipack_depsgraph import depsgraph
+from .geometry_cache import segments
 from .archipack_cutter import (
     CutAblePolygon, CutAbleGenerator,
     ArchipackCutter,
@@ -878,11 +880,32 @@ class archipack_slab(ArchipackObject, Manipulable, PropertyGroup):
                     wall.matrix_world = o.matrix_world.copy()
 
         tM = o.matrix_world
+
+        def child_inputs(child, c, d):
+            inputs = [tM, child.idx, c.matrix_world]
+            if d is not None:
+                # segments are chained, so any previous part
+                # may move segments the fence depends on
+                segs = g.segs[child.idx:child.idx + len(d.parts)]
+                inputs.extend([
+                    segments(segs),
+                    [(getattr(s, "r", 0), getattr(s, "da", 0)) for s in segs],
+                    [(p.type, p.a0, p.da, p.length, p.radius)
+                        for p in self.parts[child.idx:child.idx + len(d.parts)]]
+                    ])
+            else:
+                inputs.append(segments(g.segs[child.idx:child.idx + 1]))
+            return inputs
+
         for child in self.childs:
             c, d = child.get_child(context)
             if c is None:
                 continue
 
+            # skip fences when slab and fence did not change
+            if not depsgraph.changed(o, c, 'slab_child', *child_inputs(child, c, d)):
+                continue
+
             a = g.segs[child.idx].angle
             x, y = g.segs[child.idx].p0
             sa = sin(a)
@@ -917,6 +940,7 @@ class archipack_slab(ArchipackObject, Manipulable, PropertyGroup):
                     [0, 0, 1, 0],
                     [0, 0, 0, 1]
                 ])
+                depsgraph.clean(o, c, 'slab_child', *child_inputs(child, c, d))
 
     def remove_part(self, context, where):
         self.manipulable_disable(context)
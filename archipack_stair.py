@@ -2381,6 +2381,12 @@ class archipack_stair(ArchipackObject, Manipulable, PropertyGroup):
         g.set_matids(id_materials)
         g.make_stair(self.height, self.step_depth, verts, faces, matids, uvs, nose_y=self.nose_y)
 
+        # step blocks only while manipulating
+        if self.manipulable_use_proxy(manipulable_refresh):
+            bmed.buildmesh(context, o, verts, faces, matids=matids, uvs=uvs, weld=False, clean=False)
+            self.restore_context(context)
+            return
+
         # Ladder
         offset_x = 0.5 * self.width - self.post_offset_x
         post_spacing = self.post_spacing
@@ -2553,6 +2559,7 @@ class ARCHIPACK_PT_stair(Panel):
         layout = self.layout
         row = layout.row(align=True)
         row.operator('archipack.stair_manipulate', icon='HAND')
+        row.prop(prop, 'proxy_level', text="")
         row = layout.row(align=True)
         row.prop(prop, 'presets', text="")
         box = layout.box()
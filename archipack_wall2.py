@@ -27,8 +27,6 @@
 import bpy
 import bmesh
 
-import time
-
 from bpy.types import Operator, PropertyGroup, Mesh, Panel
 from bpy.props import (
     FloatProperty, BoolProperty, IntProperty, StringProperty,
@@ -46,14 +44,54 @@ from .archipack_manipulator import (
     GlLine, GlText, FeedbackPanel
     )
 from .archipack_object import ArchipackObject, ArchipackCreateTool, ArchpackDrawTool
-from .archipack_2d import Line, Arc
+from .archipack_2d import Line, Arc, SegmentIndex
 from .archipack_snap import snap_point
 from .archipack_keymaps import Keymaps
+from .archipack_autoboolean import ArchipackBoolManager
+from .archipack_scheduler import scheduler, PRIORITY_WALL
+from .archipack_depsgraph import depsgraph
+from .geometry_cache import segments
 
 import logging
 logger = logging.getLogger("archipack")
 
 
+class WallOpening():
+    """
+        Outline of a window or door opening
+        in wall segment coordsys
+        s: distance from segment start
+        z: altitude
+        outline must be monotone along s
+        name: window or door object name
+    """
+    def __init__(self, coords, name=""):
+        self.coords = coords
+        self.name = name
+        self.s0 = min(s for s, z in coords)
+        self.s1 = max(s for s, z in coords)
+
+    def steps(self):
+        return [s for s, z in self.coords]
+
+    def section(self, s, eps=0.0001):
+        """
+            Bottom and top of opening at s
+        """
+        zs = []
+        n_coords = len(self.coords)
+        for i, p in enumerate(self.coords):
+            q = self.coords[(i + 1) % n_coords]
+            if abs(q[0] - p[0]) < eps:
+                if abs(s - p[0]) < eps:
+                    zs.extend([p[1], q[1]])
+            elif min(p[0], q[0]) <= s <= max(p[0], q[0]):
+                zs.append(p[1] + (s - p[0]) / (q[0] - p[0]) * (q[1] - p[1]))
+        if len(zs) < 1:
+            return None
+        return min(zs), max(zs)
+
+
 class Wall():
     def __init__(self, wall_z, z, t, flip):
         self.z = z
@@ -106,6 +144,90 @@ class Wall():
         x, y = self.line.lerp(t)
         verts.append((x, y, z0))
 
+    def fit_openings(self, openings, eps=0.0001):
+        """
+            Keep openings inside segment, reject overlapping ones
+            return openings mesh can cut, rejected ones
+        """
+        length = self.length
+        cuts = []
+        rejected = []
+        s_max = eps
+        for opening in sorted(openings, key=lambda op: op.s0):
+            if opening.s0 > s_max and opening.s1 < length - eps:
+                cuts.append(opening)
+                s_max = opening.s1 + eps
+            else:
+                rejected.append(opening)
+        return cuts, rejected
+
+    def make_openings(self, verts, faces, cuts, eps=0.0001):
+        """
+            Build segment splitted at openings
+            sides of openings are boundary edges, so
+            solidify rim make reveals, sills and lintels
+            using rim material offset
+            cuts: openings as returned by fit_openings
+        """
+        length = self.length
+
+        steps = [t * length for t in self.t_step]
+        for opening in cuts:
+            steps.extend(opening.steps())
+        steps.sort()
+
+        cols = []
+        for s in steps:
+            if len(cols) > 0 and s - cols[-1][0] < eps:
+                continue
+            t = s / length
+            x, y = self.lerp(t)
+            z = self.wall_z + self.get_z(t)
+            zs = [0, z]
+            for opening in cuts:
+                if opening.s0 - eps <= s <= opening.s1 + eps:
+                    section = opening.section(s, eps)
+                    if section is not None:
+                        z0, z1 = section
+                        z0 = min(z, max(0, z0))
+                        z1 = min(z, max(z0, z1))
+                        zs = [0, z0, z1, z]
+                    break
+            # vertex index of each z, merge close ones
+            col = []
+            ids = []
+            for zi in zs:
+                if len(col) < 1 or zi - verts[col[-1]][2] > eps:
+                    col.append(len(verts))
+                    verts.append((x, y, zi))
+                ids.append(col[-1])
+            if len(zs) > 2:
+                sill, lintel = ids[1], ids[2]
+            else:
+                sill, lintel = None, None
+            cols.append((s, col, sill, lintel))
+
+        for i in range(len(cols) - 1):
+            sa, a, a_sill, a_lintel = cols[i]
+            sb, b, b_sill, b_lintel = cols[i + 1]
+            s = 0.5 * (sa + sb)
+            inside = (a_sill is not None and b_sill is not None and
+                any(opening.s0 < s < opening.s1 for opening in cuts))
+            if inside:
+                new_faces = [
+                    [a[0], b[0], b_sill, a_sill],
+                    [a_lintel, b_lintel, b[-1], a[-1]]
+                    ]
+            else:
+                new_faces = [[a[0]] + b + list(reversed(a[1:]))]
+            for face in new_faces:
+                # remove collapsed sides
+                face = [v for j, v in enumerate(face) if v != face[j - 1]]
+                if len(face) > 2:
+                    if self.flip:
+                        face.reverse()
+                    faces.append(tuple(face))
+
     def straight_wall(self, a0, length, wall_z, z, t):
         r = self.straight(length).rotate(a0)
         return StraightWall(r.p, r.v, wall_z, z, t, self.flip)
@@ -147,6 +269,19 @@ class WallGenerator():
         self.parts = parts
         self.faces_type = 'NONE'
         self.closed = False
+        self.index = None
+        # generators of T linked walls by name, built by setup_childs
+        # and reused by relocate_childs
+        self.t_childs = {}
+
+    def get_index(self, buffer):
+        """
+            Segment index, built once for generator
+            buffer: max distance of points from segments
+        """
+        if self.index is None or self.index.buffer < buffer:
+            self.index = SegmentIndex(self.segs, buffer)
+        return self.index
 
     def set_offset(self, offset):
         n_segs = len(self.segs)
@@ -291,7 +426,27 @@ class WallGenerator():
             z = Vector((0, 0, 0.75 * wall.wall_z))
             manipulators[3].set_pts([p0 + z, p1 + z, (1, 0, 0)])
 
-    def make_wall(self, step_angle, flip, closed, verts, faces):
+    def fit_openings(self, closed, openings):
+        """
+            openings: dict wall_idx: list of WallOpening
+            return dict wall_idx: openings mesh can cut,
+            list of rejected openings, overlapping, too close
+            from segment ends or on last segment of open walls
+        """
+        nb_segs = len(self.segs) - 1
+        if closed:
+            nb_segs += 1
+        cuts = {}
+        rejected = []
+        for i, seg_openings in openings.items():
+            if i < nb_segs:
+                cuts[i], seg_rejected = self.segs[i].fit_openings(seg_openings)
+                rejected.extend(seg_rejected)
+            else:
+                rejected.extend(seg_openings)
+        return cuts, rejected
+
+    def make_wall(self, step_angle, flip, closed, verts, faces, openings=None):
 
         # swap manipulators so they always face outside
         side = 1
@@ -308,6 +463,9 @@ class WallGenerator():
 
             wall.param_t(step_angle)
             if i < nb_segs:
+                if openings and i in openings:
+                    wall.make_openings(verts, faces, openings[i])
+                    continue
                 for j in range(wall.n_step + 1):
                     wall.make_wall(j, verts, faces)
             else:
@@ -385,7 +543,7 @@ class WallGenerator():
         bmesh.ops.contextual_create(bm, geom=bm.edges)
         geom = bm.faces[:]
         bmesh.ops.solidify(bm, geom=geom, thickness=height)
-        bm.to_mesh(o.data)
+        bmed.to_mesh(bm, o.data)
         bm.free()
 
     def make_hole(self, context, hole_obj, d):
@@ -877,6 +1035,15 @@ class archipack_wall2(ArchipackObject, Manipulable, PropertyGroup):
             default="",
             update=update_t_part
             )
+    openings = EnumProperty(
+            name="Openings",
+            description="How holes of windows and doors are made",
+            items=(
+                ('BOOLEAN', 'Boolean', 'Boolean modifiers', 0),
+                ('MESH', 'Mesh', 'Cut in wall mesh, booleans for custom holes only', 1)
+                ),
+            default='BOOLEAN', update=update
+            )
 
     def insert_part(self, context, o, where):
         self.manipulable_disable(context)
@@ -1162,23 +1329,47 @@ class archipack_wall2(ArchipackObject, Manipulable, PropertyGroup):
         # flip does trigger relocate and keep childs orientation
         self.flip = not self.flip
 
-    def update(self, context, manipulable_refresh=False, update_childs=False):
-
-        o = self.find_in_selection(context, self.auto_update)
-
-        if o is None:
-            return
-
-        if manipulable_refresh:
-            # prevent crash by removing all manipulators refs to datablock before changes
-            self.manipulable_disable(context)
+    def get_openings(self, context, g):
+        """
+            Outline of windows and doors openings
+            in wall segments coordsys
+            return dict wall_idx: list of WallOpening
+        """
+        openings = {}
+        if self.openings != 'MESH':
+            return openings
+        for child in self.childs:
+            c, d = child.get_child(context)
+            if d is None or child.wall_idx >= len(g.segs):
+                continue
+            # child x axis is reversed when flip
+            side = 1
+            if child.flip:
+                side = -1
+            x, y, z = child.pos
+            coords = [(x + side * cx, z + cz) for cx, cz in d.opening]
+            if child.wall_idx not in openings:
+                openings[child.wall_idx] = []
+            openings[child.wall_idx].append(WallOpening(coords, c.name))
+        return openings
+
+    def rejected_openings(self, context, g):
+        """
+            Names of windows and doors the mesh can't cut,
+            those require a boolean hole
+        """
+        cuts, rejected = g.fit_openings(self.closed, self.get_openings(context, g))
+        return set([opening.name for opening in rejected])
 
+    def make_mesh(self, context, o, g):
+        """
+            return names of windows and doors the mesh can't cut
+        """
         verts = []
         faces = []
-
-        g = self.update_parts(o, update_childs)
+        cuts, rejected = g.fit_openings(self.closed, self.get_openings(context, g))
         # print("make_wall")
-        g.make_wall(self.step_angle, self.flip, self.closed, verts, faces)
+        g.make_wall(self.step_angle, self.flip, self.closed, verts, faces, cuts)
 
         if self.closed:
             f = len(verts)
@@ -1189,6 +1380,30 @@ class archipack_wall2(ArchipackObject, Manipulable, PropertyGroup):
 
         # print("buildmesh")
         bmed.buildmesh(context, o, verts, faces, matids=None, uvs=None, weld=True)
+        return set([opening.name for opening in rejected])
+
+    def update_openings(self, context, o):
+        """
+            Rebuild mesh after childs openings changes
+            return names of windows and doors the mesh can't cut
+        """
+        g = self.get_generator()
+        self.update_childs(context, o, g)
+        return self.make_mesh(context, o, g)
+
+    def update(self, context, manipulable_refresh=False, update_childs=False):
+
+        o = self.find_in_selection(context, self.auto_update)
+
+        if o is None:
+            return
+
+        if manipulable_refresh:
+            # prevent crash by removing all manipulators refs to datablock before changes
+            self.manipulable_disable(context)
+
+        g = self.update_parts(o, update_childs)
+        self.make_mesh(context, o, g)
 
         side = 1
         if self.flip:
@@ -1228,7 +1443,7 @@ class archipack_wall2(ArchipackObject, Manipulable, PropertyGroup):
             # store gl points
             self.update_childs(context, o, g)
         else:
-            bpy.ops.archipack.wall2_throttle_update(name=o.name)
+            scheduler.schedule(context, o, update_childs_later, priority=PRIORITY_WALL)
 
         modif = o.modifiers.get('Wall')
         if modif is None:
@@ -1314,6 +1529,7 @@ class archipack_wall2(ArchipackObject, Manipulable, PropertyGroup):
         wall_with_childs = [0 for i in range(self.n_parts + 1)]
         relocate = []
         dmax = 2 * self.width
+        index = g.get_index(dmax)
 
         wtM = o.matrix_world
         wrM = Matrix([
@@ -1339,6 +1555,7 @@ class archipack_wall2(ArchipackObject, Manipulable, PropertyGroup):
                 # setup child T linked walls
                 if wd is not None:
                     wg = wd.get_generator()
+                    g.t_childs[child.name] = wg
                     # prevent error when user setup a dep loop with T childs
                     wd.setup_childs(child, wg, maxiter=maxiter + 1)
 
@@ -1353,12 +1570,15 @@ class archipack_wall2(ArchipackObject, Manipulable, PropertyGroup):
                 pt = (witM * pos).to_2d()
 
                 # Compute location of childs and relationship
-                for wall_idx, wall in enumerate(g.segs):
-                    # may be optimized with a bound check
+                # only for segments near child
+                for wall_idx in index.query_point(pt):
+                    wall = g.segs[wall_idx]
                     res, dist, t = wall.point_sur_segment(pt)
-                    # this test is too restrictive and must 
-                    # take account of wall depth
-                    t_bound = wall.length / self.width
+                    # child must lie within dmax of segment, as index
+                    # buffer, so on collinear segments child belongs
+                    # to the one it lies on, and childs farther than
+                    # dmax from segment ends are not childs of the wall
+                    t_bound = dmax / max(0.0001, wall.length)
                     # outside is on the right side of the wall
                     #  p1
                     #  |-- x
@@ -1405,10 +1625,24 @@ class archipack_wall2(ArchipackObject, Manipulable, PropertyGroup):
         if self.flip:
             w = -w
         tM = o.matrix_world
+        relocated = False
+
+        def child_inputs(child, c, d):
+            seg = g.segs[child.wall_idx]
+            inputs = [tM, segments([seg]), getattr(seg, "r", 0), getattr(seg, "da", 0),
+                child.pos, child.flip, self.width, self.x_offset, self.flip, c.matrix_world]
+            if d is not None:
+                inputs.extend([d.y, d.flip])
+            return inputs
+
         for child in self.childs:
             c, d = child.get_child(context)
             if c is None:
                 continue
+            # skip childs when wall and child did not change
+            if not depsgraph.changed(o, c, 'wall_child', *child_inputs(child, c, d)):
+                continue
+            relocated = True
             t = child.pos.x / g.segs[child.wall_idx].length
             n = g.segs[child.wall_idx].sized_normal(t, 1)
             rx, ry = -n.v
@@ -1438,12 +1672,20 @@ class archipack_wall2(ArchipackObject, Manipulable, PropertyGroup):
                 [0, 0, 0, 1]
             ])
 
+            depsgraph.clean(o, c, 'wall_child', *child_inputs(child, c, d))
+
             # Update T linked wall's childs
             if archipack_wall2.filter(c):
                 d = archipack_wall2.datablock(c)
-                cg = d.get_generator()
+                cg = g.t_childs.get(c.name)
+                if cg is None:
+                    cg = d.get_generator()
                 d.relocate_childs(context, c, cg)
 
+        # holes merged as mesh don't follow childs
+        if relocated:
+            ArchipackBoolManager().refresh_wall(context, o)
+
     def update_childs(self, context, o, g):
         """
             setup gl points for childs
@@ -1459,42 +1701,49 @@ class archipack_wall2(ArchipackObject, Manipulable, PropertyGroup):
             manip_side = -1
 
         itM = o.matrix_world.inverted()
+
+        # childs by segment, childs are sorted by t
+        wall_childs = {}
+        for child in self.childs:
+            if child.wall_idx not in wall_childs:
+                wall_childs[child.wall_idx] = []
+            wall_childs[child.wall_idx].append(child)
+
         m_idx = 0
         for wall_idx, wall in enumerate(g.segs):
             p0 = wall.lerp(0)
             wall_has_childs = False
-            for child in self.childs:
-                if child.wall_idx == wall_idx:
-                    c, d = child.get_child(context)
-                    if d is not None:
-                        # child is either a window or a door
-                        wall_has_childs = True
-                        dt = 0.5 * d.x / wall.length
-                        pt = (itM * c.matrix_world.translation).to_2d()
-                        res, y, t = wall.point_sur_segment(pt)
-                        child.pos = (wall.length * t, y, child.pos.z)
-                        p1 = wall.lerp(t - dt)
-                        # dumb size between childs
-                        self.childs_manipulators[m_idx].set_pts([
-                            (p0.x, p0.y, 0),
-                            (p1.x, p1.y, 0),
-                            (manip_side * 0.5, 0, 0)])
-                        m_idx += 1
-                        x, y = 0.5 * d.x, -self.x_offset * 0.5 * d.y
-
-                        if child.flip:
-                            side = -manip_side
-                        else:
-                            side = manip_side
-
-                        # delta loc
-                        child.manipulators[0].set_pts([(-x, side * -y, 0), (x, side * -y, 0), (side, 0, 0)])
-                        # loc size
-                        child.manipulators[1].set_pts([
-                            (-x, side * -y, 0),
-                            (x, side * -y, 0),
-                            (0.5 * side, 0, 0)])
-                        p0 = wall.lerp(t + dt)
+            for child in wall_childs.get(wall_idx, []):
+                c, d = child.get_child(context)
+                if d is not None:
+                    # child is either a window or a door
+                    wall_has_childs = True
+                    dt = 0.5 * d.x / wall.length
+                    pt = (itM * c.matrix_world.translation).to_2d()
+                    res, y, t = wall.point_sur_segment(pt)
+                    child.pos = (wall.length * t, y, child.pos.z)
+                    p1 = wall.lerp(t - dt)
+                    # dumb size between childs
+                    self.childs_manipulators[m_idx].set_pts([
+                        (p0.x, p0.y, 0),
+                        (p1.x, p1.y, 0),
+                        (manip_side * 0.5, 0, 0)])
+                    m_idx += 1
+                    x, y = 0.5 * d.x, -self.x_offset * 0.5 * d.y
+
+                    if child.flip:
+                        side = -manip_side
+                    else:
+                        side = manip_side
+
+                    # delta loc
+                    child.manipulators[0].set_pts([(-x, side * -y, 0), (x, side * -y, 0), (side, 0, 0)])
+                    # loc size
+                    child.manipulators[1].set_pts([
+                        (-x, side * -y, 0),
+                        (x, side * -y, 0),
+                        (0.5 * side, 0, 0)])
+                    p0 = wall.lerp(t + dt)
             p1 = wall.lerp(1)
             if wall_has_childs:
                 # dub size after all childs
@@ -1673,62 +1922,16 @@ class archipack_wall2(ArchipackObject, Manipulable, PropertyGroup):
         return None, None
 
 
-# Update throttle (hack)
-# use 2 globals to store a timer and state of update_action
-# Use to update floor boolean on edit
-update_timer = None
-update_timer_updating = False
-throttle_delay = 0.5
-throttle_start = 0
-
-
-class ARCHIPACK_OT_wall2_throttle_update(Operator):
-    bl_idname = "archipack.wall2_throttle_update"
-    bl_label = "Update childs with a delay"
-
-    name = StringProperty()
-
-    def modal(self, context, event):
-        global update_timer_updating
-        if event.type == 'TIMER' and not update_timer_updating:
-            # cant rely on TIMER event as another timer may run
-            if time.time() - throttle_start > throttle_delay:
-                update_timer_updating = True
-                o = context.scene.objects.get(self.name)
-                if o is not None:
-                    m = o.modifiers.get("AutoBoolean")
-                    if m is not None:
-                        o.hide = False
-                        # o.draw_type = 'TEXTURED'
-                        # m.show_viewport = True
-
-                    return self.cancel(context)
-        return {'PASS_THROUGH'}
-
-    def execute(self, context):
-        global update_timer
-        global update_timer_updating
-        global throttle_delay
-        global throttle_start
-        if update_timer is not None:
-            context.window_manager.event_timer_remove(update_timer)
-            if update_timer_updating:
-                return {'CANCELLED'}
-            # reset update_timer so it only occurs once 0.1s after last action
-            throttle_start = time.time()
-            update_timer = context.window_manager.event_timer_add(throttle_delay, context.window)
-            return {'CANCELLED'}
-        throttle_start = time.time()
-        update_timer_updating = False
-        context.window_manager.modal_handler_add(self)
-        update_timer = context.window_manager.event_timer_add(throttle_delay, context.window)
-        return {'RUNNING_MODAL'}
-
-    def cancel(self, context):
-        global update_timer
-        context.window_manager.event_timer_remove(update_timer)
-        update_timer = None
-        return {'CANCELLED'}
+def update_childs_later(context, o):
+    """
+        Delayed update of childs location and size
+        when not in realtime mode
+    """
+    d = archipack_wall2.datablock(o)
+    if d is not None:
+        g = d.get_generator()
+        d.relocate_childs(context, o, g)
+        d.update_childs(context, o, g)
 
 
 class ARCHIPACK_PT_wall2(Panel):
@@ -1754,6 +1957,7 @@ class ARCHIPACK_PT_wall2(Panel):
         box.prop(prop, 'z')
         box.prop(prop, 'flip')
         box.prop(prop, 'x_offset')
+        box.prop(prop, 'openings')
         row = layout.row()
         row.prop(prop, "closed")
         row = layout.row()
@@ -2403,7 +2607,6 @@ def register():
     bpy.utils.register_class(ARCHIPACK_OT_wall2_manipulate)
     bpy.utils.register_class(ARCHIPACK_OT_wall2_from_curve)
     bpy.utils.register_class(ARCHIPACK_OT_wall2_from_slab)
-    bpy.utils.register_class(ARCHIPACK_OT_wall2_throttle_update)
     bpy.utils.register_class(ARCHIPACK_OT_wall2_fit_roof)
 
 
@@ -2421,5 +2624,4 @@ def unregister():
     bpy.utils.unregister_class(ARCHIPACK_OT_wall2_manipulate)
     bpy.utils.unregister_class(ARCHIPACK_OT_wall2_from_curve)
     bpy.utils.unregister_class(ARCHIPACK_OT_wall2_from_slab)
-    bpy.utils.unregister_class(ARCHIPACK_OT_wall2_throttle_update)
     bpy.utils.unregister_class(ARCHIPACK_OT_wall2_fit_roof)
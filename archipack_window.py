@@ -35,7 +35,7 @@ from bpy.props import (
 from mathutils import Vector, Matrix
 from math import tan, sqrt, pi, sin, cos
 from .bmesh_utils import BmeshEdit as bmed
-from .panel import Panel as WindowPanel
+from .panel import Panel as WindowPanel, PanelMesh
 from .archipack_handle import create_handle, window_handle_vertical_01, window_handle_vertical_02
 # from .archipack_door_panel import ARCHIPACK_OT_select_parent
 from .archipack_manipulator import Manipulable
@@ -43,6 +43,9 @@ from .archipack_preset import ArchipackPreset, PresetMenuOperator
 from .archipack_gl import FeedbackPanel
 from .archipack_object import ArchipackObject, ArchipackCreateTool, ArchpackDrawTool
 from .archipack_keymaps import Keymaps
+from .archipack_autoboolean import ArchipackBoolManager
+from .archipack_depsgraph import depsgraph
+from .geometry_cache import properties
 
 
 def update(self, context):
@@ -366,24 +369,12 @@ class archipack_window_panel(ArchipackObject, PropertyGroup):
                 side_cap_back=side_cap_back      # cap index
                 )
 
-    @property
-    def verts(self):
-        offset = Vector((0, 0, 0))
-        return self.window.vertices(self.curve_steps, offset, self.center, self.origin, self.size,
-            self.radius, self.angle_y, self.pivot, shape_z=None, path_type=self.shape)
-
-    @property
-    def faces(self):
-        return self.window.faces(self.curve_steps, path_type=self.shape)
-
-    @property
-    def matids(self):
-        return self.window.mat(self.curve_steps, 2, 2, path_type=self.shape)
-
-    @property
-    def uvs(self):
-        return self.window.uv(self.curve_steps, self.center, self.origin, self.size,
-            self.radius, self.angle_y, self.pivot, 0, self.frame_x, path_type=self.shape)
+    def panel_mesh(self):
+        mesh = PanelMesh(self.curve_steps)
+        mesh.add_panel(self.window, self.shape, 2, 2,
+            Vector((0, 0, 0)), self.center, self.origin, self.size,
+            self.radius, self.angle_y, self.pivot, 0, self.frame_x)
+        return mesh
 
     def find_handle(self, o):
         for child in o.children:
@@ -422,7 +413,8 @@ class archipack_window_panel(ArchipackObject, PropertyGroup):
         else:
             self.update_handle(context, o)
 
-        bmed.buildmesh(context, o, self.verts, self.faces, self.matids, self.uvs)
+        mesh = self.panel_mesh()
+        bmed.buildmesh_arrays(context, o, *mesh.arrays())
 
         self.restore_context(context)
 
@@ -624,17 +616,41 @@ class archipack_window_shutter(ArchipackObject, PropertyGroup):
                 tM * Vector((d, cos(deg * (seg - 3)), 1)),
             ])
 
-    @property
-    def verts(self):
+    def hinge_mesh(self, mesh, altitude):
+        seg = 12
+        deg = 2 * pi / seg
+        verts = []
+        self.hinge(altitude, verts)
+        faces = [
+            tuple([i + seg for i in range(seg - 1, -1, -1)]),
+            tuple([i for i in range(seg)])
+            ]
+        faces.extend([tuple([i + f for f in (1, 0, seg, seg + 1)]) for i in range(seg - 1)])
+        faces.append((0, seg - 1, 2 * seg - 1, seg))
+        radius = 0.005
+        size = 0.04
+        tM = Matrix([
+            [radius, 0, 0, 0],
+            [0, radius, 0, 0],
+            [0, 0, size, 0],
+            [0, 0, 0, 1]
+        ])
+        cap = tuple([(tM * Vector((sin(deg * a), cos(deg * a), 0))).to_2d() for a in range(seg)])
+        uvs = [cap, cap]
+        uvs.extend([[(0, 0), (0, 1), (1, 1), (1, 0)] for i in range(seg)])
+        mesh.add(verts, faces, [3 for i in range(seg + 2)], uvs)
+
+    def panel_mesh(self):
 
         side, face, back = self.shutter
         border = self.border
         spacing = 0.75 * self.border
-
         x1 = border - 0.5 * spacing
-        offset = Vector((self.offset, 0, 0))
-        verts = side.vertices(self.curve_steps, offset, self.center, self.origin, self.size,
-            self.radius, self.angle_y, self.pivot, shape_z=None, path_type=self.shape)
+
+        mesh = PanelMesh(self.curve_steps)
+        mesh.add_panel(side, self.shape, 5, 5,
+            Vector((self.offset, 0, 0)), self.center, self.origin, self.size,
+            self.radius, self.angle_y, self.pivot, self.border, 0)
 
         p_radius = self.radius.copy()
         p_radius.x -= x1
@@ -657,134 +673,18 @@ class archipack_window_shutter(ArchipackObject, PropertyGroup):
                 p_size.y * j + x1,
                 0))
 
-            verts += face.vertices(self.curve_steps, offset, self.center, origin,
-                p_size, p_radius, self.angle_y, self.pivot, shape_z=None, path_type=shape)
-            verts += back.vertices(self.curve_steps, offset, self.center, origin,
-                p_size, p_radius, self.angle_y, self.pivot, shape_z=None, path_type=shape)
+            for panel in (face, back):
+                mesh.add_panel(panel, shape, 5, 5,
+                    offset, self.center, origin, p_size,
+                    p_radius, self.angle_y, self.pivot)
 
         if self.hinge_enable:
             z0 = 0.15
             dz = (self.hinge_space - 2 * z0) / (self.hinge_count - 1)
             for j in range(self.hinge_count):
-                self.hinge(z0 + dz * j, verts)
+                self.hinge_mesh(mesh, z0 + dz * j)
 
-        return verts
-
-    @property
-    def faces(self):
-
-        side, face, back = self.shutter
-
-        faces = side.faces(self.curve_steps, path_type=self.shape)
-        faces_offset = side.n_verts(self.curve_steps, path_type=self.shape)
-
-        for j in range(2):
-            if j < 1:
-                shape = 'RECTANGLE'
-            else:
-                shape = self.shape
-            faces += face.faces(self.curve_steps, path_type=shape, offset=faces_offset)
-            faces_offset += face.n_verts(self.curve_steps, path_type=shape)
-            faces += back.faces(self.curve_steps, path_type=shape, offset=faces_offset)
-            faces_offset += back.n_verts(self.curve_steps, path_type=shape)
-
-        if self.hinge_enable:
-            seg = 12
-            for j in range(self.hinge_count):
-                faces.append(tuple([faces_offset + i + seg for i in range(seg - 1, -1, -1)]))
-                faces.append(tuple([faces_offset + i for i in range(seg)]))
-                faces.extend([tuple([faces_offset + i + f for f in (1, 0, seg, seg + 1)]) for i in range(seg - 1)])
-                faces.append((
-                    faces_offset,
-                    faces_offset + seg - 1,
-                    faces_offset + 2 * seg - 1,
-                    faces_offset + seg
-                    ))
-
-                faces_offset += 2 * seg
-
-        return faces
-
-    @property
-    def uvs(self):
-
-        side, face, back = self.shutter
-
-        border = self.border
-        spacing = 0.75 * self.border
-        x1 = border - 0.5 * spacing
-
-        uvs = side.uv(self.curve_steps,
-            self.center,
-            self.origin,
-            self.size,
-            self.radius,
-            self.angle_y,
-            self.pivot,
-            self.border, 0,
-            path_type=self.shape)
-
-        p_radius = self.radius.copy()
-        p_radius.x -= x1
-        p_radius.y -= x1
-        p_size = Vector((self.size.x - 2 * x1, (self.size.y - 2 * x1) / 2, 0))
-
-        for j in range(2):
-            if j < 1:
-                shape = 'RECTANGLE'
-            else:
-                shape = self.shape
-            origin = Vector((
-                self.origin.x + self.pivot * x1,
-                p_size.y * j + x1,
-                0))
-            uvs += face.uv(self.curve_steps, self.center, origin, p_size,
-                p_radius, self.angle_y, self.pivot, 0, 0, path_type=shape)
-            uvs += back.uv(self.curve_steps, self.center, origin, p_size,
-                p_radius, self.angle_y, self.pivot, 0, 0, path_type=shape)
-
-        if self.hinge_enable:
-            seg = 12
-            deg = 2 * pi / seg
-            radius = 0.005
-            x = 0
-            y = 0
-            z = 0
-            size = 0.04
-            tM = Matrix([
-                [radius, 0, 0, x],
-                [0, radius, 0, y],
-                [0, 0, size, z],
-                [0, 0, 0, 1]
-            ])
-
-            for j in range(self.hinge_count):
-                uvs.append(tuple([(tM * Vector((sin(deg * a), cos(deg * a), 0))).to_2d() for a in range(seg)]))
-                uvs.append(tuple([(tM * Vector((sin(deg * a), cos(deg * a), 0))).to_2d() for a in range(seg)]))
-                uvs.extend([[(0, 0), (0, 1), (1, 1), (1, 0)] for i in range(seg)])
-
-        return uvs
-
-    @property
-    def matids(self):
-
-        side, face, back = self.shutter
-        mat = side.mat(self.curve_steps, 5, 5, path_type=self.shape)
-        for j in range(2):
-            if j < 1:
-                shape = 'RECTANGLE'
-            else:
-                shape = self.shape
-            mat += face.mat(self.curve_steps, 5, 5, path_type=shape)
-            mat += back.mat(self.curve_steps, 5, 5, path_type=shape)
-
-        if self.hinge_enable:
-            for j in range(self.hinge_count):
-                seg = 12
-                mat.extend([3, 3])
-                mat.extend([3 for i in range(seg)])
-
-        return mat
+        return mesh
 
     def update(self, context):
 
@@ -793,11 +693,24 @@ class archipack_window_shutter(ArchipackObject, PropertyGroup):
         if o is None:
             return
 
-        bmed.buildmesh(context, o, self.verts, self.faces, self.matids, self.uvs)
+        mesh = self.panel_mesh()
+        bmed.buildmesh_arrays(context, o, *mesh.arrays())
 
         self.restore_context(context)
 
 
+# properties without effect on hole
+HOLE_UNRELATED = {
+    'blind_inside', 'blind_outside', 'blind_enable', 'blind_y', 'blind_z', 'blind_open',
+    'in_tablet_enable', 'in_tablet_x', 'in_tablet_y', 'in_tablet_z',
+    'enable_glass', 'warning', 'portal',
+    'handle_enable', 'handle_altitude',
+    'shutter_enable', 'shutter_left', 'shutter_right',
+    'shutter_border', 'shutter_depth', 'shutter_hinge',
+    'display_detail', 'display_panels', 'display_materials'
+    }
+
+
 class archipack_window(ArchipackObject, Manipulable, PropertyGroup):
     x = FloatProperty(
             name='Width',
@@ -1344,38 +1257,50 @@ class archipack_window(ArchipackObject, Manipulable, PropertyGroup):
             closed_path=False           # closed path
             )
 
-    @property
-    def vertical_space(self):
+    def get_vertical_space(self, window, center, origin, size, radius):
         """
             avaliable space for hinges
+            center, origin, size, radius: get_radius(x, z)
         """
-        center, origin, size, radius = self.get_radius(self.x, self.z)
-        is_not_circle = self.shape != 'CIRCLE'
         offset = Vector((0, self.altitude - self._overflow, 0))
-        left, right = self.window.avaliable_vertical_space(self.curve_steps, offset, center, origin,
-            size, radius, self.angle_y, 0, shape_z=None, path_type=self.shape)    
+        left, right = window.avaliable_vertical_space(self.curve_steps, offset, center, origin,
+            size, radius, self.angle_y, 0, shape_z=None, path_type=self.shape)
         return left, right
-        
+
     @property
-    def verts(self):
+    def vertical_space(self):
+        """
+            avaliable space for hinges
+        """
+        center, origin, size, radius = self.get_radius(self.x, self.z)
+        return self.get_vertical_space(self.window, center, origin, size, radius)
+
+    def panel_mesh(self, window):
+        """
+            Frame, out frame and tablets
+        """
+        shape = self.shape
         center, origin, size, radius = self.get_radius(self._x, self._z)
-        is_not_circle = self.shape != 'CIRCLE'
+        is_not_circle = shape != 'CIRCLE'
         offset = Vector((0, self.altitude - self._overflow, 0))
-        verts = self.window.vertices(self.curve_steps, offset, center, origin,
-            size, radius, self.angle_y, 0, shape_z=None, path_type=self.shape)
+        uv = (center, origin, size, radius)
+
+        mesh = PanelMesh(self.curve_steps)
+        mesh.add_panel(window, shape, 2, 2,
+            offset, center, origin, size, radius, self.angle_y, 0, 0, self.frame_x)
 
         if self.out_frame:
             _size = Vector((self.x, self.z, 0))
             _offset = Vector((0, self.altitude, 0))
             _center = Vector((center.x, center.y - self._overflow, center.z))
 
-            if self.shape == 'ELLIPSIS':
+            if shape == 'ELLIPSIS':
                 _radius = Vector((
                     radius.x - self._overflow,
                     radius.y - self._overflow,
                     0))
 
-            elif self.shape == 'QUADRI':
+            elif shape == 'QUADRI':
                 _radius = Vector((self.x, 0, 0))
 
                 if self.angle_y < 0:
@@ -1390,9 +1315,9 @@ class archipack_window(ArchipackObject, Manipulable, PropertyGroup):
             else:
                 _radius = Vector((radius.x - self._overflow, 0, 0))
 
-            verts += self.frame.vertices(self.curve_steps, _offset, _center, origin,
-                _size, _radius,
-                self.angle_y, 0, shape_z=None, path_type=self.shape)
+            mesh.add_panel(self.frame, shape, 0, 0,
+                _offset, _center, origin, _size, _radius, self.angle_y, 0, 0, self.frame_x,
+                uv=uv)
 
         if is_not_circle and self.out_tablet_enable:
             _offset = Vector((0, self.altitude, 0))
@@ -1400,65 +1325,17 @@ class archipack_window(ArchipackObject, Manipulable, PropertyGroup):
                 self.x + 2 * (self.out_tablet_x),
                 size.y,
                 size.z))
-            verts += self.out_tablet.vertices(self.curve_steps, _offset, center, origin,
-                _size, radius, self.angle_y, 0, shape_z=None, path_type='HORIZONTAL')
-
-        if is_not_circle and self.in_tablet_enable:
-            verts += self.in_tablet.vertices(self.curve_steps, offset, center, origin,
-                Vector((size.x + 2 * (self.frame_x + self.in_tablet_x), size.y, size.z)),
-                radius, self.angle_y, 0, shape_z=None, path_type='HORIZONTAL')
+            mesh.add_panel(self.out_tablet, 'HORIZONTAL', 0, 0,
+                _offset, center, origin, _size, radius, self.angle_y, 0, 0, self.frame_x,
+                uv=uv)
 
-        return verts
-
-    @property
-    def faces(self):
-        window = self.window
-        faces = window.faces(self.curve_steps, path_type=self.shape)
-        verts_offset = window.n_verts(self.curve_steps, path_type=self.shape)
-        is_not_circle = self.shape != 'CIRCLE'
-        if self.out_frame:
-            frame = self.frame
-            faces += frame.faces(self.curve_steps, path_type=self.shape, offset=verts_offset)
-            verts_offset += frame.n_verts(self.curve_steps, path_type=self.shape)
-        if is_not_circle and self.out_tablet_enable:
-            tablet = self.out_tablet
-            faces += tablet.faces(self.curve_steps, path_type='HORIZONTAL', offset=verts_offset)
-            verts_offset += tablet.n_verts(self.curve_steps, path_type='HORIZONTAL')
-        if is_not_circle and self.in_tablet_enable:
-            tablet = self.in_tablet
-            faces += tablet.faces(self.curve_steps, path_type='HORIZONTAL', offset=verts_offset)
-            verts_offset += tablet.n_verts(self.curve_steps, path_type='HORIZONTAL')
-
-        return faces
-
-    @property
-    def matids(self):
-        mat = self.window.mat(self.curve_steps, 2, 2, path_type=self.shape)
-        is_not_circle = self.shape != 'CIRCLE'
-        if self.out_frame:
-            mat += self.frame.mat(self.curve_steps, 0, 0, path_type=self.shape)
-        if is_not_circle and self.out_tablet_enable:
-            mat += self.out_tablet.mat(self.curve_steps, 0, 0, path_type='HORIZONTAL')
         if is_not_circle and self.in_tablet_enable:
-            mat += self.in_tablet.mat(self.curve_steps, 0, 0, path_type='HORIZONTAL')
-        return mat
+            _size = Vector((size.x + 2 * (self.frame_x + self.in_tablet_x), size.y, size.z))
+            mesh.add_panel(self.in_tablet, 'HORIZONTAL', 0, 0,
+                offset, center, origin, _size, radius, self.angle_y, 0, 0, self.frame_x,
+                uv=uv)
 
-    @property
-    def uvs(self):
-        center, origin, size, radius = self.get_radius(self._x, self._z)
-        uvs = self.window.uv(self.curve_steps, center, origin, size, radius,
-            self.angle_y, 0, 0, self.frame_x, path_type=self.shape)
-        is_not_circle = self.shape != 'CIRCLE'
-        if self.out_frame:
-            uvs += self.frame.uv(self.curve_steps, center, origin, size, radius,
-                self.angle_y, 0, 0, self.frame_x, path_type=self.shape)
-        if is_not_circle and self.out_tablet_enable:
-            uvs += self.out_tablet.uv(self.curve_steps, center, origin, size, radius,
-                self.angle_y, 0, 0, self.frame_x, path_type='HORIZONTAL')
-        if is_not_circle and self.in_tablet_enable:
-            uvs += self.in_tablet.uv(self.curve_steps, center, origin, size, radius,
-                self.angle_y, 0, 0, self.frame_x, path_type='HORIZONTAL')
-        return uvs
+        return mesh
 
     def find_blind(self, o, inside):
         for child in o.children:
@@ -1876,7 +1753,7 @@ class archipack_window(ArchipackObject, Manipulable, PropertyGroup):
             origin.append(Vector((ttl - xh, 0)))
         return size, origin
 
-    def update_shutter(self, context, o, left_side, hinge_space):
+    def update_shutter(self, context, o, left_side, hinge_space, center=None, radius=None):
         # wanted childs
         if self.shutter_enable:
             if left_side:
@@ -1909,7 +1786,8 @@ class archipack_window(ArchipackObject, Manipulable, PropertyGroup):
         if self.out_frame:
             location_y -= self.out_frame_y2
         # Note: radius is slightly wrong: not taking overflow in account
-        center, origin, size, radius = self.get_radius(self.x, self.z)
+        if center is None:
+            center, origin, size, radius = self.get_radius(self.x, self.z)
         offset = Vector((0.05, 0))
         size, origin = self.get_shutter_row(self.x, self.z, left_side)
 
@@ -2192,21 +2070,35 @@ class archipack_window(ArchipackObject, Manipulable, PropertyGroup):
 
         self.setup_manipulators()
 
+        window = self.window
+
         if childs_only is False:
-            bmed.buildmesh(context, o, self.verts, self.faces, self.matids, self.uvs)
+            mesh = self.panel_mesh(window)
+            bmed.buildmesh_arrays(context, o, *mesh.arrays())
 
         self.update_portal(context, o)
         self.update_blind(context, o, True)
         self.update_blind(context, o, False)
         self.update_childs(context, o)
         
-        left, right = self.vertical_space
-        self.update_shutter(context, o, True, left)
-        self.update_shutter(context, o, False, right)
+        center, origin, size, radius = self.get_radius(self.x, self.z)
+        left, right = self.get_vertical_space(window, center, origin, size, radius)
+        self.update_shutter(context, o, True, left, center, radius)
+        self.update_shutter(context, o, False, right, center, radius)
+
+        # update hole, merged holes and walls cutting openings
+        # only when hole inputs did change
+        def hole_inputs(hole_obj):
+            return (o.matrix_world, properties(self, HOLE_UNRELATED),
+                hole_obj is not None and len(hole_obj.data.vertices))
 
-        # update hole
-        if childs_only is False and self.find_hole(o) is not None:
-            self.interactive_hole(context, o)
+        hole_obj = self.find_hole(o)
+        if childs_only is False and depsgraph.changed(o, hole_obj, 'hole', *hole_inputs(hole_obj)):
+            if hole_obj is not None:
+                self.interactive_hole(context, o)
+            ArchipackBoolManager().refresh_hole(context, o)
+            hole_obj = self.find_hole(o)
+            depsgraph.clean(o, hole_obj, 'hole', *hole_inputs(hole_obj))
 
         # support for instances childs, update at object level
         self.synch_childs(context, o)
@@ -2227,6 +2119,21 @@ class archipack_window(ArchipackObject, Manipulable, PropertyGroup):
                 return child
         return None
 
+    @property
+    def opening(self):
+        """
+            Outline of hole through wall in x, z
+            for walls cutting openings in mesh
+        """
+        hole = self.hole
+        center, origin, size, radius = self.get_radius(self._x, self._z)
+        verts = hole.vertices(self.curve_steps,
+            Vector((0, self.altitude - self._overflow, 0)),
+            center, origin, size, radius,
+            self.angle_y, 0, shape_z=None, path_type=self.shape)
+        # outline of first profile x, going through wall
+        return [(x, z) for x, y, z in verts[::len(hole.index)]]
+
     def interactive_hole(self, context, o):
         hole_obj = self.find_hole(o)
 
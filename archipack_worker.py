@@ -0,0 +1,238 @@
+# -*- coding:utf-8 -*-
+
+# ##### BEGIN GPL LICENSE BLOCK #####
+#
+#  This program is free software; you can redistribute it and/or
+#  modify it under the terms of the GNU General Public License
+#  as published by the Free Software Foundation; either version 2
+#  of the License, or (at your option) any later version.
+#
+#  This program is distributed in the hope that it will be useful,
+#  but WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#  GNU General Public License for more details.
+#
+#  You should have received a copy of the GNU General Public License
+#  along with this program; if not, write to the Free Software Foundation,
+#  Inc., 51 Franklin Street, Fifth Floor, Boston, MA 02110-1301, USA.
+#
+# ##### END GPL LICENSE BLOCK #####
+
+# <pep8 compliant>
+
+# ----------------------------------------------------------
+# Author: Stephen Leger (s-leger)
+#
+# ----------------------------------------------------------
+# Background geometry generation
+# 3 steps:
+#   snapshot on main thread, copy datablock into plain objects
+#   compute in a worker thread, must not read bpy data
+#   apply on main thread by a modal timer, upload result
+# Each new job of an object supersede pending ones,
+# so stale results are never applied
+# ----------------------------------------------------------
+import bpy
+import threading
+from queue import Queue
+from collections import deque
+from bpy.types import Operator
+from .geometry_cache import properties
+
+
+class Snapshot():
+    """
+        Plain copy of datablock properties
+        safe to read from worker thread
+        kwargs: additional values
+    """
+    def __init__(self, d, **kwargs):
+        for key, value in properties(d).items():
+            setattr(self, key, value)
+        for key, value in kwargs.items():
+            setattr(self, key, value)
+
+
+class WorkerJob():
+    """
+        compute(*args) run in worker thread
+        apply(context, o, result) run on main thread
+    """
+    def __init__(self, name, token, compute, args, apply):
+        self.name = name
+        self.token = token
+        self.compute = compute
+        self.args = args
+        self.apply = apply
+        self.result = None
+        self.error = None
+
+
+class GeometryWorker():
+    """
+        Single worker thread computing jobs in order
+        enabled: when False, jobs run synchronously
+    """
+    def __init__(self):
+        self.enabled = False
+        self.lock = threading.Lock()
+        self.todo = Queue()
+        self.done = deque()
+        # object name: token of last job
+        self.tokens = {}
+        self.token = 0
+        self.thread = None
+        self.running = False
+
+    def setup(self, enabled):
+        self.enabled = enabled
+
+    def background(self, context):
+        """
+            Jobs may run in background only when a window
+            runs the modal timer applying results,
+            so not in background mode, render or scripts
+        """
+        return self.enabled and not bpy.app.background and context.window is not None
+
+    def submit(self, context, o, compute, args, apply):
+        """
+            Queue a job for object o, superseding pending ones
+            return True when job run in background
+        """
+        with self.lock:
+            self.token += 1
+            token = self.token
+            self.tokens[o.name] = token
+
+        if self.background(context) and not self.running:
+            try:
+                bpy.ops.archipack.geometry_worker()
+            except RuntimeError as ex:
+                print("GeometryWorker timer failed, run synchronously: %s" % ex)
+
+        if not (self.background(context) and self.running):
+            with self.lock:
+                del self.tokens[o.name]
+            apply(context, o, compute(*args))
+            return False
+
+        self.start()
+        self.todo.put(WorkerJob(o.name, token, compute, args, apply))
+        return True
+
+    def cancel(self, o):
+        """
+            Drop pending jobs of object o,
+            when its mesh is rebuilt without them
+        """
+        with self.lock:
+            self.tokens.pop(o.name, None)
+
+    def is_stale(self, job):
+        with self.lock:
+            return self.tokens.get(job.name) != job.token
+
+    def _run(self):
+        while True:
+            job = self.todo.get()
+            if job is None:
+                break
+            if self.is_stale(job):
+                continue
+            try:
+                job.result = job.compute(*job.args)
+            except Exception as ex:
+                job.error = ex
+            self.done.append(job)
+
+    def start(self):
+        if self.thread is None or not self.thread.is_alive():
+            self.thread = threading.Thread(target=self._run, daemon=True)
+            self.thread.start()
+
+    def stop(self):
+        if self.thread is not None:
+            self.todo.put(None)
+            self.thread = None
+        self.clear()
+
+    def clear(self):
+        with self.lock:
+            self.tokens.clear()
+        self.done.clear()
+
+    def apply(self, context):
+        """
+            Apply computed jobs, as if object was
+            the selected and active one
+            return True when no job is pending
+        """
+        while len(self.done) > 0:
+            job = self.done.popleft()
+            if self.is_stale(job):
+                continue
+            with self.lock:
+                del self.tokens[job.name]
+            o = context.scene.objects.get(job.name)
+            if job.error is not None:
+                print("GeometryWorker compute of %s failed: %s" % (job.name, job.error))
+                continue
+            if o is None:
+                continue
+            act = context.active_object
+            selected = o.select
+            o.select = True
+            context.scene.objects.active = o
+            try:
+                job.apply(context, o, job.result)
+            except Exception as ex:
+                print("GeometryWorker apply of %s failed: %s" % (job.name, ex))
+            o.select = selected
+            context.scene.objects.active = act
+
+        with self.lock:
+            return len(self.tokens) < 1
+
+
+geometry_worker = GeometryWorker()
+
+
+class ARCHIPACK_OT_geometry_worker(Operator):
+    bl_idname = "archipack.geometry_worker"
+    bl_label = "Apply background geometry"
+    bl_options = {'INTERNAL'}
+
+    _timer = None
+
+    def modal(self, context, event):
+        if event.type == 'TIMER':
+            if geometry_worker.apply(context):
+                return self.cancel(context)
+        return {'PASS_THROUGH'}
+
+    def execute(self, context):
+        if geometry_worker.running or context.window is None:
+            return {'CANCELLED'}
+        wm = context.window_manager
+        self._timer = wm.event_timer_add(0.05, context.window)
+        wm.modal_handler_add(self)
+        geometry_worker.running = True
+        return {'RUNNING_MODAL'}
+
+    def cancel(self, context):
+        if self._timer is not None:
+            context.window_manager.event_timer_remove(self._timer)
+            self._timer = None
+        geometry_worker.running = False
+        return {'CANCELLED'}
+
+
+def register():
+    bpy.utils.register_class(ARCHIPACK_OT_geometry_worker)
+
+
+def unregister():
+    geometry_worker.stop()
+    geometry_worker.running = False
+    bpy.utils.unregister_class(ARCHIPACK_OT_geometry_worker)
@@ -26,6 +26,52 @@
 # ----------------------------------------------------------
 import bpy
 import bmesh
+import numpy as np
+from itertools import chain
+from hashlib import sha1
+from .roof_tiles import TileArrays
+
+
+class MeshTopology():
+    """
+        Topology of a mesh built by BmeshEdit.buildmesh_arrays
+        signature: hash of input faces sizes and indices, clean and smooth flags
+        src: (V,) input vertex index of each final vertex
+        same_faces: True when final faces and loops match input ones
+        matids, uvs: hash of last uploaded material ids and uvs
+        n_faces, n_loops: final mesh size, to detect later changes of mesh
+        signature is also stored on mesh, and removed by any other write,
+        so topology of a mesh rewritten in between is never reused
+    """
+    def __init__(self, signature, src, same_faces, matids, uvs, n_faces, n_loops):
+        self.signature = signature
+        self.src = src
+        self.same_faces = same_faces
+        self.matids = matids
+        self.uvs = uvs
+        self.n_faces = n_faces
+        self.n_loops = n_loops
+
+
+# MeshTopology by mesh datablock pointer
+# in memory only, so a file reload trigger a full rebuild
+topology_cache = {}
+
+# mesh id property holding topology signature
+TOPOLOGY_KEY = "archipack_topology"
+
+
+def _digest(*arrays):
+    h = sha1()
+    for arr in arrays:
+        if arr is None:
+            h.update(b"None")
+        elif isinstance(arr, np.ndarray):
+            h.update(str(arr.shape).encode())
+            h.update(np.ascontiguousarray(arr).tobytes())
+        else:
+            h.update(repr(arr).encode())
+    return h.hexdigest()
 
 
 class BmeshEdit():
@@ -92,11 +138,32 @@ class BmeshEdit():
 
         BmeshEdit._end(bm, o)
 
+    @staticmethod
+    def _invalidate(me):
+        """
+            private, forget topology of a mesh
+            written outside of buildmesh_arrays
+        """
+        topology_cache.pop(me.as_pointer(), None)
+        if TOPOLOGY_KEY in me:
+            del me[TOPOLOGY_KEY]
+
+    @staticmethod
+    def to_mesh(bm, me):
+        """
+            write bmesh to mesh datablock
+            use instead of bm.to_mesh so buildmesh_arrays
+            does not reuse topology of previous mesh
+        """
+        BmeshEdit._invalidate(me)
+        bm.to_mesh(me)
+
     @staticmethod
     def _end(bm, o):
         """
             private, end bmesh editing of active object
         """
+        BmeshEdit._invalidate(o.data)
         bm.normal_update()
         bmesh.update_edit_mesh(o.data, True)
         bpy.ops.object.mode_set(mode='OBJECT')
@@ -125,6 +192,181 @@ class BmeshEdit():
         for i, v in enumerate(verts):
             bm.verts[i].co = v
 
+    @staticmethod
+    def _clear(me):
+        """
+            private, remove all geometry of mesh datablock
+        """
+        bm = bmesh.new()
+        BmeshEdit.to_mesh(bm, me)
+        bm.free()
+
+    @staticmethod
+    def _flatten(faces, uvs=None):
+        """
+            private, convert faces and uvs lists to flat arrays
+            return loops, totals, uvs
+        """
+        n_faces = len(faces)
+        totals = np.fromiter((len(f) for f in faces), dtype=np.int32, count=n_faces)
+        loops = np.fromiter(chain.from_iterable(faces), dtype=np.int32, count=int(totals.sum()))
+        if uvs is None:
+            return loops, totals, None
+        if len(uvs) < n_faces:
+            raise RuntimeError("Missing uvs for face {}".format(len(uvs)))
+        uv_totals = np.fromiter((len(uv) for uv in uvs[:n_faces]), dtype=np.int32, count=n_faces)
+        if np.any(uv_totals < totals):
+            i = int(np.flatnonzero(uv_totals < totals)[0])
+            raise RuntimeError("Missing uv {} for face {}".format(uv_totals[i], i))
+        if np.all(uv_totals == totals):
+            flat = chain.from_iterable(uvs[:n_faces])
+        else:
+            flat = chain.from_iterable(uv[:t] for uv, t in zip(uvs, totals))
+        uvs = np.array([tuple(co[0:2]) for co in flat], dtype=np.float64).reshape(-1, 2)
+        return loops, totals, uvs
+
+    @staticmethod
+    def buildmesh_arrays(context, o, verts, loops, totals,
+            matids=None, uvs=None, weld=False,
+            clean=False, auto_smooth=True):
+        """
+            Bulk upload of flat arrays as mesh of object o
+            verts: (V, 3) vertex coords
+            loops: (L,) vertex index of each face loop
+            totals: (F,) number of loops of each face
+            matids: (F,) material index of each face
+            uvs: (L, 2) uv of each loop
+            Use data api only, object must not be in edit mode
+        """
+        o.select = True
+        context.scene.objects.active = o
+        if o.mode == 'EDIT':
+            bpy.ops.object.mode_set(mode='OBJECT')
+        me = o.data
+        verts = np.asarray(verts, dtype=np.float64).reshape(-1, 3)
+        loops = np.asarray(loops, dtype=np.int32).ravel()
+        totals = np.asarray(totals, dtype=np.int32).ravel()
+
+        if matids is not None:
+            mats = np.zeros(totals.shape[0], dtype=np.int32)
+            n_mats = min(totals.shape[0], len(matids))
+            mats[:n_mats] = np.asarray(matids, dtype=np.int32).ravel()[:n_mats]
+            matids = mats
+
+        if uvs is not None:
+            uvs = np.asarray(uvs, dtype=np.float64).reshape(-1, 2)[:loops.shape[0]]
+
+        signature = _digest(verts.shape[0], loops, totals, clean, auto_smooth)
+
+        # weld depends on coords, new coincident verts must be merged
+        if not weld and BmeshEdit._update_topology(o, signature, verts, matids, uvs):
+            return
+
+        # input vertex index of each mesh vertex
+        src = np.arange(verts.shape[0], dtype=np.int32)
+        remap = src
+
+        if clean:
+            # remove loose verts
+            used = np.zeros(verts.shape[0], dtype=np.bool_)
+            used[loops] = True
+            if not used.all():
+                remap = np.cumsum(used, dtype=np.int32) - 1
+                remap[~used] = -1
+                src = np.flatnonzero(used).astype(np.int32)
+                verts = verts[used]
+                loops = remap[loops]
+
+        n_verts = verts.shape[0]
+        n_loops = loops.shape[0]
+        n_faces = totals.shape[0]
+
+        BmeshEdit._clear(me)
+
+        # rna use buffer fast path only when dtype match
+        # exactly: float32 for floats, int32 for ints and bools
+        me.vertices.add(n_verts)
+        me.vertices.foreach_set("co", verts.astype(np.float32).ravel())
+        me.loops.add(n_loops)
+        me.loops.foreach_set("vertex_index", loops)
+        me.polygons.add(n_faces)
+        me.polygons.foreach_set("loop_start", np.cumsum(totals, dtype=np.int32) - totals)
+        me.polygons.foreach_set("loop_total", totals)
+
+        if matids is not None:
+            me.polygons.foreach_set("material_index", matids)
+
+        me.polygons.foreach_set("use_smooth", np.full(n_faces, auto_smooth, dtype=np.int32))
+        if auto_smooth:
+            me.use_auto_smooth = True
+
+        me.update(calc_edges=True)
+
+        if uvs is not None and n_loops > 0:
+            if me.uv_layers.active is None:
+                me.uv_textures.new()
+            me.uv_layers.active.data.foreach_set("uv", uvs.astype(np.float32).ravel())
+
+        if weld:
+            bm = bmesh.new()
+            bm.from_mesh(me)
+            targetmap = bmesh.ops.find_doubles(bm, verts=bm.verts, dist=0.001)['targetmap']
+            if len(targetmap) > 0:
+                bmesh.ops.weld_verts(bm, targetmap=targetmap)
+                bm.to_mesh(me)
+            bm.free()
+
+        me.vertices.foreach_set("select", np.ones(len(me.vertices), dtype=np.int32))
+        me.edges.foreach_set("select", np.ones(len(me.edges), dtype=np.int32))
+        me.polygons.foreach_set("select", np.ones(len(me.polygons), dtype=np.int32))
+        me.update()
+
+        # welded topology depends on coords, never reuse it
+        if weld:
+            return
+
+        me[TOPOLOGY_KEY] = signature
+        topology_cache[me.as_pointer()] = MeshTopology(
+            signature, src,
+            len(me.polygons) == n_faces and len(me.loops) == n_loops,
+            _digest(matids), _digest(uvs),
+            len(me.polygons), len(me.loops))
+
+    @staticmethod
+    def _update_topology(o, signature, verts, matids, uvs):
+        """
+            private, fast path of buildmesh_arrays
+            when topology signature match the one of existing mesh,
+            only upload vertex coords and changed matids and uvs
+            return True on success
+        """
+        me = o.data
+        topology = topology_cache.get(me.as_pointer())
+        if (topology is None or
+                topology.signature != signature or
+                me.get(TOPOLOGY_KEY) != signature or
+                len(me.vertices) != topology.src.shape[0] or
+                len(me.polygons) != topology.n_faces or
+                len(me.loops) != topology.n_loops):
+            return False
+
+        co = verts[topology.src]
+
+        mat_hash = _digest(matids)
+        uv_hash = _digest(uvs)
+        update_aspect = topology.matids != mat_hash or topology.uvs != uv_hash
+        if update_aspect and not topology.same_faces:
+            return False
+
+        BmeshEdit.verts(None, o, co)
+
+        if update_aspect:
+            BmeshEdit.aspect(None, o, matids, uvs)
+            topology.matids = mat_hash
+            topology.uvs = uv_hash
+
+        return True
+
     @staticmethod
     def buildmesh(context, o, verts, faces,
             matids=None, uvs=None, weld=False,
@@ -132,42 +374,120 @@ class BmeshEdit():
 
         if temporary:
             bm = bmesh.new()
-        else:
-            bm = BmeshEdit._start(context, o)
-            bm.clear()
 
+            for v in verts:
+                bm.verts.new(v)
+            bm.verts.index_update()
+            bm.verts.ensure_lookup_table()
+
+            for f in faces:
+                bm.faces.new([bm.verts[i] for i in f])
+            bm.faces.index_update()
+            bm.faces.ensure_lookup_table()
+
+            if matids is not None:
+                BmeshEdit._matids(bm, matids)
+
+            if uvs is not None:
+                BmeshEdit._uvs(bm, uvs)
+
+            return bm
+
+        loops, totals, uvs = BmeshEdit._flatten(faces, uvs)
+        BmeshEdit.buildmesh_arrays(context, o, verts, loops, totals,
+            matids=matids, uvs=uvs, weld=weld,
+            clean=clean, auto_smooth=auto_smooth)
+
+    @staticmethod
+    def extend(bm, verts, faces, matids=None, uvs=None):
+        """
+            append geometry to a bmesh
+            does not require nor change edit mode
+        """
+        nv = len(bm.verts)
+        add_vert = bm.verts.new
         for v in verts:
-            bm.verts.new(v)
+            add_vert(v)
         bm.verts.index_update()
         bm.verts.ensure_lookup_table()
 
-        for f in faces:
-            bm.faces.new([bm.verts[i] for i in f])
+        add_face = bm.faces.new
+        new_faces = [add_face([bm.verts[nv + i] for i in f]) for f in faces]
         bm.faces.index_update()
         bm.faces.ensure_lookup_table()
 
         if matids is not None:
-            BmeshEdit._matids(bm, matids)
+            for face, matid in zip(new_faces, matids):
+                face.material_index = matid
 
         if uvs is not None:
-            BmeshEdit._uvs(bm, uvs)
+            layer = bm.loops.layers.uv.verify()
+            for face, uv in zip(new_faces, uvs):
+                for loop, co in zip(face.loops, uv):
+                    loop[layer].uv = co
 
-        if temporary:
+    @staticmethod
+    def extend_arrays(bm, arrays):
+        """
+            append TileArrays to a bmesh in bulk,
+            through a temporary mesh filled using data api
+            does not require nor change edit mode
+            return bm
+        """
+        n_loops = arrays.loops.shape[0]
+        n_faces = arrays.totals.shape[0]
+        if n_faces < 1:
             return bm
 
-        if weld:
-            bmesh.ops.remove_doubles(bm, verts=bm.verts, dist=0.001)
-        BmeshEdit._end(bm, o)
-        bpy.ops.object.mode_set(mode='EDIT')
-        bpy.ops.mesh.select_all(action='SELECT')
-        if auto_smooth:
-            bpy.ops.mesh.faces_shade_smooth()
-            o.data.use_auto_smooth = True
+        totals = arrays.totals.astype(np.int32)
+        me = bpy.data.meshes.new("Temp")
+        me.vertices.add(arrays.verts.shape[0])
+        me.vertices.foreach_set("co", arrays.verts.astype(np.float32).ravel())
+        me.loops.add(n_loops)
+        me.loops.foreach_set("vertex_index", arrays.loops.astype(np.int32))
+        me.polygons.add(n_faces)
+        me.polygons.foreach_set("loop_start", np.cumsum(totals, dtype=np.int32) - totals)
+        me.polygons.foreach_set("loop_total", totals)
+        me.polygons.foreach_set("material_index", arrays.matids.astype(np.int32))
+        me.update(calc_edges=True)
+        me.uv_textures.new()
+        me.uv_layers.active.data.foreach_set("uv", arrays.uvs.astype(np.float32).ravel())
+
+        # from_mesh append to existing bmesh data
+        bm.from_mesh(me)
+        bpy.data.meshes.remove(me)
+
+        bm.verts.index_update()
+        bm.verts.ensure_lookup_table()
+        bm.faces.index_update()
+        bm.faces.ensure_lookup_table()
+        return bm
+
+    @staticmethod
+    def arrays(bm):
+        """
+            Faces of a bmesh as flat arrays, to store in cache
+            return TileArrays holding the whole bmesh as a single tile
+        """
+        bm.verts.index_update()
+        faces = bm.faces[:]
+        layer = bm.loops.layers.uv.active
+        verts = np.array([v.co[:] for v in bm.verts], dtype=np.float64).reshape(-1, 3)
+        loops = np.array([l.vert.index for f in faces for l in f.loops], dtype=np.int32)
+        totals = np.array([len(f.loops) for f in faces], dtype=np.int32)
+        matids = np.array([f.material_index for f in faces], dtype=np.int32)
+        if layer is None:
+            uvs = np.zeros((loops.shape[0], 2), dtype=np.float64)
         else:
-            bpy.ops.mesh.faces_shade_flat()
-        if clean:
-            bpy.ops.mesh.delete_loose()
-        bpy.ops.object.mode_set(mode='OBJECT')
+            uvs = np.array([l[layer].uv[:] for f in faces for l in f.loops], dtype=np.float64).reshape(-1, 2)
+        return TileArrays(verts, loops, totals, matids, uvs, 1)
+
+    @staticmethod
+    def from_arrays(arrays):
+        """
+            Build a temporary bmesh from cached arrays
+        """
+        return BmeshEdit.extend_arrays(bmesh.new(), arrays)
 
     @staticmethod
     def addmesh(context, o, verts, faces, matids=None, uvs=None, weld=False, clean=False, auto_smooth=True):
@@ -248,7 +568,7 @@ class BmeshEdit():
             clamp_overlap=clamp_overlap,
             material=material)
 
-        bm.to_mesh(o.data)
+        BmeshEdit.to_mesh(bm, o.data)
         bm.free()
 
     @staticmethod
@@ -278,7 +598,7 @@ class BmeshEdit():
             clear_inner=clear_inner
             )
 
-        bm.to_mesh(o.data)
+        BmeshEdit.to_mesh(bm, o.data)
         bm.free()
 
     @staticmethod
@@ -292,14 +612,22 @@ class BmeshEdit():
             for v in bm.verts:
                 if not v.select:
                     v.co.z = altitude
-        bm.to_mesh(o.data)
+        BmeshEdit.to_mesh(bm, o.data)
         bm.free()
 
     @staticmethod
     def verts(context, o, verts):
         """
             update vertex position of active object
+            verts: list of coords or (V, 3) array
+            use data api when object is not in edit mode
         """
+        me = o.data
+        if o.mode != 'EDIT' and len(verts) == len(me.vertices):
+            co = np.asarray(verts, dtype=np.float32).reshape(-1, 3)
+            me.vertices.foreach_set("co", co.ravel())
+            me.update()
+            return
         bm = BmeshEdit._start(context, o)
         BmeshEdit._verts(bm, verts)
         BmeshEdit._end(bm, o)
@@ -308,8 +636,29 @@ class BmeshEdit():
     def aspect(context, o, matids, uvs):
         """
             update material id and uvmap of active object
+            matids: list or (F,) array, may be None
+            uvs: list of uvs per face, or flat (L, 2) array, may be None
+            use data api when object is not in edit mode
         """
+        me = o.data
+        if o.mode != 'EDIT':
+            if matids is not None:
+                mats = np.asarray(matids, dtype=np.int32).ravel()
+                if mats.shape[0] == len(me.polygons):
+                    me.polygons.foreach_set("material_index", mats)
+            if uvs is not None and len(me.loops) > 0:
+                if not isinstance(uvs, np.ndarray):
+                    faces = [p.vertices for p in me.polygons]
+                    loops, totals, uvs = BmeshEdit._flatten(faces, uvs)
+                if uvs.shape[0] == len(me.loops):
+                    if me.uv_layers.active is None:
+                        me.uv_textures.new()
+                    me.uv_layers.active.data.foreach_set("uv", np.asarray(uvs, dtype=np.float32).ravel())
+            me.update()
+            return
         bm = BmeshEdit._start(context, o)
-        BmeshEdit._matids(bm, matids)
-        BmeshEdit._uvs(bm, uvs)
+        if matids is not None:
+            BmeshEdit._matids(bm, matids)
+        if uvs is not None:
+            BmeshEdit._uvs(bm, uvs)
         BmeshEdit._end(bm, o)
@@ -0,0 +1,178 @@
+# -*- coding:utf-8 -*-
+
+# ##### BEGIN GPL LICENSE BLOCK #####
+#
+#  This program is free software; you can redistribute it and/or
+#  modify it under the terms of the GNU General Public License
+#  as published by the Free Software Foundation; either version 2
+#  of the License, or (at your option) any later version.
+#
+#  This program is distributed in the hope that it will be useful,
+#  but WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#  GNU General Public License for more details.
+#
+#  You should have received a copy of the GNU General Public License
+#  along with this program; if not, write to the Free Software Foundation,
+#  Inc., 51 Franklin Street, Fifth Floor, Boston, MA 02110- 1301, USA.
+#
+# ##### END GPL LICENSE BLOCK #####
+
+# <pep8 compliant>
+
+# ----------------------------------------------------------
+# Author: Stephen Leger (s-leger)
+#
+# ----------------------------------------------------------
+# Batch 2d polygon predicates
+# Pure numpy, does not depend on bpy nor mathutils
+# ----------------------------------------------------------
+import numpy as np
+
+
+OUTSIDE = 0
+INSIDE = 1
+BOUNDARY = 2
+
+# max number of (item, segment) pairs evaluated at once
+CHUNK_SIZE = 1 << 20
+
+
+def ring_segments(pts):
+    """
+        Closed ring as segments start and end arrays
+        pts: (M, 2) array like of ring points, last point not repeated
+        return a, b (M, 2) arrays
+    """
+    a = np.asarray(pts, dtype=np.float64).reshape(-1, 2)
+    b = np.roll(a, -1, axis=0)
+    return a, b
+
+
+def _chunks(n_items, n_segs):
+    size = max(1, CHUNK_SIZE // max(1, n_segs))
+    for start in range(0, n_items, size):
+        yield start, min(n_items, start + size)
+
+
+def points_inside(pts, a, b):
+    """
+        Even-odd point in polygon test, horizontal ray cast
+        pts: (N, 2) points
+        a, b: (S, 2) polygon segments
+        return (N,) bool array
+    """
+    pts = np.asarray(pts, dtype=np.float64).reshape(-1, 2)
+    res = np.zeros(pts.shape[0], dtype=np.bool_)
+    if a.shape[0] < 3:
+        return res
+    ax, ay = a[:, 0], a[:, 1]
+    bx, by = b[:, 0], b[:, 1]
+    dy = by - ay
+    # avoid division by zero on horizontal segments, never counted anyway
+    dy[dy == 0] = 1e-300
+    ratio = (bx - ax) / dy
+    for i, j in _chunks(pts.shape[0], a.shape[0]):
+        px = pts[i:j, 0:1]
+        py = pts[i:j, 1:2]
+        straddle = (ay > py) != (by > py)
+        x = ax + (py - ay) * ratio
+        res[i:j] = (np.count_nonzero(straddle & (px < x), axis=1) % 2) == 1
+    return res
+
+
+def boxes_crossing(boxes, a, b):
+    """
+        Find boxes crossed by any segment
+        boxes: (N, 4) array of xmin, ymin, xmax, ymax
+        a, b: (S, 2) segments
+        return (N,) bool array
+    """
+    boxes = np.asarray(boxes, dtype=np.float64).reshape(-1, 4)
+    res = np.zeros(boxes.shape[0], dtype=np.bool_)
+    if a.shape[0] < 1:
+        return res
+    sxmin = np.minimum(a[:, 0], b[:, 0])
+    symin = np.minimum(a[:, 1], b[:, 1])
+    sxmax = np.maximum(a[:, 0], b[:, 0])
+    symax = np.maximum(a[:, 1], b[:, 1])
+    vx = b[:, 0] - a[:, 0]
+    vy = b[:, 1] - a[:, 1]
+    c = vx * a[:, 1] - vy * a[:, 0]
+    for i, j in _chunks(boxes.shape[0], a.shape[0]):
+        xmin = boxes[i:j, 0:1]
+        ymin = boxes[i:j, 1:2]
+        xmax = boxes[i:j, 2:3]
+        ymax = boxes[i:j, 3:4]
+        overlap = ((sxmin <= xmax) & (sxmax >= xmin) &
+                   (symin <= ymax) & (symax >= ymin))
+        # side of each box corner relative to segment line
+        s0 = vx * ymin - vy * xmin - c
+        s1 = vx * ymin - vy * xmax - c
+        s2 = vx * ymax - vy * xmax - c
+        s3 = vx * ymax - vy * xmin - c
+        pos = (s0 > 0) & (s1 > 0) & (s2 > 0) & (s3 > 0)
+        neg = (s0 < 0) & (s1 < 0) & (s2 < 0) & (s3 < 0)
+        res[i:j] = np.any(overlap & ~(pos | neg), axis=1)
+    return res
+
+
+def classify_boxes(boxes, centers, boundary, holes=[]):
+    """
+        Classify items against a polygon with holes
+        boxes: (N, 4) items bounding boxes
+        centers: (N, 2) a point of each item, inside its box
+        boundary: (M, 2) boundary ring
+        holes: list of (K, 2) hole rings
+        return (N,) int array of OUTSIDE, INSIDE or BOUNDARY
+    """
+    a, b = ring_segments(boundary)
+    crossing = boxes_crossing(boxes, a, b)
+    inside = points_inside(centers, a, b)
+    for hole in holes:
+        ha, hb = ring_segments(hole)
+        if ha.shape[0] < 3:
+            continue
+        crossing |= boxes_crossing(boxes, ha, hb)
+        inside &= ~points_inside(centers, ha, hb)
+    res = np.full(crossing.shape[0], OUTSIDE, dtype=np.int8)
+    res[inside] = INSIDE
+    res[crossing] = BOUNDARY
+    return res
+
+
+def ring_area(a, b):
+    """
+        Signed area of a ring given as segments, positive when ccw
+    """
+    return 0.5 * float(np.sum(a[:, 0] * b[:, 1] - b[:, 0] * a[:, 1]))
+
+
+def clip_convex(poly, a, b, sign=None):
+    """
+        Clip a polygon by a convex ring, Sutherland-Hodgman
+        poly: (K, 2) polygon points
+        a, b: (S, 2) convex ring segments
+        sign: ring orientation, 1 for ccw, -1 for cw, computed when None
+        return (J, 2) clipped points, J < 3 when polygon is outside
+    """
+    pts = np.asarray(poly, dtype=np.float64).reshape(-1, 2)
+    if sign is None:
+        sign = 1 if ring_area(a, b) >= 0 else -1
+    for p, v in zip(a, b - a):
+        if v[0] == 0 and v[1] == 0:
+            continue
+        d = sign * (v[0] * (pts[:, 1] - p[1]) - v[1] * (pts[:, 0] - p[0]))
+        keep = d >= 0
+        if keep.all():
+            continue
+        if not keep.any():
+            return pts[0:0]
+        nxt = np.roll(pts, -1, axis=0)
+        d1 = np.roll(d, -1)
+        cross = keep != np.roll(keep, -1)
+        t = d / np.where(cross, d - d1, 1)
+        inter = pts + t[:, None] * (nxt - pts)
+        # each point followed by intersection with next edge when any
+        pts = np.stack((pts, inter), axis=1)[np.stack((keep, cross), axis=1)]
+    return pts
@@ -0,0 +1,581 @@
+# -*- coding:utf-8 -*-
+
+# ##### BEGIN GPL LICENSE BLOCK #####
+#
+#  This program is free software; you can redistribute it and/or
+#  modify it under the terms of the GNU General Public License
+#  as published by the Free Software Foundation; either version 2
+#  of the License, or (at your option) any later version.
+#
+#  This program is distributed in the hope that it will be useful,
+#  but WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#  GNU General Public License for more details.
+#
+#  You should have received a copy of the GNU General Public License
+#  along with this program; if not, write to the Free Software Foundation,
+#  Inc., 51 Franklin Street, Fifth Floor, Boston, MA 02110- 1301, USA.
+#
+# ##### END GPL LICENSE BLOCK #####
+
+# <pep8 compliant>
+
+# ----------------------------------------------------------
+# Author: Stephen Leger (s-leger)
+#
+# ----------------------------------------------------------
+# Floor patterns lattice generators
+# Pure numpy, does not depend on bpy nor mathutils
+# d is any object exposing archipack_floor pattern parameters
+# ----------------------------------------------------------
+import numpy as np
+from math import cos, sin, sqrt, pi, radians
+from .roof_tiles import TileArrays
+from .clip2d import OUTSIDE, INSIDE, BOUNDARY
+
+
+# loop order of a quad face, p3 p2 p1 p0
+QUAD_LOOPS = np.array([3, 2, 1, 0], dtype=np.int32)
+QUAD_UVS = np.array([(0, 0), (1, 0), (1, 1), (0, 1)], dtype=np.float64)
+QUAD_UVS_ROTATED = np.array([(0, 0), (0, 1), (1, 1), (1, 0)], dtype=np.float64)
+
+
+class FloorPattern():
+    """
+        Lattice generator for a floor pattern
+        bounds: xmin, ymin, xmax, ymax of area to cover
+        top: top of tiles
+        rng: numpy RandomState
+    """
+    def __init__(self, d, bounds, top, rng):
+        self.d = d
+        self.xmin, self.ymin, self.xmax, self.ymax = bounds
+        self.top = top
+        self.rng = rng
+        # tiles as lists of arrays, concatenated on build
+        self.x = []
+        self.y = []
+        self.w = []
+        self.l = []
+        self.rot = []
+        self.polys = []
+
+    # ---------------------------------------------------
+    # Helpers
+    # ---------------------------------------------------
+
+    @staticmethod
+    def lattice(counts):
+        """
+            row and column index of items for given items count by row
+        """
+        counts = np.maximum(np.asarray(counts, dtype=np.int64), 0)
+        total = int(counts.sum())
+        row = np.repeat(np.arange(counts.shape[0]), counts)
+        col = np.arange(total) - np.repeat(np.cumsum(counts) - counts, counts)
+        return row, col
+
+    @staticmethod
+    def count(start, stop, step):
+        """
+            number of values start + i * step < stop
+        """
+        if step <= 0:
+            raise ValueError("Floor pattern step must be positive")
+        n = np.ceil((np.asarray(stop, dtype=np.float64) - start) / step)
+        return np.maximum(n, 0).astype(np.int64)
+
+    @staticmethod
+    def steps(start, stop, step):
+        """
+            values start + i * step < stop
+        """
+        n = int(FloorPattern.count(start, stop, step))
+        res = start + np.arange(n) * step
+        return res[res < stop]
+
+    def add_planes(self, x, y, w, l, rotate_uv=False):
+        """
+            axis aligned quads
+            x, y, w, l: arrays like or scalars, broadcasted
+        """
+        x, y, w, l = np.broadcast_arrays(
+            np.asarray(x, dtype=np.float64),
+            np.asarray(y, dtype=np.float64),
+            np.asarray(w, dtype=np.float64),
+            np.asarray(l, dtype=np.float64))
+        self.x.append(x.ravel())
+        self.y.append(y.ravel())
+        self.w.append(w.ravel())
+        self.l.append(l.ravel())
+        self.rot.append(np.full(x.size, rotate_uv, dtype=np.bool_))
+
+    def add_faces(self, pts):
+        """
+            quads from (N, 4, 2) array of p0 p1 p2 p3
+        """
+        self.polys.append(np.asarray(pts, dtype=np.float64).reshape(-1, 4, 2))
+
+    def thickness(self, n):
+        d = self.d
+        if d.vary_thickness and d.thickness_variance > 0:
+            v = d.thickness / 100 * d.thickness_variance
+            return self.rng.uniform(self.top, self.top + v, n)
+        return np.full(n, self.top, dtype=np.float64)
+
+    def materials(self, n):
+        d = self.d
+        if d.vary_materials:
+            return self.rng.randint(1, d.matid + 1, n)
+        return np.full(n, d.matid, dtype=np.int32)
+
+    @staticmethod
+    def make_tiles(pts, z, loops, uvs, matids):
+        """
+            one face per tile
+            pts: (N, P, 2) tiles points
+            z: (N,) altitude of each tile
+            loops: (L,) template loop index
+            uvs: (N, L, 2) or (L, 2) uvs
+            matids: (N,)
+        """
+        n_tiles, n_pts = pts.shape[0:2]
+        verts = np.empty((n_tiles, n_pts, 3), dtype=np.float64)
+        verts[:, :, 0:2] = pts
+        verts[:, :, 2] = z[:, None]
+        n_loops = loops.shape[0]
+        uvs = np.broadcast_to(uvs, (n_tiles, n_loops, 2))
+        return TileArrays(
+            verts.reshape(-1, 3),
+            (loops[None, :] + (np.arange(n_tiles, dtype=np.int32) * n_pts)[:, None]).ravel(),
+            np.full(n_tiles, n_loops, dtype=np.int32),
+            np.asarray(matids, dtype=np.int32),
+            np.ascontiguousarray(uvs).reshape(-1, 2),
+            n_tiles
+            )
+
+    def build(self):
+        """
+            Concatenate all quads into TileArrays
+        """
+        pts = []
+        rot = []
+        if len(self.x) > 0:
+            x = np.concatenate(self.x)
+            y = np.concatenate(self.y)
+            x1 = x + np.concatenate(self.w)
+            y1 = y + np.concatenate(self.l)
+            pts.append(np.stack([
+                np.stack([x, y], axis=-1),
+                np.stack([x1, y], axis=-1),
+                np.stack([x1, y1], axis=-1),
+                np.stack([x, y1], axis=-1)
+                ], axis=1))
+            rot.append(np.concatenate(self.rot))
+        for p in self.polys:
+            pts.append(p)
+            rot.append(np.zeros(p.shape[0], dtype=np.bool_))
+        if len(pts) > 0:
+            pts = np.concatenate(pts)
+            rot = np.concatenate(rot)
+        else:
+            pts = np.zeros((0, 4, 2), dtype=np.float64)
+            rot = np.zeros(0, dtype=np.bool_)
+        n = pts.shape[0]
+        uvs = np.where(rot[:, None, None], QUAD_UVS_ROTATED, QUAD_UVS)
+        return self.make_tiles(pts, self.thickness(n), QUAD_LOOPS, uvs, self.materials(n))
+
+    # ---------------------------------------------------
+    # Patterns
+    # ---------------------------------------------------
+
+    def regular_tile(self):
+        """
+         ____  ____  ____
+        |    ||    ||    | Regular tile, rows can be offset, either manually or randomly
+        |____||____||____|
+           ____  ____  ____
+          |    ||    ||    |
+          |____||____||____|
+        """
+        d = self.d
+        sp = d.spacing
+        tw, tl = d.tile_width, d.tile_length
+        o = 1 / (100 / d.offset) if d.offset != 0 else 0
+        y = self.steps(self.ymin, self.ymax, tl + sp)
+        n_rows = y.shape[0]
+        l = np.minimum(tl, self.ymax - y)
+        odd = (np.arange(n_rows) % 2) == 1
+
+        # first tile of each row
+        if d.random_offset:
+            v = tw * d.offset_variance * 0.0049
+            w0 = (tw / 2) + self.rng.uniform(-v, v, n_rows)
+        else:
+            w0 = np.where(odd, tw * o, tw)
+        if self.xmin + tw > self.xmax:
+            w0[:] = self.xmax - self.xmin
+        self.add_planes(self.xmin, y, w0, l)
+
+        # following tiles
+        x1 = self.xmin + w0 + sp
+        row, col = self.lattice(self.count(x1, self.xmax, tw + sp))
+        x = x1[row] + col * (tw + sp)
+        self.add_planes(x, y[row], np.minimum(tw, self.xmax - x), l[row])
+
+    def hopscotch(self):
+        """
+         ____  _  Large tile, plus small one on top right corner
+        |    ||_|
+        |____| ____  _  But shifted up so next large one is right below previous small one
+              |    ||_|
+              |____|
+        """
+        d = self.d
+        sp = d.spacing
+        tw = d.tile_width
+        tl = d.tile_length
+        s_tw = (tw - sp) / 2  # small tile width
+        s_tl = (tl - sp) / 2  # small tile length
+
+        # rows start
+        rows = []
+        row = 0
+        y = self.ymin - s_tl
+        while y < self.ymax + s_tl or (row == 2 and y - sp < self.ymax):
+            rows.append((row, y))
+            if row == 0 or row == 2:
+                y += tl + sp
+            else:
+                y += s_tl + sp
+            row = (row + 1) % 3
+
+        # rows 0 and 1, pairs of large + small, stepping back and forth
+        pair = [(y, self.xmin + (s_tw + sp if r == 1 else 0)) for r, y in rows if r < 2]
+        if len(pair) > 0:
+            y0, x0 = np.array(pair, dtype=np.float64).T
+            step = 2 * tw + s_tw + 3 * sp
+            back = tw + sp
+            # each step of 2 tiles: start then stepped back one
+            n = self.count(x0, self.xmax, step)
+            n_back = self.count(x0 + back, self.xmax, step)
+            row, col = self.lattice(n)
+            x = x0[row] + col * step
+            y = y0[row]
+            row, col = self.lattice(n_back)
+            x = np.concatenate((x, x0[row] + col * step + back))
+            y = np.concatenate((y, y0[row] - s_tl - sp))
+            # adjust for if there is a need to cut off the bottom of the tile
+            l = np.where(y < self.ymin - s_tl, tl + y - self.ymin, tl)
+            self.add_planes(x, y, tw, l)
+            self.add_planes(x + tw + sp, y + s_tl + sp, s_tw, s_tl)
+
+        # row 2, half width large one at start
+        y0 = np.array([y for r, y in rows if r == 2], dtype=np.float64)
+        if y0.shape[0] > 0 and self.xmin < self.xmax:
+            x = self.xmin
+            self.add_planes(x, y0, s_tw, tl)
+            self.add_planes(x + s_tw + sp, y0 + s_tl + sp, s_tw, s_tl)
+            self.add_planes(x, y0 - sp - s_tl, s_tw, s_tl)
+            x1 = self.xmin + (2 * s_tw) + tw + (3 * sp)
+            step = (2 * tw) + (3 * sp) + s_tw
+            x = self.steps(x1, self.xmax, step)
+            x, y = np.meshgrid(x, y0)
+            self.add_planes(x, y, tw, tl)
+            self.add_planes(x + tw + sp, y + s_tl + sp, s_tw, s_tl)
+
+    def stepping_stone(self):
+        """
+         ____  __  ____
+        |    ||__||    | Row of large one, then two small ones stacked beside it
+        |    | __ |    |
+        |____||__||____|
+         __  __  __  __
+        |__||__||__||__| Row of smalls
+        """
+        d = self.d
+        sp = d.spacing
+        tw = d.tile_width
+        tl = d.tile_length
+        s_tw = (tw - sp) / 2
+        s_tl = (tl - sp) / 2
+
+        # rows of large then rows of small ones
+        y = self.steps(self.ymin, self.ymax, tl + s_tl + 2 * sp)
+        y_small = y + tl + sp
+        y_small = y_small[y_small < self.ymax]
+
+        x, yy = np.meshgrid(self.steps(self.xmin, self.xmax, tw + s_tw + 2 * sp), y)
+        self.add_planes(x, yy, tw, tl)
+        self.add_planes(x + tw + sp, yy, s_tw, s_tl)
+        self.add_planes(x + tw + sp, yy + s_tl + sp, s_tw, s_tl)
+
+        x, yy = np.meshgrid(self.steps(self.xmin, self.xmax, tw + sp), y_small)
+        self.add_planes(x, yy, s_tw, s_tl)
+        self.add_planes(x + s_tw + sp, yy, s_tw, s_tl)
+
+    def hexagon(self):
+        """
+          __  Hexagon tiles
+        /   \\
+        \\___/
+        """
+        d = self.d
+        sp = d.spacing
+        width = d.tile_width
+        dia = (width / 2) / cos(radians(30))
+        # center of one row to next row
+        vertical_spacing = dia * (1 + sin(radians(30))) + (sp * sin(radians(60)))
+        da = pi / 3
+        base_points = np.array([(sin(i * da), cos(i * da)) for i in range(6)], dtype=np.float64)
+
+        # place tile as long as bottom is still within bounds
+        y = self.steps(self.ymin, self.ymax + width / 2, vertical_spacing)
+        x0 = np.where((np.arange(y.shape[0]) % 2) == 1, self.xmin + width / 2, self.xmin - sp / 2)
+        # place tile as long as left is still within bounds
+        row, col = self.lattice(self.count(x0, self.xmax + width / 2, width + sp))
+        center = np.stack([x0[row] + col * (width + sp), y[row]], axis=-1)
+        n = center.shape[0]
+        pts = dia * base_points[None, :, :] + center[:, None, :]
+        return self.make_tiles(
+            pts, self.thickness(n),
+            np.arange(6, dtype=np.int32),
+            base_points,
+            self.materials(n))
+
+    def windmill(self):
+        """
+         __  ____
+        |  ||____| This also has a square one in the middle, totaling 5 tiles per pattern
+        |__|   __
+         ____ |  |
+        |____||__|
+        """
+        d = self.d
+        sp = d.spacing
+        tw = d.tile_width
+        tl = d.tile_length
+        s_tw = (tw - sp) / 2
+        s_tl = (tl - sp) / 2
+        x, y = np.meshgrid(
+            self.steps(self.xmin, self.xmax, tw + s_tw + (2 * sp)),
+            self.steps(self.ymin, self.ymax, tl + s_tl + (2 * sp)))
+        self.add_planes(x, y, tw, s_tl)  # bottom
+        self.add_planes(x + tw + sp, y, s_tw, tl, rotate_uv=True)  # right
+        self.add_planes(x + s_tw + sp, y + tl + sp, tw, s_tl)  # top
+        self.add_planes(x, y + s_tl + sp, s_tw, tl, rotate_uv=True)  # left
+        self.add_planes(x + s_tw + sp, y + s_tl + sp, s_tw, s_tl)  # center
+
+    def boards(self):
+        """
+        ||| Typical wood boards
+        |||
+        """
+        d = self.d
+        rng = self.rng
+        bw, bl = d.board_width, d.board_length
+        o = 1 / (100 / d.offset) if d.offset != 0 else 0
+
+        # columns
+        if d.vary_width:
+            v = bw * (d.width_variance / 100) * 0.99
+        else:
+            v = 0
+        n_cols = int(self.count(self.xmin, self.xmax, bw - v + d.width_spacing)) + 1
+        bw2 = np.full(n_cols, bw, dtype=np.float64)
+        if d.vary_width:
+            bw2 += rng.uniform(-v, v, n_cols)
+        x = self.xmin + np.concatenate(([0], np.cumsum(bw2 + d.width_spacing)[:-1]))
+        valid = x < self.xmax
+        x, bw2 = x[valid], bw2[valid]
+        bw2 = np.where(bw2 + x > self.xmax, self.xmax - x, bw2)
+        n_cols = x.shape[0]
+        odd = (np.arange(n_cols) % 2) == 1
+
+        # boards length, (n_cols, n_boards)
+        if d.vary_length:
+            v = bl * (d.length_variance / 100) * 0.99
+            n_boards = min(d.max_boards, int(self.count(self.ymin, self.ymax, bl - v + d.length_spacing)) + 1)
+            bl2 = bl + rng.uniform(-v, v, (n_cols, n_boards))
+        else:
+            n_boards = int(self.count(self.ymin, self.ymax, bl + d.length_spacing)) + 2
+            bl2 = np.full((n_cols, n_boards), bl, dtype=np.float64)
+            if d.random_offset:
+                v = bl * d.offset_variance * 0.0049
+                bl2[:, 0] = (bl / 2) + rng.uniform(-v, v, n_cols)
+            else:
+                bl2[odd, 0] = bl * o
+
+        y = self.ymin + np.zeros_like(bl2)
+        y[:, 1:] += np.cumsum(bl2 + d.length_spacing, axis=1)[:, :-1]
+        valid = y < self.ymax
+        clip = y + bl2 > self.ymax
+        if d.vary_length:
+            clip[:, d.max_boards - 1:] = True
+        bl2 = np.where(clip, self.ymax - y, bl2)
+        xx = np.broadcast_to(x[:, None], y.shape)
+        ww = np.broadcast_to(bw2[:, None], y.shape)
+        self.add_planes(xx[valid], y[valid], ww[valid], bl2[valid], rotate_uv=True)
+
+    def square_parquet(self):
+        """
+        ||--||-- Alternating groups oriented either horizontally, or forwards and backwards.
+        ||--||-- self.spacing is used because it is the same spacing for width and length
+        --||--|| Board width is calculated using number of boards and the length.
+        --||--||
+        """
+        d = self.d
+        sp = d.spacing
+        n = d.boards_in_group
+        # figure board width
+        bl = d.short_board_length
+        bw = (bl - (n - 1) * sp) / n
+        x, y = np.meshgrid(
+            self.steps(self.xmin, self.xmax, bl + sp),
+            self.steps(self.ymin, self.ymax, bl + sp))
+        col = np.arange(x.shape[1])[None, :]
+        row = np.arange(x.shape[0])[:, None]
+        orient_length = np.broadcast_to(((col + row) % 2) == 0, x.shape)
+        x0, y0 = x[orient_length], y[orient_length]
+        x1, y1 = x[~orient_length], y[~orient_length]
+        i = np.arange(n) * (bw + sp)
+        # boards side by side
+        x0 = x0[:, None] + i[None, :]
+        y0 = np.broadcast_to(y0[:, None], x0.shape)
+        valid = x0 < self.xmax
+        self.add_planes(x0[valid], y0[valid], bw, bl, rotate_uv=True)
+        # boards stacked
+        y1 = y1[:, None] + i[None, :]
+        x1 = np.broadcast_to(x1[:, None], y1.shape)
+        valid = y1 < self.ymax
+        self.add_planes(x1[valid], y1[valid], bl, bw)
+
+    def herringbone(self):
+        """
+        Boards are at 45 degree angle, in chevron pattern, ends are angled
+        """
+        d = self.d
+        width_dif = d.board_width / cos(radians(45))
+        x_dif = d.short_board_length * cos(radians(45))
+        y_dif = d.short_board_length * sin(radians(45))
+        total_y_dif = width_dif + y_dif
+        sp_dif = d.spacing / cos(radians(45))
+        x, y = np.meshgrid(
+            self.steps(self.xmin, self.xmax, x_dif + d.spacing),
+            self.steps(self.ymin - y_dif, self.ymax, width_dif + sp_dif))
+        left = (np.arange(x.shape[1]) % 2 == 0)[None, :]
+        left = np.broadcast_to(left, x.shape)
+        # left side
+        xl, yl = x[left], y[left]
+        self.add_faces(np.stack([
+            np.stack([xl, yl], axis=-1),
+            np.stack([xl + x_dif, yl + y_dif], axis=-1),
+            np.stack([xl + x_dif, yl + total_y_dif], axis=-1),
+            np.stack([xl, yl + width_dif], axis=-1)
+            ], axis=1))
+        # right side
+        xr, yr = x[~left], y[~left]
+        self.add_faces(np.stack([
+            np.stack([xr, yr + y_dif], axis=-1),
+            np.stack([xr + x_dif, yr], axis=-1),
+            np.stack([xr + x_dif, yr + width_dif], axis=-1),
+            np.stack([xr, yr + total_y_dif], axis=-1)
+            ], axis=1))
+
+    def herringbone_parquet(self):
+        """
+        Boards are at 45 degree angle, in chevron pattern, ends are square, not angled
+        """
+        d = self.d
+        an_45 = 0.5 * sqrt(2)
+        x_dif = d.short_board_length * an_45
+        y_dif = d.short_board_length * an_45
+        y_dif_45 = d.board_width * an_45
+        x_dif_45 = d.board_width * an_45
+        total_y_dif = y_dif + y_dif_45
+        # divide by two since it is used for both x and y
+        sp_dif = (d.spacing / an_45) / 2
+        width_dif = d.board_width / an_45
+
+        # continue as long as bottom left corner is still good
+        y = self.steps(self.ymin - y_dif, self.ymax + y_dif_45, width_dif + (2 * sp_dif))
+        # left boards start, right ones start
+        step = 2 * x_dif + 2 * sp_dif
+        back = x_dif - x_dif_45 + sp_dif
+        # continue as long as top left corner is still good
+        n_left = int(self.count(self.xmin, self.xmax + x_dif_45, step))
+        xl = self.xmin + np.arange(n_left) * step
+        xr = xl + back
+        # stop after the first right board out of bounds
+        right = xr < self.xmax
+        if not right.all():
+            last = int(np.argmin(right))
+            xl = xl[:last + 1]
+            xr = xr[:last]
+        xl, yl = np.meshgrid(xl, y)
+        xl, yl = xl.ravel(), yl.ravel()
+        self.add_faces(np.stack([
+            np.stack([xl, yl], axis=-1),
+            np.stack([xl + x_dif, yl + y_dif], axis=-1),
+            np.stack([xl + x_dif - x_dif_45, yl + total_y_dif], axis=-1),
+            np.stack([xl - x_dif_45, yl + y_dif_45], axis=-1)
+            ], axis=1))
+        xr, y0 = np.meshgrid(xr, y + y_dif - y_dif_45 - sp_dif)
+        xr, y0 = xr.ravel(), y0.ravel()
+        self.add_faces(np.stack([
+            np.stack([xr, y0], axis=-1),
+            np.stack([xr + x_dif, y0 - y_dif], axis=-1),
+            np.stack([xr + x_dif + x_dif_45, y0 - y_dif + y_dif_45], axis=-1),
+            np.stack([xr + x_dif_45, y0 + y_dif_45], axis=-1)
+            ], axis=1))
+
+
+def generate_pattern(d, bounds, top, seed=None):
+    """
+        Generate floor pattern tiles covering bounds
+        d: pattern parameters
+        bounds: xmin, ymin, xmax, ymax
+        top: top of tiles
+        seed: random seed for offset, thickness and material variations
+        return TileArrays
+    """
+    p = FloorPattern(d, bounds, top, np.random.RandomState(seed))
+    xmin, ymin, xmax, ymax = bounds
+    if xmax <= xmin or ymax <= ymin:
+        return p.build()
+    if d.pattern == "hexagon":
+        return p.hexagon()
+    generator = getattr(p, d.pattern, None)
+    if generator is not None:
+        generator()
+    return p.build()
+
+
+def clip_pattern(d, bounds, top, seed, boundary, holes, convex):
+    """
+        Generate floor pattern tiles and pre-clip them in 2d, so only
+        tiles crossing boundary or holes go through bissect,
+        fully inside ones are kept as is.
+        boundary: 2d ring, None when boundary has curved parts
+        holes: list of 2d rings
+        convex: boundary is convex
+        return tiles to bissect, inside TileArrays or None,
+        clipped TileArrays or None
+    """
+    tiles = generate_pattern(d, bounds, top, seed=seed)
+    inside, clipped = None, None
+    if boundary is not None and None not in holes:
+        state = tiles.classify(boundary, holes)
+        inside = tiles.select(state == INSIDE)
+        tiles = tiles.select(state == BOUNDARY)
+        if convex:
+            # tiles clear of holes are clipped by convex boundary
+            cut = np.zeros(tiles.n_tiles, dtype=np.bool_)
+            keep = np.ones(tiles.n_tiles, dtype=np.bool_)
+            for hole in holes:
+                state = tiles.classify(hole)
+                cut |= state == BOUNDARY
+                keep &= state == OUTSIDE
+            clipped = tiles.select(keep & ~cut).clip(boundary)
+            tiles = tiles.select(cut)
+    return tiles, inside, clipped
@@ -0,0 +1,240 @@
+# -*- coding:utf-8 -*-
+
+# ##### BEGIN GPL LICENSE BLOCK #####
+#
+#  This program is free software; you can redistribute it and/or
+#  modify it under the terms of the GNU General Public License
+#  as published by the Free Software Foundation; either version 2
+#  of the License, or (at your option) any later version.
+#
+#  This program is distributed in the hope that it will be useful,
+#  but WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#  GNU General Public License for more details.
+#
+#  You should have received a copy of the GNU General Public License
+#  along with this program; if not, write to the Free Software Foundation,
+#  Inc., 51 Franklin Street, Fifth Floor, Boston, MA 02110- 1301, USA.
+#
+# ##### END GPL LICENSE BLOCK #####
+
+# <pep8 compliant>
+
+# ----------------------------------------------------------
+# Author: Stephen Leger (s-leger)
+#
+# ----------------------------------------------------------
+# Content addressed cache for generated geometry
+# Keys are digests of all generator inputs, values are
+# roof_tiles.TileArrays, kept in memory with LRU eviction
+# and optionally stored on disk as .npz files
+# Does not depend on bpy
+# ----------------------------------------------------------
+import os
+import struct
+import numpy as np
+from collections import OrderedDict
+from hashlib import sha1
+from .roof_tiles import TileArrays
+
+
+# bump to invalidate disk store when generators change
+CACHE_VERSION = 1
+
+
+def _feed(h, value):
+    """
+        Feed a digest with a value, recursing into sequences
+    """
+    if isinstance(value, np.ndarray):
+        h.update(b'a')
+        h.update(str(value.dtype).encode())
+        h.update(str(value.shape).encode())
+        h.update(np.ascontiguousarray(value).tobytes())
+    elif isinstance(value, bool):
+        h.update(b'T' if value else b'F')
+    elif isinstance(value, float):
+        h.update(b'f' + struct.pack('<d', value))
+    elif isinstance(value, int):
+        h.update(b'i' + str(value).encode())
+    elif isinstance(value, str):
+        h.update(b's' + value.encode())
+        h.update(b'\x00')
+    elif isinstance(value, dict):
+        h.update(b'{')
+        for k in sorted(value.keys()):
+            _feed(h, k)
+            _feed(h, value[k])
+        h.update(b'}')
+    elif value is None:
+        h.update(b'N')
+    else:
+        try:
+            items = iter(value)
+        except TypeError:
+            h.update(b'r' + repr(value).encode())
+            return
+        # lists, tuples, Vector, Matrix, bpy_prop_array
+        h.update(b'[')
+        for item in items:
+            _feed(h, item)
+        h.update(b']')
+
+
+def digest(*inputs):
+    """
+        Hex digest of generator inputs
+    """
+    h = sha1()
+    _feed(h, CACHE_VERSION)
+    for value in inputs:
+        _feed(h, value)
+    return h.hexdigest()
+
+
+# ui and manipulators state, not generator inputs
+STATE_PROPERTIES = {
+    'rna_type',
+    'auto_update',
+    'manipulable_refresh',
+    'manipulable_selectable',
+    'manipulable_drag',
+    'manipulable_proxy',
+    'manipulable_proxy_refresh',
+    'manipulate_mode',
+    'select_mode',
+    'proxy_level'
+    }
+
+
+def properties(d, exclude=set()):
+    """
+        Values of a datablock properties as a dict
+        skip pointers and collections, which must be
+        part of the key in an explicit way, ui
+        panels expand state and manipulators state
+    """
+    res = {}
+    for prop in d.bl_rna.properties:
+        key = prop.identifier
+        if (key in STATE_PROPERTIES or key in exclude or key.endswith("_expand") or
+                prop.type in {'POINTER', 'COLLECTION'}):
+            continue
+        value = getattr(d, key)
+        if getattr(prop, "is_array", False):
+            value = tuple(value)
+        res[key] = value
+    return res
+
+
+def segments(segs):
+    """
+        Segments as tuple of coords, type when available
+    """
+    return [(tuple(s.p0), tuple(s.p1), getattr(s, "type", None)) for s in segs]
+
+
+class GeometryCache():
+    """
+        LRU cache of generated geometry
+        max_items: max items kept in memory
+        max_bytes: max size of arrays kept in memory
+        path: folder of disk store, disabled when empty
+    """
+    def __init__(self, max_items=64, max_bytes=256 * 1024 * 1024, path=""):
+        self.items = OrderedDict()
+        self.max_items = max_items
+        self.max_bytes = max_bytes
+        self.path = path
+        # size of arrays kept in memory
+        self.nbytes = 0
+        self.hits = 0
+        self.misses = 0
+
+    def setup(self, max_items, max_bytes, path):
+        self.max_items = max_items
+        self.max_bytes = max_bytes
+        self.path = path
+        self.evict()
+
+    def evict(self):
+        while len(self.items) > 0 and (
+                len(self.items) > max(0, self.max_items) or
+                self.nbytes > max(0, self.max_bytes)):
+            key, value = self.items.popitem(last=False)
+            self.nbytes -= value.nbytes
+
+    def clear(self):
+        self.items.clear()
+        self.nbytes = 0
+
+    def _store(self, key, value):
+        last = self.items.pop(key, None)
+        if last is not None:
+            self.nbytes -= last.nbytes
+        self.items[key] = value
+        self.nbytes += value.nbytes
+        self.evict()
+
+    def _file(self, key):
+        return os.path.join(self.path, "archipack_{}.npz".format(key))
+
+    def _load(self, key):
+        if not self.path:
+            return None
+        filename = self._file(key)
+        if not os.path.isfile(filename):
+            return None
+        try:
+            with np.load(filename) as data:
+                return TileArrays(
+                    data['verts'],
+                    data['loops'],
+                    data['totals'],
+                    data['matids'],
+                    data['uvs'],
+                    int(data['n_tiles'])
+                    )
+        except Exception as ex:
+            print("GeometryCache._load(%s) failed: %s" % (filename, ex))
+            return None
+
+    def _save(self, key, value):
+        if not self.path or not os.path.isdir(self.path):
+            return
+        try:
+            np.savez(self._file(key),
+                verts=value.verts,
+                loops=value.loops,
+                totals=value.totals,
+                matids=value.matids,
+                uvs=value.uvs,
+                n_tiles=value.n_tiles)
+        except Exception as ex:
+            print("GeometryCache._save(%s) failed: %s" % (key, ex))
+
+    def get(self, key):
+        """
+            Return cached TileArrays or None
+        """
+        value = self.items.get(key)
+        if value is None:
+            value = self._load(key)
+            if value is None:
+                self.misses += 1
+                return None
+            self._store(key, value)
+        else:
+            self.items.move_to_end(key)
+        self.hits += 1
+        return value
+
+    def set(self, key, value):
+        """
+            Store TileArrays for key
+        """
+        self._store(key, value)
+        self._save(key, value)
+
+
+geometry_cache = GeometryCache()
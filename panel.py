@@ -25,10 +25,40 @@
 #
 # ----------------------------------------------------------
 
+import numpy as np
+from itertools import chain
 from math import cos, sin, tan, sqrt, atan2, pi
 from mathutils import Vector
 
 
+# (closed_shape, closed_path, n_pts, n_path_faces): faces template
+_loft_faces = {}
+
+
+def loft_faces(closed_shape, closed_path, n_pts, n_path_faces):
+    """
+        Quad faces between path sections, relative to first vertex
+        cached as topology only depends on args
+        return (F, 4) int array
+    """
+    key = (closed_shape, closed_path, n_pts, n_path_faces)
+    faces = _loft_faces.get(key)
+    if faces is None:
+        if closed_shape:
+            n_cols = n_pts
+        else:
+            n_cols = n_pts - 1
+        k0 = np.arange(n_path_faces, dtype=np.int64)[:, None] * n_pts
+        k1 = k0 + n_pts
+        if closed_path and n_path_faces > 0:
+            k1[-1] = 0
+        j0 = np.arange(n_cols, dtype=np.int64)[None, :]
+        j1 = (j0 + 1) % n_pts
+        faces = np.stack(np.broadcast_arrays(k1 + j0, k1 + j1, k0 + j1, k0 + j0), axis=-1).reshape(-1, 4)
+        _loft_faces[key] = faces
+    return faces
+
+
 class Panel():
     """
         Define a bevel profil
@@ -556,10 +586,12 @@ class Panel():
     # Vertices
     ############################
 
-    def vertices(self, steps, offset, center, origin, size, radius,
+    def vertices_array(self, steps, offset, center, origin, size, radius,
             angle_y, pivot, shape_z=None, path_type='ROUND', axis='XZ'):
-
-        verts = []
+        """
+            Loft profil along path
+            return (V, 3) array of vertices
+        """
         if shape_z is None:
             shape_z = [0 for x in self.x]
         if path_type == 'ROUND':
@@ -583,21 +615,31 @@ class Panel():
         else:
             coords = [self._get_rectangular_coords(offset, size, x, pivot, shape_z[i])
                 for i, x in enumerate(self.x)]
+
+        n_path_verts = len(coords[0])
+        if n_path_verts < 1 or axis not in {'XZ', 'XY'}:
+            return np.zeros((0, 3), dtype=np.float64)
+
+        # sections (S, P, 2) path coords of each profil point
+        sections = np.array([c[:n_path_verts] for c in coords], dtype=np.float64)[self.index]
+        sections = sections.transpose(1, 0, 2)
+        co = np.empty((n_path_verts, len(self.index), 3), dtype=np.float64)
+        co[:, :, 0] = sections[:, :, 0]
         # vertical panel (as for windows)
         if axis == 'XZ':
-            for i in range(len(coords[0])):
-                for j, p in enumerate(self.index):
-                    x, z = coords[p][i]
-                    y = self.y[j]
-                    verts.append((x, y, z))
+            co[:, :, 1] = self.y
+            co[:, :, 2] = sections[:, :, 1]
         # horizontal panel (table and so on)
-        elif axis == 'XY':
-            for i in range(len(coords[0])):
-                for j, p in enumerate(self.index):
-                    x, y = coords[p][i]
-                    z = self.y[j]
-                    verts.append((x, y, z))
-        return verts
+        else:
+            co[:, :, 1] = sections[:, :, 1]
+            co[:, :, 2] = self.y
+        return co.reshape(-1, 3)
+
+    def vertices(self, steps, offset, center, origin, size, radius,
+            angle_y, pivot, shape_z=None, path_type='ROUND', axis='XZ'):
+        co = self.vertices_array(steps, offset, center, origin, size, radius,
+            angle_y, pivot, shape_z=shape_z, path_type=path_type, axis=axis)
+        return list(map(tuple, co.tolist()))
 
     ############################
     # Faces
@@ -609,33 +651,9 @@ class Panel():
             faces.append(tuple([offset + i for i in range(self.n_pts)]))
             faces.append(tuple([last_point - i for i in range(self.n_pts)]))
 
-    def _faces_closed(self, n_path_faces, offset):
-        faces = []
-        n_pts = self.n_pts
-        for i in range(n_path_faces):
-            k0 = offset + i * n_pts
-            if self.closed_path and i == n_path_faces - 1:
-                k1 = offset
-            else:
-                k1 = k0 + n_pts
-            for j in range(n_pts - 1):
-                faces.append((k1 + j, k1 + j + 1, k0 + j + 1, k0 + j))
-            # close profile
-            faces.append((k1 + n_pts - 1, k1, k0, k0 + n_pts - 1))
-        return faces
-
-    def _faces_open(self, n_path_faces, offset):
-        faces = []
-        n_pts = self.n_pts
-        for i in range(n_path_faces):
-            k0 = offset + i * n_pts
-            if self.closed_path and i == n_path_faces - 1:
-                k1 = offset
-            else:
-                k1 = k0 + n_pts
-            for j in range(n_pts - 1):
-                faces.append((k1 + j, k1 + j + 1, k0 + j + 1, k0 + j))
-        return faces
+    def _faces_loft(self, n_path_faces, offset):
+        faces = loft_faces(self.closed_shape, self.closed_path, self.n_pts, n_path_faces)
+        return list(map(tuple, (faces + offset).tolist()))
 
     def _faces_side(self, faces, n_path_verts, start, reverse, offset):
         n_pts = self.n_pts
@@ -645,12 +663,11 @@ class Panel():
         else:
             faces.append(tuple(vf))
 
-    def faces(self, steps, offset=0, path_type='ROUND'):
-        n_path_verts, n_path_faces = self.path_sections(steps, path_type)
-        if self.closed_shape:
-            faces = self._faces_closed(n_path_faces, offset)
-        else:
-            faces = self._faces_open(n_path_faces, offset)
+    def faces_caps(self, n_path_verts, offset=0):
+        """
+            Side caps and end caps faces, following loft faces
+        """
+        faces = []
         if self.side_cap_front > -1:
             self._faces_side(faces, n_path_verts, self.side_cap_front, False, offset)
         if self.side_cap_back > -1:
@@ -658,13 +675,20 @@ class Panel():
         self._faces_cap(faces, n_path_verts, offset)
         return faces
 
+    def faces(self, steps, offset=0, path_type='ROUND'):
+        n_path_verts, n_path_faces = self.path_sections(steps, path_type)
+        faces = self._faces_loft(n_path_faces, offset)
+        faces.extend(self.faces_caps(n_path_verts, offset))
+        return faces
+
     ############################
     # Uvmaps
     ############################
 
-    def uv(self, steps, center, origin, size, radius, angle_y, pivot, x, x_cap, path_type='ROUND'):
-        uvs = []
-        n_path_verts, n_path_faces = self.path_sections(steps, path_type)
+    def _uv_v(self, steps, center, origin, size, radius, angle_y, pivot, x, path_type):
+        """
+            v size of each loft section
+        """
         if path_type in ['ROUND', 'ELLIPSIS']:
             x_left = size.x / 2 * (pivot - 1) + x
             x_right = size.x / 2 * (pivot + 1) - x
@@ -703,21 +727,41 @@ class Panel():
             for i in range(self.subdiv_x + 1):
                 uv_v.append(dx * (i + 1))
             # uv_v = [size.y, size.x, size.y, size.x]
+        return uv_v
 
-        uv_u = self.uv_u
+    def uv_loft_array(self, steps, center, origin, size, radius, angle_y, pivot, x, path_type='ROUND'):
+        """
+            uvs of loft faces
+            return (F, 4, 2) array
+        """
+        n_path_verts, n_path_faces = self.path_sections(steps, path_type)
+        uv_v = self._uv_v(steps, center, origin, size, radius, angle_y, pivot, x, path_type)
+        uv_u = np.array(self.uv_u, dtype=np.float64)
         if self.closed_shape:
             n_pts = self.n_pts
         else:
             n_pts = self.n_pts - 1
-        v0 = 0
         # uvs parties rondes
-        for i in range(n_path_faces):
-            v1 = v0 + uv_v[i]
-            for j in range(n_pts):
-                u0 = uv_u[j]
-                u1 = uv_u[j + 1]
-                uvs.append([(u0, v1), (u1, v1), (u1, v0), (u0, v0)])
-            v0 = v1
+        v = np.zeros(n_path_faces + 1, dtype=np.float64)
+        v[1:] = np.cumsum(uv_v[:n_path_faces])
+        u0, u1 = uv_u[None, :n_pts], uv_u[None, 1:n_pts + 1]
+        v0, v1 = v[:-1, None], v[1:, None]
+        quads = np.empty((n_path_faces, n_pts, 4, 2), dtype=np.float64)
+        quads[:, :, 0, 0] = u0
+        quads[:, :, 0, 1] = v1
+        quads[:, :, 1, 0] = u1
+        quads[:, :, 1, 1] = v1
+        quads[:, :, 2, 0] = u1
+        quads[:, :, 2, 1] = v0
+        quads[:, :, 3, 0] = u0
+        quads[:, :, 3, 1] = v0
+        return quads.reshape(-1, 4, 2)
+
+    def uv_caps(self, steps, center, origin, size, radius, pivot, x_cap, path_type='ROUND'):
+        """
+            uvs of side caps and end caps faces
+        """
+        uvs = []
         if self.side_cap_back > -1 or self.side_cap_front > -1:
             if path_type == 'ROUND':
                 # rectangle with top part round
@@ -747,6 +791,12 @@ class Panel():
             uvs.append(list(reversed(coords)))
         return uvs
 
+    def uv(self, steps, center, origin, size, radius, angle_y, pivot, x, x_cap, path_type='ROUND'):
+        uvs = self.uv_loft_array(steps, center, origin, size, radius, angle_y, pivot, x,
+            path_type=path_type).tolist()
+        uvs.extend(self.uv_caps(steps, center, origin, size, radius, pivot, x_cap, path_type=path_type))
+        return uvs
+
     ############################
     # Material indexes
     ############################
@@ -754,10 +804,7 @@ class Panel():
     def mat(self, steps, cap_front_id, cap_back_id, path_type='ROUND'):
         n_path_verts, n_path_faces = self.path_sections(steps, path_type)
         n_profil_faces = self.profil_faces
-        idmat = []
-        for i in range(n_path_faces):
-            for f in range(n_profil_faces):
-                idmat.append(self.idmat[f])
+        idmat = list(self.idmat[:n_profil_faces]) * n_path_faces
         if self.side_cap_front > -1:
             idmat.append(cap_front_id)
         if self.side_cap_back > -1:
@@ -766,3 +813,86 @@ class Panel():
             idmat.append(self.idmat[0])
             idmat.append(self.idmat[0])
         return idmat
+
+
+class PanelMesh():
+    """
+        Build context of a mesh made of panels
+        accumulate vertices, faces, material indexes and uvs
+        of each panel as flat arrays in a single pass, so panels
+        and shape params are computed once by update
+        steps: curve steps
+        Use as bmed.buildmesh_arrays(context, o, *mesh.arrays())
+    """
+    def __init__(self, steps):
+        self.steps = steps
+        self.n_verts = 0
+        self.verts = []
+        self.loops = []
+        self.totals = []
+        self.matids = []
+        self.uvs = []
+
+    def _add_faces(self, faces, uvs):
+        """
+            faces and uvs lists of polygons
+        """
+        if len(faces) < 1:
+            return
+        self.loops.append(np.fromiter(chain.from_iterable(faces), dtype=np.int32))
+        self.totals.append(np.array([len(f) for f in faces], dtype=np.int32))
+        self.uvs.append(np.array(
+            [tuple(co[0:2]) for f, uv in zip(faces, uvs) for co in uv[:len(f)]],
+            dtype=np.float64).reshape(-1, 2))
+
+    def add_panel(self, panel, path_type, cap_front_id, cap_back_id,
+            offset, center, origin, size, radius, angle_y, pivot,
+            x=0, x_cap=0, shape_z=None, uv=None):
+        """
+            Add a panel
+            x, x_cap: uv params
+            uv: (center, origin, size, radius) of uvs
+                when they differ from vertices ones
+        """
+        steps = self.steps
+        n_path_verts, n_path_faces = panel.path_sections(steps, path_type)
+        start = self.n_verts
+        verts = panel.vertices_array(steps, offset, center, origin, size, radius,
+            angle_y, pivot, shape_z=shape_z, path_type=path_type)
+        self.verts.append(verts)
+        self.n_verts += verts.shape[0]
+
+        if uv is not None:
+            center, origin, size, radius = uv
+        quads = loft_faces(panel.closed_shape, panel.closed_path, panel.n_pts, n_path_faces)
+        self.loops.append((quads + start).astype(np.int32).ravel())
+        self.totals.append(np.full(quads.shape[0], 4, dtype=np.int32))
+        self.uvs.append(panel.uv_loft_array(steps, center, origin, size, radius,
+            angle_y, pivot, x, path_type=path_type).reshape(-1, 2))
+        self._add_faces(panel.faces_caps(n_path_verts, start),
+            panel.uv_caps(steps, center, origin, size, radius, pivot, x_cap, path_type=path_type))
+        self.matids.extend(panel.mat(steps, cap_front_id, cap_back_id, path_type=path_type))
+
+    def add(self, verts, faces, matids, uvs):
+        """
+            Add raw geometry, faces index relative to verts
+        """
+        start = self.n_verts
+        self.verts.append(np.array([tuple(v) for v in verts], dtype=np.float64).reshape(-1, 3))
+        self.n_verts += len(verts)
+        self._add_faces([[start + i for i in f] for f in faces], uvs)
+        self.matids.extend(matids)
+
+    def arrays(self):
+        """
+            return verts, loops, totals, matids, uvs
+            as buildmesh_arrays args
+        """
+        if len(self.verts) < 1:
+            return (np.zeros((0, 3), dtype=np.float64), np.zeros(0, dtype=np.int32),
+                np.zeros(0, dtype=np.int32), self.matids, np.zeros((0, 2), dtype=np.float64))
+        return (np.concatenate(self.verts),
+            np.concatenate(self.loops),
+            np.concatenate(self.totals),
+            self.matids,
+            np.concatenate(self.uvs))
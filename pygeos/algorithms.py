@@ -26,14 +26,15 @@
 import logging
 logger = logging.getLogger("pygeos.algorithms")
 from math import floor, isfinite, sqrt, pi, atan2
+from functools import cmp_to_key
 from .shared import (
-    quicksort,
     GeomTypeId,
     Location,
     Envelope,
     Quadrant,
     Coordinate,
     CoordinateSequence,
+    ArrayCoordinateSequence,
     LinearComponentExtracter,
     CoordinateFilter
     )
@@ -103,6 +104,8 @@ class MonotoneChain():
      * returned by the query.
      * However, it does mean that the queries are not thread-safe.
     """
+    __slots__ = ('coords', '_env', 'context', 'start', 'end', 'id')
+
     def __init__(self, coords, start, end, context):
 
         self.coords = coords
@@ -492,12 +495,16 @@ class UniqueCoordinateArrayFilter(CoordinateFilter):
 
 
 class ReallyLessThen():
-
+    """
+     * Radial order of points around origin
+    """
     def __init__(self, origin):
         self.origin = origin
+        # sort key of points
+        self.key = cmp_to_key(self.compare)
 
-    def compare(self, p1, p2) -> bool:
-        return self.polarCompare(self.origin, p1, p2) == -1
+    def compare(self, p1, p2) -> int:
+        return self.polarCompare(self.origin, p1, p2)
 
     def polarCompare(self, o, p, q) -> int:
 
@@ -764,7 +771,7 @@ class ConvexHull():
 
         # sort the points radially around the focal point.
         rls = ReallyLessThen(coords[0])
-        quicksort(coords, rls.compare)
+        coords.sort(key=rls.key)
 
         logger.debug("ConvexHull.preSort() after radial sort: %s", [str(co) for co in coords])
 
@@ -1563,6 +1570,9 @@ class CGAlgorithms():
     @staticmethod
     def signedArea(ring):
 
+        if isinstance(ring, ArrayCoordinateSequence):
+            return ring.signedArea()
+
         npts = len(ring)
 
         if npts < 3:
@@ -1582,6 +1592,9 @@ class CGAlgorithms():
     @staticmethod
     def length(coords):
 
+        if isinstance(coords, ArrayCoordinateSequence):
+            return coords.length()
+
         if len(coords) < 2:
             return 0.0
 
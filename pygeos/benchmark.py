@@ -0,0 +1,272 @@
+# -*- coding:utf-8 -*-
+
+# ##### BEGIN LGPL LICENSE BLOCK #####
+# GEOS - Geometry Engine Open Source
+# http://geos.osgeo.org
+#
+# This is free software you can redistribute and/or modify it under
+# the terms of the GNU Lesser General Public Licence as published
+# by the Free Software Foundation.
+# See the COPYING file for more information.
+#
+# ##### END LGPL LICENSE BLOCK #####
+
+# <pep8 compliant>
+
+# ----------------------------------------------------------
+# Author: Stephen Leger (s-leger)
+#
+# ----------------------------------------------------------
+# Benchmarks of pygeos implementation variants
+# Run from archipack folder:
+#   python -m pygeos.benchmark
+# ----------------------------------------------------------
+
+
+import gc
+import time
+import tracemalloc
+from math import cos, sin, pi
+from .shared import (
+    Envelope,
+    Coordinate,
+    CoordinateSequence,
+    ArrayCoordinateSequence
+    )
+from .algorithms import CGAlgorithms, LineIntersector
+from .geom import GeometryFactory
+from .op_union import UnaryUnionOp, CascadedUnion
+from .op_valid import IndexedNestedRingTester
+from .noding import MCIndexNoder, IntersectionAdder, NodedSegmentString
+from .index_strtree import STRtree, PackedSTRtree
+
+
+def measure(func, *args, repeat: int=5):
+    """
+     * Run func(*args) repeat times
+     * @return result, best time in seconds,
+     * memory retained by result and peak memory allocated in bytes
+    """
+    best = None
+    for i in range(repeat):
+        t = time.perf_counter()
+        res = func(*args)
+        t = time.perf_counter() - t
+        if best is None or t < best:
+            best = t
+    tracemalloc.start()
+    res = func(*args)
+    size, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return res, best, size, peak
+
+
+def measure_gc(func, *args):
+    """
+     * Run func(*args) once
+     * @return result, time in seconds, peak memory allocated in bytes
+     * and number of garbage collections of each generation
+    """
+    gc.collect()
+    collections = [s['collections'] for s in gc.get_stats()]
+    tracemalloc.start()
+    t = time.perf_counter()
+    res = func(*args)
+    t = time.perf_counter() - t
+    size, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    collections = [s['collections'] - c for s, c in zip(gc.get_stats(), collections)]
+    return res, t, peak, collections
+
+
+def report(title, rows):
+    """
+     * Print a table of (name, list result, array result)
+    """
+    print(title)
+    for name, a, b in rows:
+        print("  {:<24} {:>14} {:>14}".format(name, a, b))
+
+
+def site_plan(n_verts: int):
+    """
+     * Closed ring of n_verts coordinates, with repeated points
+    """
+    coords = []
+    da = 2 * pi / n_verts
+    for i in range(n_verts - 1):
+        r = 100 + 5 * sin(17 * i * da)
+        coords.append(Coordinate(r * cos(i * da), r * sin(i * da)))
+        if i % 10 == 0:
+            coords.append(coords[-1].clone())
+    coords.append(coords[0].clone())
+    return coords
+
+
+def octagons(n_polys: int):
+    """
+     * Grid of n_polys overlapping octagons
+    """
+    gf = GeometryFactory()
+    side = int(n_polys ** 0.5)
+    polys = []
+    for i in range(n_polys):
+        cx, cy = 1.5 * (i % side), 1.5 * (i // side)
+        coords = [Coordinate(cx + cos(j * pi / 4), cy + sin(j * pi / 4)) for j in range(8)]
+        coords.append(coords[0].clone())
+        polys.append(gf.createPolygon(gf.createLinearRing(coords)))
+    return polys
+
+
+def polylines(n_lines: int, n_verts: int):
+    """
+     * Grid of 2 * n_lines crossing wavy polylines of n_verts coordinates
+    """
+    lines = []
+    for i in range(n_lines):
+        coords = [Coordinate(
+                0.1 * j + 0.3 * sin(0.7 * j + i),
+                0.5 * i + 2 * sin(0.05 * j + i) + 0.2 * cos(1.3 * j))
+            for j in range(n_verts)]
+        lines.append(coords)
+        lines.append([Coordinate(co.y, co.x) for co in coords])
+    return lines
+
+
+def bench_union_buffer(n_polys: int=5000):
+    """
+     * Time, peak memory and garbage collections
+     * of union and buffer of n_polys polygons
+     * Time includes tracemalloc overhead, compare runs of the same setup
+    """
+    polys = octagons(n_polys)
+    rows = []
+    for name, func in (
+            ("union", lambda: UnaryUnionOp.union(polys)),
+            ("buffer", lambda: [p.buffer(0.1, resolution=2) for p in polys])):
+        res, t, peak, collections = measure_gc(func)
+        rows.append((name, "{:.2f} s".format(t), "{:.1f} MB".format(peak / 1048576)))
+        rows.append(("", "gc collections", "{}".format(collections)))
+    report("Union and buffer, {} polygons".format(n_polys),
+        [("", "time", "peak memory")] + rows)
+
+
+def use_index(indexClass):
+    """
+     * Set spatial index class of index based operations
+    """
+    MCIndexNoder.indexClass = indexClass
+    CascadedUnion.indexClass = indexClass
+    IndexedNestedRingTester.indexClass = indexClass
+
+
+def bench_strtree(n_items: int=20000, n_polys: int=1000):
+    """
+     * Compare STRtree and PackedSTRtree
+     * build, one query per item, self join and union
+    """
+    envs = [poly.envelope for poly in octagons(n_items)]
+
+    def build(cls):
+        tree = cls()
+        for i, env in enumerate(envs):
+            tree.insert(env, i)
+        tree.build()
+        return tree
+
+    def query_each(tree):
+        found = []
+        for env in envs:
+            tree.query(env, found)
+        return found
+
+    polys = octagons(n_polys)
+    rows = []
+    for cls in (STRtree, PackedSTRtree):
+        res = []
+        tree, t, size, peak = measure(build, cls, repeat=3)
+        res.append("{:.3f} s".format(t))
+        r, t, size, peak = measure(query_each, tree, repeat=3)
+        res.append("{:.3f} s".format(t))
+        if cls is PackedSTRtree:
+            r, t, size, peak = measure(tree.query_many, envs, repeat=3)
+            res.append("{:.3f} s".format(t))
+            r, t, size, peak = measure(tree.query_pairs, repeat=3)
+            res.append("{:.3f} s".format(t))
+        else:
+            res.extend(["", ""])
+        use_index(cls)
+        t = time.perf_counter()
+        UnaryUnionOp.union(polys)
+        res.append("{:.2f} s".format(time.perf_counter() - t))
+        rows.append(res)
+    use_index(STRtree)
+
+    names = ["build", "query each", "query_many", "query_pairs", "union {}".format(n_polys)]
+    report("STRtree vs PackedSTRtree, {} items".format(n_items),
+        [("", "STRtree", "packed")] + list(zip(names, *rows)))
+
+
+def bench_noding(n_lines: int=20, n_verts: int=500):
+    """
+     * Compare MCIndexNoder per chain overlaps and batch noding
+    """
+    lines = polylines(n_lines, n_verts)
+
+    def node():
+        si = IntersectionAdder(LineIntersector())
+        noder = MCIndexNoder(si)
+        noder.computeNodes([NodedSegmentString(coords) for coords in lines])
+        return si
+
+    rows = []
+    for batch in (False, True):
+        MCIndexNoder.batchNoding = batch
+        res = []
+        for cls in (STRtree, PackedSTRtree):
+            use_index(cls)
+            si, t, size, peak = measure(node, repeat=3)
+            res.append("{:.3f} s".format(t))
+        res.append("{}".format(si.numTests))
+        rows.append(res)
+    MCIndexNoder.batchNoding = False
+    use_index(STRtree)
+
+    names = ["STRtree", "PackedSTRtree", "LineIntersector calls"]
+    report("MCIndexNoder, {} segments".format(2 * n_lines * (n_verts - 1)),
+        [("", "per chain", "batch")] + list(zip(names, *rows)))
+
+
+def bench_coordinate_sequence(n_verts: int=10000):
+    """
+     * Compare CoordinateSequence and ArrayCoordinateSequence
+     * memory and speed of common operations
+    """
+    coords = site_plan(n_verts)
+    rows = []
+    for cls in (CoordinateSequence, ArrayCoordinateSequence):
+        res = []
+        # memory retained by a sequence of n_verts coordinates
+        seq, t, size, peak = measure(
+            lambda: cls([Coordinate(c.x, c.y) for c in coords]), repeat=1)
+        res.append("{:.0f} B/vertex".format(size / len(coords)))
+        for func in (
+                lambda s: s.expandEnvelope(Envelope()),
+                CGAlgorithms.signedArea,
+                CGAlgorithms.length,
+                CoordinateSequence.removeRepeatedPoints,
+                lambda s: s.reverse()):
+            r, t, size, peak = measure(func, seq)
+            res.append("{:.3f} ms".format(1000 * t))
+        rows.append(res)
+
+    names = ["memory", "envelope", "signed area", "length", "remove repeated", "reverse"]
+    report("CoordinateSequence vs ArrayCoordinateSequence, {} vertices".format(len(coords)),
+        [("", "list", "array")] + list(zip(names, *rows)))
+
+
+if __name__ == "__main__":
+    bench_coordinate_sequence()
+    bench_strtree()
+    bench_noding()
+    bench_union_buffer()
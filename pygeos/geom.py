@@ -33,6 +33,7 @@ from .shared import (
     PrecisionModel,
     Coordinate,
     CoordinateSequence,
+    ArrayCoordinateSequence,
     CoordinateSequenceFilter,
     CoordinateFilter,
     GeometryFilter,
@@ -740,7 +741,7 @@ class LineString(Geometry, Lineal):
 
         # Envelope internal cache
         self._env = None
-        self._coords = CoordinateSequence.removeRepeatedPoints(coords)
+        self._coords = newFactory.coordinateSequenceFactory.create(coords, False)
 
         self.validateConstruction()
 
@@ -750,6 +751,9 @@ class LineString(Geometry, Lineal):
 
     def computeEnvelope(self):
 
+        if self._env is None and isinstance(self._coords, ArrayCoordinateSequence):
+            self._env = self._coords.envelope
+
         if self._env is None:
             x = [c.x for c in self._coords]
             y = [c.y for c in self._coords]
@@ -1473,6 +1477,16 @@ class CoordinateSequenceFactory():
         return CoordinateSequence(coords, allowRepeated, direction)
 
 
+class ArrayCoordinateSequenceFactory(CoordinateSequenceFactory):
+    """
+     * Create ArrayCoordinateSequence, coordinates stored in numpy arrays
+     *
+     * Usage: GeometryFactory(ArrayCoordinateSequenceFactory())
+    """
+    def create(self, coords=None, allowRepeated: bool=True, direction: bool=True):
+        return ArrayCoordinateSequence(coords, allowRepeated, direction)
+
+
 class gfCoordinateOperation(CoordinateOperation):
 
     def __init__(self, gsf):
@@ -23,10 +23,12 @@
 #
 # ----------------------------------------------------------
 from math import atan2
+from array import array
+from bisect import bisect_right
+from functools import cmp_to_key
 import logging
 logger = logging.getLogger("pygeos.geomgraph")
 from .shared import (
-    quicksort,
     GeomTypeId,
     TopologyException,
     Location,
@@ -91,7 +93,10 @@ class TopologyLocation():
      *
      * The labelling is stored in an array location[j] where
      * where j has the values ON, LEFT, RIGHT
+     * packed as signed chars
     """
+    __slots__ = ('location', )
+
     def __init__(self, newLocation, left=None, right=None):
         """
          * Constructs a TopologyLocation specifying how points on, to the
@@ -105,9 +110,9 @@ class TopologyLocation():
          * @see Location
         """
         if type(newLocation).__name__ == 'TopologyLocation':
-            self.location = [loc for loc in newLocation.location]
+            self.location = array('b', newLocation.location)
         else:
-            self.location = [newLocation]
+            self.location = array('b', (newLocation, ))
             if left is not None:
                 self.location.append(left)
             if right is not None:
@@ -141,7 +146,7 @@ class TopologyLocation():
                 self.location[i] = location
 
     def setAllLocations(self, location: int) -> None:
-        self.location = [location for i in range(len(self.location))]
+        self.location = array('b', (location, )) * len(self.location)
 
     def merge(self, other) -> None:
         """
@@ -152,7 +157,7 @@ class TopologyLocation():
         osz = len(other.location)
         # if the src is an Area label & and the dest is not, increase the dest to be an Area
         if osz > sz:
-            self.location.extend([Location.UNDEF, Location.UNDEF])
+            self.location.extend((Location.UNDEF, Location.UNDEF))
 
         for i, loc in enumerate(other.location):
             if self.location[i] == Location.UNDEF:
@@ -212,14 +217,16 @@ class TopologyLocation():
 
 class Depth():
     """
+     * Depths are stored in a packed int array
+     * where depth of geomIndex at posIndex is _depth[3 * geomIndex + posIndex]
     """
+    __slots__ = ('_depth', )
+
     NULL_VALUE = -1
 
     def __init__(self):
         # initialize depth array to a sentinel value
-        self._depth = [
-            [Depth.NULL_VALUE, Depth.NULL_VALUE, Depth.NULL_VALUE],
-            [Depth.NULL_VALUE, Depth.NULL_VALUE, Depth.NULL_VALUE]]
+        self._depth = array('i', (Depth.NULL_VALUE, )) * 6
 
     @staticmethod
     def depthAtLocation(location: int) -> int:
@@ -239,11 +246,11 @@ class Depth():
                     loc = geomIndex.getLocation(i, j)
                     if loc == Location.EXTERIOR or loc == Location.INTERIOR:
                         if self.isNull(i, j):
-                            self._depth[i][j] = Depth.depthAtLocation(loc)
+                            self._depth[3 * i + j] = Depth.depthAtLocation(loc)
                         else:
-                            self._depth[i][j] += Depth.depthAtLocation(loc)
+                            self._depth[3 * i + j] += Depth.depthAtLocation(loc)
         elif location == Location.INTERIOR:
-            self._depth[geomIndex][posIndex] += 1
+            self._depth[3 * geomIndex + posIndex] += 1
 
         logger.debug("Depth.add() reslut:%s", self)
 
@@ -252,25 +259,24 @@ class Depth():
          * A Depth object is null (has never been initialized) if all depths are null.
         """
         if geomIndex is None:
-            for i in range(2):
-                for j in range(3):
-                    if self._depth[i][j] != Depth.NULL_VALUE:
-                        return False
+            for depth in self._depth:
+                if depth != Depth.NULL_VALUE:
+                    return False
             return True
 
         elif posIndex is None:
             posIndex = 1
 
-        return self._depth[geomIndex][posIndex] == Depth.NULL_VALUE
+        return self._depth[3 * geomIndex + posIndex] == Depth.NULL_VALUE
 
     def getDepth(self, geomIndex: int, posIndex: int) -> int:
-        return self._depth[geomIndex][posIndex]
+        return self._depth[3 * geomIndex + posIndex]
 
     def setDepth(self, geomIndex: int, posIndex: int, depthValue) -> None:
-        self._depth[geomIndex][posIndex] = depthValue
+        self._depth[3 * geomIndex + posIndex] = depthValue
 
     def getLocation(self, geomIndex: int, posIndex: int) -> int:
-        if self._depth[geomIndex][posIndex] <= 0:
+        if self._depth[3 * geomIndex + posIndex] <= 0:
             return Location.EXTERIOR
         return Location.INTERIOR
 
@@ -285,23 +291,24 @@ class Depth():
         """
         for i in range(2):
             if not self.isNull(i):
-                minDepth = self._depth[i][1]
-                if self._depth[i][2] < minDepth:
-                    minDepth = self._depth[i][2]
+                minDepth = self._depth[3 * i + 1]
+                if self._depth[3 * i + 2] < minDepth:
+                    minDepth = self._depth[3 * i + 2]
                 if minDepth < 0:
                     minDepth = 0
                 for j in range(1, 3):
                     newValue = 0
-                    if self._depth[i][j] > minDepth:
+                    if self._depth[3 * i + j] > minDepth:
                         newValue = 1
-                    self._depth[i][j] = newValue
+                    self._depth[3 * i + j] = newValue
 
     def getDelta(self, geomIndex: int) -> int:
-        return self._depth[geomIndex][Position.RIGHT] - self._depth[geomIndex][Position.LEFT]
+        i = 3 * geomIndex
+        return self._depth[i + Position.RIGHT] - self._depth[i + Position.LEFT]
 
     def __str__(self) -> str:
         _d = self._depth
-        return "A:{}, {} B:{}, {}".format(_d[0][1], _d[0][2], _d[1][1], _d[1][2])
+        return "A:{}, {} B:{}, {}".format(_d[1], _d[2], _d[4], _d[5])
 
 
 class Label():
@@ -327,6 +334,8 @@ class Label():
      * It is up to the client code to associate the 0 and 1 TopologyLocations
      * with specific geometries.
     """
+    __slots__ = ('_elt', )
+
     def __init__(self, geomIndex=None, onLoc=None, left=None, right=None):
         """
             Construct a label
@@ -747,35 +756,35 @@ class NodeMap(dict):
         return "\n".join([str(node) for node in self.values()])
 
 
-def EdgeEndLT(s1, s2) -> bool:
-    return s1.compareTo(s2) < 0
-
-
 class DirectedEdgeMap(dict):
-
+    """
+     * A map of EdgeEnd, indexed by coordinates,
+     * keeping edges sorted CCW from the positive x-axis
+    """
     def __init__(self):
         dict.__init__(self)
-        self._edgeList = None
+        self._edgeList = []
+        # sort keys of edges in _edgeList
+        self._keys = []
 
     @property
     def edges(self):
-        if self._edgeList is None:
-            self._edgeList = list(self.values())
-            quicksort(self._edgeList, EdgeEndLT)
-
         return self._edgeList
 
     def add(self, de):
         key = (de.coord, de.direction)
-        res = self.get(key)
-        if res is None:
-            res = de
-        self[key] = res
-        self._edgeList = None
+        if key not in self:
+            self[key] = de
+            sortKey = de.sortKey
+            i = bisect_right(self._keys, sortKey)
+            self._keys.insert(i, sortKey)
+            self._edgeList.insert(i, de)
 
 
 class GraphComponent():
 
+    __slots__ = ('label', 'isInResult', '_isCovered', 'isCoveredSet', 'isVisited')
+
     def __init__(self, newLabel=None):
         if newLabel is None:
             self.label = Label(0, Location.UNDEF)
@@ -810,6 +819,8 @@ class Node(GraphComponent):
      * @param newCoord Coordinate
      * @param newEdges EdgeEndStar
     """
+    __slots__ = ('coord', 'star')
+
     def __init__(self, coord, star):
         GraphComponent.__init__(self)
         # Coordinate
@@ -944,6 +955,8 @@ class EdgeEnd():
      * "a has a greater angle with the x-axis than b".
      * This ordering is used to sort EdgeEnds around a node.
     """
+    __slots__ = ('label', 'edge', 'node', 'dx', 'dy', 'quadrant', 'coord', 'direction')
+
     def __init__(self, newEdge=None, newP0=None, newP1=None, newLabel=None):
 
         # Label
@@ -965,6 +978,15 @@ class EdgeEnd():
         if newP0 is not None and newP1 is not None:
             self.init(newP0, newP1)
 
+    @property
+    def sortKey(self) -> tuple:
+        """
+         * Key sorting EdgeEnds around a node, in compareDirection order:
+         * the quadrant, then the orientation of directions
+         * for EdgeEnds in the same quadrant
+        """
+        return (self.quadrant, edgeEndDirectionKey(self))
+
     def compareTo(self, edgeEnd) -> int:
         return self.compareDirection(edgeEnd)
 
@@ -1033,6 +1055,11 @@ class EdgeEnd():
         return self.compareTo(other) == -1
 
 
+# Orientation of EdgeEnds in the same quadrant, see EdgeEnd.compareDirection
+edgeEndDirectionKey = cmp_to_key(
+    lambda e0, e1: CGAlgorithms.computeOrientation(e1.coord, e1.direction, e0.direction))
+
+
 class EdgeRing():
     """
     """
@@ -1480,6 +1507,9 @@ class DirectedEdge(EdgeEnd):
     """
      * A directed EdgeEnd
     """
+    __slots__ = ('isForward', 'isInResult', 'isVisited', 'sym', 'next', 'nextMin',
+        'edgeRing', 'minEdgeRing', '_depth')
+
     def __init__(self, edge, isForward):
 
         EdgeEnd.__init__(self, edge)
@@ -1509,7 +1539,7 @@ class DirectedEdge(EdgeEnd):
         # the MinimalEdgeRing that this edge is part of
         self.minEdgeRing = None
 
-        self._depth = [0, -999, -999]
+        self._depth = array('i', (0, -999, -999))
 
         coords = edge.coords
 
@@ -2237,10 +2267,6 @@ class DirectedEdgeStar(EdgeEndStar):
         )
 
 
-def EdgeIntersectionLessThen(ei1, ei2) -> bool:
-    return ei1.compareTo(ei2) < 0
-
-
 class EdgeIntersection():
     """
      * Represents a point on an edge which intersects with another edge.
@@ -2249,6 +2275,8 @@ class EdgeIntersection():
      * (in which case this point is the start of the line segment)
      * The intersection point must be precise.
     """
+    __slots__ = ('coord', 'segmentIndex', 'dist')
+
     def __init__(self, coord, segmentIndex: int, dist: float):
 
         # Coordinate the point of intersection
@@ -2265,6 +2293,13 @@ class EdgeIntersection():
             return True
         return False
 
+    @property
+    def sortKey(self) -> tuple:
+        """
+         * Key sorting intersections along the edge, in compareTo order
+        """
+        return (self.segmentIndex, self.dist)
+
     def __str__(self) -> str:
         return "{} seg # = {} dist = {}".format(
             self.coord,
@@ -2304,9 +2339,10 @@ class EdgeIntersectionList(dict):
     def __init__(self, newEdge):
         dict.__init__(self)
         self.edge = newEdge
-        # EdgeIntersection
-        self._ei = None
-        self._sorted = False
+        # EdgeIntersection sorted along the edge
+        self._ei = []
+        # sort keys of intersections in _ei
+        self._keys = []
 
     def add(self, coord, segmentIndex: int, dist: float):
         """
@@ -2320,15 +2356,14 @@ class EdgeIntersectionList(dict):
         if ei is None:
             ei = EdgeIntersection(coord, segmentIndex, dist)
             self[key] = ei
-            self._sorted = False
+            sortKey = ei.sortKey
+            i = bisect_right(self._keys, sortKey)
+            self._keys.insert(i, sortKey)
+            self._ei.insert(i, ei)
         return ei
 
     @property
     def intersections(self) -> list:
-        if not self._sorted:
-            self._ei = list(self.values())
-            quicksort(self._ei, EdgeIntersectionLessThen)
-            self._sorted = True
         return self._ei
 
     @property
@@ -24,9 +24,6 @@
 # ----------------------------------------------------------
 
 
-from .shared import quicksort
-
-
 class SortedPackedIntervalRTree():
     """
      * A static index on a set of 1-dimensional intervals,
@@ -74,7 +71,7 @@ class SortedPackedIntervalRTree():
 
     # IntervalRTreeNode
     def buildTree(self):
-        quicksort(self.leaves, IntervalRTreeNode.compare)
+        self.leaves.sort(key=IntervalRTreeNode.sortKey, reverse=True)
         src = self.leaves
         dest = []
         while(True):
@@ -125,10 +122,11 @@ class IntervalRTreeNode():
         return True
 
     @staticmethod
-    def compare(n1, n2) -> bool:
-        mid1 = (n1.mini + n1.maxi) / 2
-        mid2 = (n2.mini + n2.maxi) / 2
-        return mid1 > mid2
+    def sortKey(node) -> float:
+        """
+         * Key sorting nodes by interval midpoint
+        """
+        return (node.mini + node.maxi) / 2
 
 
 class IntervalRTreeLeafNode(IntervalRTreeNode):
@@ -30,6 +30,7 @@ implement nearestneighboor and BoundablePair
 """
 
 
+import numpy as np
 from .shared import Envelope
 from math import ceil, sqrt
 
@@ -639,3 +640,234 @@ class STRtree(AbstractSTRtree, SpatialIndex):
         if env.isNull:
             return
         AbstractSTRtree.insert(self, env, item)
+
+
+class PackedSTRtree(SpatialIndex):
+    """
+     * A query-only R-tree created using the Sort-Tile-Recursive (STR) algorithm,
+     * packed in numpy arrays.
+     *
+     * Bounds of nodes and items are stored in a (N, 4) array of
+     * (minx, miny, maxx, maxy), in level order from the root,
+     * items being the last level.
+     * Childs of a node are contiguous in the next level,
+     * so a node only store the offsets of its first and last childs.
+     *
+     * The tree is bulk loaded by sorting a whole level at once,
+     * and queries walk the tree level by level on arrays, without recursion.
+     *
+     * Items are indexed by their insertion order in items,
+     * query_many and query_pairs return indexes of items.
+    """
+    def __init__(self, nodeCapacity: int=10):
+        SpatialIndex.__init__(self)
+        self.nodeCapacity = nodeCapacity
+        self._built = False
+        # inserted items and their bounds
+        self.items = []
+        self._itemBounds = []
+        # (N, 4) bounds of nodes then items, in level order
+        self._bounds = None
+        # offsets of first and past last child of nodes
+        self._childStart = None
+        self._childEnd = None
+        # index of first item in _bounds
+        self._itemStart = 0
+        # items indexes in level order
+        self._itemIds = None
+        # number of levels from root to items
+        self._depth = 0
+
+    def insert(self, env, item):
+        if env.isNull:
+            return
+        self.items.append(item)
+        self._itemBounds.append((env.minx, env.miny, env.maxx, env.maxy))
+
+    def _sortLevel(self, bounds):
+        """
+         * Sort a level into vertical slices of midpoint x,
+         * each slice by midpoint y, and group runs of nodeCapacity
+         * @return order of childs, index of first child of each parent
+        """
+        n = len(bounds)
+        leafCount = int(ceil(n / self.nodeCapacity))
+        sliceCount = int(ceil(sqrt(leafCount)))
+        sliceCapacity = int(ceil(n / sliceCount))
+        order = np.argsort(bounds[:, 0] + bounds[:, 2], kind='stable')
+        slices = np.arange(n) // sliceCapacity
+        order = order[np.lexsort(((bounds[:, 1] + bounds[:, 3])[order], slices))]
+        start = np.flatnonzero((np.arange(n) - slices * sliceCapacity) % self.nodeCapacity == 0)
+        return order, start
+
+    def build(self):
+        """
+         * Creates parent levels up to the root.
+         * Can only be called once, after all items were inserted.
+        """
+        if self._built:
+            return
+        self._built = True
+
+        n = len(self._itemBounds)
+        if n == 0:
+            self._bounds = np.zeros((0, 4), dtype=np.float64)
+            return
+
+        bounds = np.array(self._itemBounds, dtype=np.float64)
+        ids = np.arange(n)
+        # levels from items to root as (bounds, childStart, childEnd)
+        levels = []
+        childStart = childEnd = None
+
+        while True:
+            order, start = self._sortLevel(bounds)
+            bounds = bounds[order]
+            if childStart is None:
+                ids = ids[order]
+            else:
+                childStart, childEnd = childStart[order], childEnd[order]
+            levels.append((bounds, childStart, childEnd))
+
+            childStart = start
+            childEnd = np.append(start[1:], len(bounds))
+            bounds = np.hstack((
+                np.minimum.reduceat(bounds[:, :2], start, axis=0),
+                np.maximum.reduceat(bounds[:, 2:], start, axis=0)))
+
+            if len(start) == 1:
+                levels.append((bounds, childStart, childEnd))
+                break
+
+        levels.reverse()
+        self._depth = len(levels) - 1
+        self._bounds = np.vstack([level[0] for level in levels])
+        offsets = np.cumsum([0] + [len(level[0]) for level in levels])
+        self._childStart = np.hstack([level[1] + offsets[i + 1] for i, level in enumerate(levels[:-1])])
+        self._childEnd = np.hstack([level[2] + offsets[i + 1] for i, level in enumerate(levels[:-1])])
+        self._itemStart = offsets[-2]
+        self._itemIds = ids
+
+    @staticmethod
+    def toArray(envelopes):
+        """
+         * (N, 4) array of (minx, miny, maxx, maxy) of envelopes,
+         * null envelopes are nan and never intersect
+        """
+        if isinstance(envelopes, np.ndarray):
+            return envelopes.reshape(-1, 4)
+        nan = float('nan')
+        return np.array([
+            (nan, nan, nan, nan) if env.isNull else (env.minx, env.miny, env.maxx, env.maxy)
+            for env in envelopes], dtype=np.float64).reshape(-1, 4)
+
+    def _query(self, bounds):
+        """
+         * @param bounds (N, 4) array of search bounds
+         * @return arrays of search index and item index of intersecting pairs
+        """
+        if not self._built:
+            self.build()
+
+        n = len(bounds)
+        if n == 0 or len(self.items) == 0:
+            return np.zeros(0, dtype=np.int64), np.zeros(0, dtype=np.int64)
+
+        _bounds = self._bounds
+        search = np.arange(n)
+        nodes = np.zeros(n, dtype=np.int64)
+
+        for level in range(self._depth + 1):
+            if level > 0:
+                # expand nodes to their childs
+                start = self._childStart[nodes]
+                count = self._childEnd[nodes] - start
+                first = np.cumsum(count) - count
+                search = np.repeat(search, count)
+                nodes = np.arange(count.sum()) - np.repeat(first - start, count)
+
+            b = _bounds[nodes]
+            s = bounds[search]
+            mask = ((b[:, 0] <= s[:, 2]) & (b[:, 2] >= s[:, 0]) &
+                    (b[:, 1] <= s[:, 3]) & (b[:, 3] >= s[:, 1]))
+            search = search[mask]
+            nodes = nodes[mask]
+
+        return search, self._itemIds[nodes - self._itemStart]
+
+    def query(self, searchEnv, foundItems=None):
+        """
+         * Queries the index for all items whose extents intersect searchEnv
+         * @param foundItems list where found items are added
+         * @return list of found items
+        """
+        if foundItems is None:
+            foundItems = []
+        search, ids = self._query(self.toArray([searchEnv]))
+        items = self.items
+        foundItems.extend([items[i] for i in np.sort(ids)])
+        return foundItems
+
+    def visit(self, searchEnv, visitor):
+        for item in self.query(searchEnv):
+            visitor.visitItem(item)
+
+    def query_many(self, envelopes):
+        """
+         * Queries the index with many envelopes at once
+         * @param envelopes list of Envelope or (N, 4) array of (minx, miny, maxx, maxy)
+         * @return offsets, indexes CSR arrays, indexes of items
+         * intersecting envelopes[i] are indexes[offsets[i]:offsets[i + 1]]
+        """
+        bounds = self.toArray(envelopes)
+        search, ids = self._query(bounds)
+        order = np.lexsort((ids, search))
+        offsets = np.zeros(len(bounds) + 1, dtype=np.int64)
+        np.cumsum(np.bincount(search, minlength=len(bounds)), out=offsets[1:])
+        return offsets, ids[order]
+
+    def query_pairs(self):
+        """
+         * Self join, finds pairs of items with intersecting bounds
+         * @return i, j arrays of items indexes, with i < j sorted by i then j
+        """
+        if not self._built:
+            self.build()
+        i, j = self._query(np.array(self._itemBounds, dtype=np.float64).reshape(-1, 4))
+        mask = i < j
+        i, j = i[mask], j[mask]
+        order = np.lexsort((j, i))
+        return i[order], j[order]
+
+    def iterate(self, visitor):
+        for item in self.items:
+            visitor.visitItem(item)
+
+    def itemsTree(self):
+        """
+         * Gets a tree structure (as a nested ItemsList)
+         * corresponding to the structure of the items and nodes in this tree.
+         * Builds the tree if necessary.
+        """
+        if not self._built:
+            self.build()
+
+        if len(self.items) == 0:
+            return ItemsList()
+
+        items = self.items
+        itemStart = self._itemStart
+        itemIds = self._itemIds
+        # ItemsList of nodes, built from the last level to the root
+        trees = [None] * itemStart
+        for node in range(itemStart - 1, -1, -1):
+            tree = ItemsList()
+            for child in range(self._childStart[node], self._childEnd[node]):
+                if child >= itemStart:
+                    tree.add(items[itemIds[child - itemStart]])
+                elif trees[child] is not None:
+                    tree.add(trees[child])
+            if len(tree) > 0:
+                trees[node] = tree
+
+        return trees[0]
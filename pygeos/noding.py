@@ -25,19 +25,23 @@
 
 
 from .index_strtree import (
-    STRtree
+    STRtree,
+    PackedSTRtree
     )
 from .algorithms import (
+    USE_FUZZY_LINE_INTERSECTOR,
     LineIntersector,
     MonotoneChainBuilder,
     MonotoneChainOverlapAction
     )
+from bisect import bisect_right
+import numpy as np
 from .shared import (
     logger,
-    quicksort,
     TopologyException,
     CoordinateFilter,
     CoordinateSequence,
+    ArrayCoordinateSequence,
     LinearComponentExtracter
     )
 
@@ -216,6 +220,22 @@ class SegmentPointComparator():
             SegmentPointComparator.compareValue(xSign, -ySign)
             ][octant]
 
+    @staticmethod
+    def key(octant: int, p) -> tuple:
+        """
+         * Key sorting points along a segment of given octant, in compare order
+        """
+        return [
+            (p.x, p.y),
+            (p.y, p.x),
+            (p.y, -p.x),
+            (-p.x, p.y),
+            (-p.x, -p.y),
+            (-p.y, -p.x),
+            (-p.y, p.x),
+            (p.x, -p.y)
+            ][octant]
+
     @staticmethod
     def relativeSign(x0: float, x1: float) -> int:
         if x0 < x1:
@@ -237,17 +257,12 @@ class SegmentPointComparator():
         return 0
 
 
-def segmentNodeLT(s1, s2):
-    """
-     * sort segment nodes
-    """
-    return s1.compareTo(s2) < 0
-
-
 class SegmentNode():
     """
      * Represents an intersection point between two NodedSegmentString
     """
+    __slots__ = ('segString', 'coord', 'segmentIndex', 'segmentOctant', 'isInterior')
+
     def __init__(self, edge, coord, segmentIndex: int, segmentOctant: int):
 
         # NodedSegmentString
@@ -282,6 +297,13 @@ class SegmentNode():
 
         return SegmentPointComparator.compare(self.segmentOctant, self.coord, other.coord)
 
+    @property
+    def sortKey(self) -> tuple:
+        """
+         * Key sorting nodes along the segment string, in compareTo order
+        """
+        return (self.segmentIndex, SegmentPointComparator.key(self.segmentOctant, self.coord))
+
     def __str__(self):
         return "{} seg#={} octant#={}".format(self.coord, self.segmentIndex, self.segmentOctant)
 
@@ -292,16 +314,13 @@ class SegmentNodeMap(dict):
     """
     def __init__(self):
         dict.__init__(self)
-        self._sorted = False
-        # SegmentNode
+        # SegmentNode sorted along the segment string
         self._nodes = []
+        # sort keys of nodes in _nodes
+        self._keys = []
 
     @property
     def nodes(self):
-        if not self._sorded:
-            self._sorted = True
-            self._nodes = list(self.values())
-            quicksort(self._nodes, segmentNodeLT)
         # SegmentNode
         return self._nodes
 
@@ -318,10 +337,11 @@ class SegmentNodeMap(dict):
 
         if node is None:
             node = newNode
-
-        self._sorded = False
-
-        self[key] = node
+            self[key] = node
+            sortKey = node.sortKey
+            i = bisect_right(self._keys, sortKey)
+            self._keys.insert(i, sortKey)
+            self._nodes.insert(i, node)
 
         return node
 
@@ -338,7 +358,7 @@ class SegmentNodeList():
     def __init__(self, edge):
         # NodedSegmentString parent edge
         self.edge = edge
-        # SegmentNode segmentNodeLT
+        # SegmentNode
         self.nodeMap = SegmentNodeMap()
 
     @property
@@ -1299,6 +1319,15 @@ class MCIndexNoder(SinglePassNoder):
      * envelope (range) queries efficiently (such as a index.quadtree.Quadtree
      * or index.strtree.STRtree.
     """
+    # Spatial index class, STRtree or PackedSTRtree
+    indexClass = STRtree
+    # Filter segment pairs of overlapping chains using arrays
+    batchNoding = False
+    # Max segment pairs filtered at once in batch mode
+    BATCH_SIZE = 65536
+    # Relative error bound of a floating point 2x2 determinant
+    DET_ERRBOUND = 1e-15
+
     def __init__(self, si=None):
         SinglePassNoder.__init__(self, si)
         self.idCounter = 0
@@ -1307,7 +1336,7 @@ class MCIndexNoder(SinglePassNoder):
         self.nOverlaps = 0
         # MonotoneChain
         self.monoChains = []
-        self.index = STRtree()
+        self.index = self.indexClass()
 
     def computeNodes(self, inputSegStrings: list) -> None:
         self.nodedSegStrings = inputSegStrings
@@ -1328,8 +1357,25 @@ class MCIndexNoder(SinglePassNoder):
         return res
 
     def intersectChains(self) -> None:
+
+        if self.batchNoding:
+            self.intersectChainsBatch()
+            return
+
         overlapAction = SegmentOverlapAction(self.si)
 
+        if isinstance(self.index, PackedSTRtree):
+            # chains are indexed in id order,
+            # so pairs only compare each pair of chains once
+            chains = self.index.items
+            for i, j in zip(*self.index.query_pairs()):
+                chains[i].computeOverlaps(chains[j], overlapAction)
+                self.nOverlaps += 1
+
+                if self.si.isDone:
+                    return
+            return
+
         for queryChain in self.monoChains:
             #
             overlapChains = []
@@ -1347,6 +1393,134 @@ class MCIndexNoder(SinglePassNoder):
                 if self.si.isDone:
                     return
 
+    def chainPairs(self) -> tuple:
+        """
+         * Pairs of chains with overlapping envelopes
+         * @return chains list and (i, j) arrays of chains indexes, i < j
+        """
+        if isinstance(self.index, PackedSTRtree):
+            return self.index.items, self.index.query_pairs()
+
+        i, j = [], []
+        for queryChain in self.monoChains:
+            overlapChains = []
+            self.index.query(queryChain.envelope, overlapChains)
+            for testChain in overlapChains:
+                if testChain.id > queryChain.id:
+                    i.append(queryChain.id)
+                    j.append(testChain.id)
+
+        return self.monoChains, (np.array(i, dtype=np.int64), np.array(j, dtype=np.int64))
+
+    def chainSegments(self, chains) -> tuple:
+        """
+         * Segments of chains in a flat coordinates array
+         * @return (N, 2) xy array, first segment and segments count
+         * arrays for each chain
+        """
+        offsets = {}
+        arrays = []
+        n_coords = 0
+        first = np.empty(len(chains), dtype=np.int64)
+        count = np.empty(len(chains), dtype=np.int64)
+        for k, mc in enumerate(chains):
+            key = id(mc.coords)
+            offset = offsets.get(key)
+            if offset is None:
+                offset = n_coords
+                offsets[key] = offset
+                arr = ArrayCoordinateSequence.toArray(mc.coords)
+                arrays.append(arr[:, :2])
+                n_coords += arr.shape[0]
+            first[k] = offset + mc.start
+            count[k] = mc.end - mc.start
+
+        return np.concatenate(arrays), first, count
+
+    def _sameSide(self, p1x, p1y, p2x, p2y, q1x, q1y, q2x, q2y):
+        """
+         * True where both q1 and q2 are for sure on the same side of p1-p2,
+         * using the same differences as CGAlgorithms.orientationIndex.
+         * Near-degenerate and non-finite cases are False
+         * and left to RobustDeterminant.
+        """
+        dx1 = p2x - p1x
+        dy1 = p2y - p1y
+        errbound = self.DET_ERRBOUND
+        sides = []
+        for qx, qy in ((q1x, q1y), (q2x, q2y)):
+            a = dx1 * (qy - p2y)
+            b = dy1 * (qx - p2x)
+            det = a - b
+            err = errbound * (np.abs(a) + np.abs(b)) + 1e-290
+            sides.append((det > err, det < -err))
+        (left1, right1), (left2, right2) = sides
+        return (left1 & left2) | (right1 & right2)
+
+    def intersectChainsBatch(self) -> None:
+        """
+         * Expand pairs of overlapping chains into segment pairs
+         * and reject on arrays those whose envelopes are disjoint
+         * or with both end points of a segment on the same side of the other.
+         * Remaining pairs, intersecting or near-degenerate, are processed
+         * by the SegmentIntersector as in computeOverlaps.
+        """
+        chains, (ci, cj) = self.chainPairs()
+        n_pairs = ci.shape[0]
+        if n_pairs == 0:
+            return
+
+        xy, first, count = self.chainSegments(chains)
+        na = count[ci]
+        nb = count[cj]
+        ends = np.cumsum(na * nb)
+        si = self.si
+
+        lo = 0
+        while lo < n_pairs:
+            base = 0 if lo == 0 else ends[lo - 1]
+            hi = max(lo + 1, int(np.searchsorted(ends, base + self.BATCH_SIZE, side='right')))
+            pairs = np.repeat(np.arange(lo, hi), na[lo:hi] * nb[lo:hi])
+            # index of segment pair in its chains pair
+            starts = np.concatenate(([base], ends[lo:hi - 1])) - base
+            local = np.arange(ends[hi - 1] - base) - starts[pairs - lo]
+            a, b = np.divmod(local, nb[pairs])
+            g0 = first[ci[pairs]] + a
+            g1 = first[cj[pairs]] + b
+
+            p1x, p1y = xy[g0, 0], xy[g0, 1]
+            p2x, p2y = xy[g0 + 1, 0], xy[g0 + 1, 1]
+            q1x, q1y = xy[g1, 0], xy[g1, 1]
+            q2x, q2y = xy[g1 + 1, 0], xy[g1 + 1, 1]
+
+            # same test as Envelope.static_intersects
+            keep = ~((np.minimum(p1x, p2x) > np.maximum(q1x, q2x)) |
+                (np.maximum(p1x, p2x) < np.minimum(q1x, q2x)) |
+                (np.minimum(p1y, p2y) > np.maximum(q1y, q2y)) |
+                (np.maximum(p1y, p2y) < np.minimum(q1y, q2y)))
+
+            if not USE_FUZZY_LINE_INTERSECTOR:
+                keep &= ~self._sameSide(p1x, p1y, p2x, p2y, q1x, q1y, q2x, q2y)
+                keep &= ~self._sameSide(q1x, q1y, q2x, q2y, p1x, p1y, p2x, p2y)
+
+            last = -1
+            for pair, i, j in zip(pairs[keep].tolist(), a[keep].tolist(), b[keep].tolist()):
+                if pair != last:
+                    if si.isDone:
+                        return
+                    last = pair
+                    mc0 = chains[ci[pair]]
+                    mc1 = chains[cj[pair]]
+                    ss0 = mc0.context
+                    ss1 = mc1.context
+                si.processIntersections(ss0, mc0.start + i, ss1, mc1.start + j)
+
+            self.nOverlaps += hi - lo
+            lo = hi
+
+            if si.isDone:
+                return
+
     def add(self, segStr) -> None:
         # MonotoneChain
         segChains = []
@@ -25,9 +25,9 @@
 
 
 from math import pi, cos, sin, log, pow, atan2, sqrt
+from functools import cmp_to_key
 from .shared import (
     logger,
-    quicksort,
     TopologyException,
     GeomTypeId,
     PrecisionModel,
@@ -478,10 +478,6 @@ class BufferOp():
         return scaleFactor
 
 
-def bufferSubgraphGT(first, second) -> bool:
-    return first.compareTo(second) > 0
-
-
 class RightmostEdgeFinder():
     """
      * A RightmostEdgeFinder find the geomgraph.DirectedEdge in a list which has
@@ -828,6 +824,13 @@ class BufferSubGraph():
             return 1
         return 0
 
+    @property
+    def sortKey(self) -> float:
+        """
+         * Key sorting BufferSubgraphs in compareTo order
+        """
+        return self.rightMostCoord.x
+
     @property
     def envelope(self):
         """
@@ -911,8 +914,8 @@ class DepthSegment():
         return DepthSegment.compareX(self.upwardSeg, other.upwardSeg)
 
 
-def depthSegmentLessThen(first, second) -> bool:
-    return first.compareTo(second) < 0
+# DepthSegments left to right order, see DepthSegment.compareTo
+depthSegmentKey = cmp_to_key(lambda first, second: first.compareTo(second))
 
 
 class SubgraphDepthLocater():
@@ -938,8 +941,7 @@ class SubgraphDepthLocater():
         if len(stabbedSegments) == 0:
             return 0
 
-        quicksort(stabbedSegments, depthSegmentLessThen)
-        ds = stabbedSegments[0]
+        ds = min(stabbedSegments, key=depthSegmentKey)
         return ds.leftDepth
 
     def findStabbedSegments(self, stabbingRayLeftPt, stabbedSegments: list) -> None:
@@ -2747,7 +2749,7 @@ class BufferBuilder():
          * subgraphs for exteriors will have been built before the subgraphs for
          * any interiors they contain
         """
-        quicksort(subGraphList, bufferSubgraphGT)
+        subGraphList.sort(key=lambda subGraph: subGraph.sortKey, reverse=True)
 
     def buildSubGraphs(self, subGraphList: list, polyBuilder) -> None:
         """
@@ -30,7 +30,6 @@ from .op_polygonize import PolygonizeOp
 from .op_linemerge import LineMerger
 from .shared import (
     logger,
-    quicksort,
     CoordinateSequence
     )
 
@@ -102,16 +101,12 @@ class PolygonsUnionOp():
         op = PolygonsUnionOp(geoms)
         return op._union()
     
-    @staticmethod
-    def poly_area_gt(a, b):
-        return a.exterior_area > b.exterior_area
-        
     @staticmethod
     def filter_nested(polys):
         """
           Filter out nested touching holes
         """
-        quicksort(polys, PolygonsUnionOp.poly_area_gt)
+        polys.sort(key=lambda poly: poly.exterior_area, reverse=True)
         to_remove = []
         n_polys = len(polys)
         
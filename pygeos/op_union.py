@@ -64,6 +64,9 @@ class CascadedUnion():
     """
     STRTREE_NODE_CAPACITY = 4
 
+    # Spatial index class, STRtree or PackedSTRtree
+    indexClass = STRtree
+
     def __init__(self, geoms=None):
         """
          * Creates a new instance to union
@@ -102,7 +105,7 @@ class CascadedUnion():
 
         self._factory = geoms[0]._factory
 
-        index = STRtree(CascadedUnion.STRTREE_NODE_CAPACITY)
+        index = self.indexClass(CascadedUnion.STRTREE_NODE_CAPACITY)
 
         for geom in geoms:
             index.insert(geom.envelope, geom)
@@ -36,7 +36,7 @@ from .algorithms import (
     LineIntersector,
     MCPointInRing
     )
-from .index_strtree import STRtree
+from .index_strtree import STRtree, PackedSTRtree
 from .shared import (
     logger,
     GeomTypeId,
@@ -385,6 +385,9 @@ class IndexedNestedRingTester():
      * nested inside another ring in the set, using a spatial
      * index to speed up the comparisons.
     """
+    # Spatial index class, STRtree or PackedSTRtree
+    indexClass = STRtree
+
     def __init__(self, newGraph):
         self._graph = newGraph
         self._index = None
@@ -398,19 +401,32 @@ class IndexedNestedRingTester():
         self._rings.append(ring)
 
     def buildIndex(self):
-        self._index = STRtree()
+        self._index = self.indexClass()
         for ring in self._rings:
             env = ring.envelope
             self._index.insert(env, ring)
 
+    def _queryRings(self):
+        """
+         * Yield rings and rings of index intersecting their envelope
+        """
+        if isinstance(self._index, PackedSTRtree):
+            items = self._index.items
+            offsets, indexes = self._index.query_many([ring.envelope for ring in self._rings])
+            for i, ring in enumerate(self._rings):
+                yield ring, [items[j] for j in indexes[offsets[i]:offsets[i + 1]]]
+        else:
+            for ring in self._rings:
+                results = []
+                self._index.query(ring.envelope, results)
+                yield ring, results
+
     @property
     def isNonNested(self):
         self.buildIndex()
-        for innerRing in self._rings:
+        for innerRing, results in self._queryRings():
             # CoordinateSequence
             innerRingPts = innerRing.coords
-            results = []
-            self._index.query(innerRing.envelope, results)
             for searchRing in results:
                 searchRingPts = searchRing.coords
                 if innerRing == searchRing:
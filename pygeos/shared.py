@@ -24,39 +24,12 @@
 # ----------------------------------------------------------
 
 
+import numpy as np
 from math import sqrt, log, ceil, floor
 import logging
 logger = logging.getLogger("pygeos")
 
 
-def quicksort(array, sortFunc, begin=0, end=None):
-    """
-     * Quick sort in place array
-     * @param array: the array to sort in place
-     * @param sortFunc: function(@a, @b) -> bool to compare two items
-    """
-    if end is None:
-        end = len(array) - 1
-
-    def _partition(array, begin, end):
-        pivot = begin
-        for i in range(begin + 1, end + 1):
-            if sortFunc(array[i], array[begin]):
-                pivot += 1
-                array[i], array[pivot] = array[pivot], array[i]
-        array[pivot], array[begin] = array[begin], array[pivot]
-        return pivot
-
-    def _quicksort(array, begin, end):
-        if begin >= end:
-            return
-        pivot = _partition(array, begin, end)
-        _quicksort(array, begin, pivot - 1)
-        _quicksort(array, pivot + 1, end)
-
-    return _quicksort(array, begin, end)
-
-
 class CAP_STYLE():
     """
      * Buffer operation Cap options
@@ -637,6 +610,8 @@ class Envelope():
      * the supplies extent values are automatically sorted into the correct order.
      *
     """
+    __slots__ = ('minx', 'maxx', 'miny', 'maxy')
+
     def __init__(self, x1=None, y1=None, x2=None, y2=None):
         """
          * Creates an Envelope for a region defined by
@@ -1475,6 +1450,8 @@ class Coordinate():
     * The standard comparison functions will ignore the z-ordinate.
     *
     """
+    __slots__ = ('x', 'y', 'z')
+
     def __init__(self, x: float=0, y: float=0, z: float=0):
         self.x = x
         self.y = y
@@ -1531,7 +1508,7 @@ class Coordinate():
         return self.x * other.x + self.y * other.y + self.z * other.z
 
     def __mul__(self, scalar):
-        if type(scalar).__name__ == 'Coordinate':
+        if isinstance(scalar, Coordinate):
             return self.dot(scalar)
         return Coordinate(self.x * scalar, self.y * scalar, self.z * scalar)
 
@@ -1692,6 +1669,8 @@ class CoordinateSequence(list):
 
     @staticmethod
     def _removeRepeatedPoints(coords):
+        if isinstance(coords, ArrayCoordinateSequence):
+            return ArrayCoordinateSequence._removeRepeatedPoints(coords)
         return [c for i, c in enumerate(coords) if i == 0 or coords[i] != coords[i - 1]]
 
     def add(self, coords, allowRepeated: bool=True, direction: bool=True) -> bool:
@@ -1708,7 +1687,7 @@ class CoordinateSequence(list):
          *  @return true (as by general collection contract)
         """
 
-        if type(coords).__name__ == 'Coordinate':
+        if isinstance(coords, Coordinate):
 
             if not allowRepeated and coords == self[-1]:
                 return False
@@ -1749,10 +1728,14 @@ class CoordinateSequence(list):
 
     @staticmethod
     def removeRepeatedPoints(coords):
+        if isinstance(coords, ArrayCoordinateSequence):
+            return ArrayCoordinateSequence._removeRepeatedPoints(coords).copy()
         return CoordinateSequence(CoordinateSequence._removeRepeatedPoints(coords))
 
     @staticmethod
     def hasRepeatedPoints(coords) -> bool:
+        if isinstance(coords, ArrayCoordinateSequence):
+            return coords._hasRepeatedPoints()
         for i in range(1, len(coords)):
             if coords[i - 1] == coords[i]:
                 return True
@@ -1867,6 +1850,376 @@ class CoordinateSequence(list):
         return "({})".format(", ".join([str(c) for c in self[::-1]]))
 
 
+class CoordinateView(Coordinate):
+    """
+     * Coordinate stored in a row of an ArrayCoordinateSequence buffer.
+     *
+     * Ordinates are read from and written to the buffer, so changes
+     * made by filters are seen by the sequence.
+    """
+    __slots__ = ('_data', '_index')
+
+    def __init__(self, data, index: int):
+        self._data = data
+        self._index = index
+
+    @property
+    def x(self) -> float:
+        return float(self._data[self._index, 0])
+
+    @x.setter
+    def x(self, value: float) -> None:
+        self._data[self._index, 0] = value
+
+    @property
+    def y(self) -> float:
+        return float(self._data[self._index, 1])
+
+    @y.setter
+    def y(self, value: float) -> None:
+        self._data[self._index, 1] = value
+
+    @property
+    def z(self) -> float:
+        return float(self._data[self._index, 2])
+
+    @z.setter
+    def z(self, value: float) -> None:
+        self._data[self._index, 2] = value
+
+
+class ArrayCoordinateSequence():
+    """
+     * CoordinateSequence storing coordinates in a (N, 3) float64 array
+     *
+     * Items are CoordinateView of buffer rows, slices are sequences
+     * sharing the same buffer, so ordinates changes are seen by both
+     * as with a list of shared Coordinate.
+     * Operations changing coordinates count or order never write
+     * into a shared buffer.
+     *
+     * Envelope, repeated points, reverse, signed area and length
+     * are computed on arrays.
+     *
+     * Use ArrayCoordinateSequenceFactory to create geometries
+     * using this implementation.
+    """
+    def __init__(self, coords=None, allowRepeated: bool=True, direction: bool=True):
+        self._buf = np.zeros((0, 3), dtype=np.float64)
+        self._n = 0
+        # buffer is shared with other sequences
+        self._shared = False
+        if coords is not None:
+            self.add(coords, allowRepeated, direction)
+
+    @staticmethod
+    def fromArray(data):
+        """
+         * Sequence using a (N, 3) array as buffer, without copy
+        """
+        seq = ArrayCoordinateSequence()
+        seq._buf = data
+        seq._n = data.shape[0]
+        seq._shared = True
+        return seq
+
+    @staticmethod
+    def toArray(coords):
+        """
+         * (N, 3) array of coords
+        """
+        if isinstance(coords, ArrayCoordinateSequence):
+            return coords.data
+        if isinstance(coords, np.ndarray):
+            return coords.reshape(-1, 3)
+        data = [(co.x, co.y, co.z) for co in coords]
+        if len(data) == 0:
+            return np.zeros((0, 3), dtype=np.float64)
+        return np.array(data, dtype=np.float64)
+
+    @property
+    def data(self):
+        """
+         * (N, 3) array view of coordinates
+        """
+        return self._buf[:self._n]
+
+    def _reserve(self, count: int) -> None:
+        """
+         * Ensure buffer is not shared and has room for count more coordinates
+        """
+        size = self._n + count
+        if self._shared or size > self._buf.shape[0]:
+            buf = np.empty((max(size, 2 * self._n, 8), 3), dtype=np.float64)
+            buf[:self._n] = self._buf[:self._n]
+            self._buf = buf
+            self._shared = False
+
+    def _replace(self, data) -> None:
+        self._buf = data
+        self._n = data.shape[0]
+        self._shared = False
+
+    def _index(self, index: int) -> int:
+        if index < 0:
+            index += self._n
+        if not 0 <= index < self._n:
+            raise IndexError("ArrayCoordinateSequence index out of range")
+        return index
+
+    def _find(self, coord):
+        """
+         * Mask of coordinates equals in 2d to coord
+        """
+        data = self.data
+        return (data[:, 0] == coord.x) & (data[:, 1] == coord.y)
+
+    # list interface
+
+    def __len__(self) -> int:
+        return self._n
+
+    def __iter__(self):
+        buf = self._buf
+        return (CoordinateView(buf, i) for i in range(self._n))
+
+    def __reversed__(self):
+        buf = self._buf
+        return (CoordinateView(buf, i) for i in range(self._n - 1, -1, -1))
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            self._shared = True
+            return ArrayCoordinateSequence.fromArray(self.data[index])
+        return CoordinateView(self._buf, self._index(index))
+
+    def __setitem__(self, index, coords) -> None:
+        if isinstance(index, slice):
+            start, stop, step = index.indices(self._n)
+            values = ArrayCoordinateSequence.toArray(coords)
+            if step == 1:
+                stop = max(start, stop)
+                self._replace(np.concatenate((self.data[:start], values, self.data[stop:])))
+            else:
+                data = self.data.copy()
+                data[index] = values
+                self._replace(data)
+        else:
+            index = self._index(index)
+            # slices must keep their values, as they would keep their objects
+            self._reserve(0)
+            self._buf[index] = (coords.x, coords.y, coords.z)
+
+    def __delitem__(self, index) -> None:
+        if not isinstance(index, slice):
+            index = self._index(index)
+        self._replace(np.delete(self.data, np.arange(self._n)[index], axis=0))
+
+    def __contains__(self, coord) -> bool:
+        return bool(self._find(coord).any())
+
+    def __add__(self, other):
+        return ArrayCoordinateSequence.fromArray(
+            np.concatenate((self.data, ArrayCoordinateSequence.toArray(other))))
+
+    def __radd__(self, other):
+        return ArrayCoordinateSequence.fromArray(
+            np.concatenate((ArrayCoordinateSequence.toArray(other), self.data)))
+
+    def index(self, coord, start: int=0, stop: int=None) -> int:
+        found = np.flatnonzero(self._find(coord)[start:stop])
+        if found.shape[0] == 0:
+            raise ValueError("{} is not in ArrayCoordinateSequence".format(coord))
+        return start + int(found[0])
+
+    def count(self, coord) -> int:
+        return int(self._find(coord).sum())
+
+    def append(self, coord) -> None:
+        self._reserve(1)
+        self._buf[self._n] = (coord.x, coord.y, coord.z)
+        self._n += 1
+
+    def extend(self, coords) -> None:
+        values = ArrayCoordinateSequence.toArray(coords)
+        count = values.shape[0]
+        self._reserve(count)
+        self._buf[self._n:self._n + count] = values
+        self._n += count
+
+    def insert(self, index: int, coord) -> None:
+        index = min(max(0, index + self._n if index < 0 else index), self._n)
+        self._replace(np.insert(self.data, index, (coord.x, coord.y, coord.z), axis=0))
+
+    def pop(self, index: int=-1):
+        index = self._index(index)
+        x, y, z = self._buf[index]
+        del self[index]
+        return Coordinate(float(x), float(y), float(z))
+
+    def clear(self) -> None:
+        self._replace(np.zeros((0, 3), dtype=np.float64))
+
+    def reverse(self) -> None:
+        self._replace(self.data[::-1].copy())
+
+    def copy(self):
+        return ArrayCoordinateSequence.fromArray(self.data.copy())
+
+    # CoordinateSequence interface
+
+    @property
+    def is_empty(self) -> bool:
+        return self._n == 0
+
+    @staticmethod
+    def _repeated(data):
+        """
+         * Mask of coordinates equals in 2d to previous one
+        """
+        x, y = data[:, 0], data[:, 1]
+        return (x[1:] == x[:-1]) & (y[1:] == y[:-1])
+
+    def _hasRepeatedPoints(self) -> bool:
+        return bool(ArrayCoordinateSequence._repeated(self.data).any())
+
+    @staticmethod
+    def _removeRepeatedPoints(coords):
+        data = ArrayCoordinateSequence.toArray(coords)
+        if data.shape[0] < 2:
+            return ArrayCoordinateSequence.fromArray(data)
+        keep = np.ones(data.shape[0], dtype=np.bool_)
+        keep[1:] = ~ArrayCoordinateSequence._repeated(data)
+        if keep.all():
+            return ArrayCoordinateSequence.fromArray(data)
+        return ArrayCoordinateSequence.fromArray(data[keep])
+
+    def add(self, coords, allowRepeated: bool=True, direction: bool=True) -> bool:
+        """
+         *  Add an array of coordinates
+         *
+         *  @param cl The coordinates
+         *
+         *  @param allowRepeated
+         *  if set to false, repeated coordinates are collapsed
+         *
+         *  @param direction if false, the array is added in reverse order
+         *
+         *  @return true (as by general collection contract)
+        """
+        if isinstance(coords, Coordinate):
+
+            if not allowRepeated and self._n > 0 and coords == self[-1]:
+                return False
+
+            self.append(coords)
+            return True
+
+        data = ArrayCoordinateSequence.toArray(coords)
+
+        if not direction:
+            data = data[::-1]
+
+        if not allowRepeated:
+            data = ArrayCoordinateSequence._removeRepeatedPoints(data).data
+
+        self.extend(data)
+        return True
+
+    def setPoints(self, coords) -> None:
+        self._replace(ArrayCoordinateSequence.toArray(coords).copy())
+
+    def applyCoordinateFilter(self, f) -> None:
+        for c in self:
+            f.filter(c)
+
+    def expandEnvelope(self, env) -> None:
+        if self._n == 0:
+            return
+        env.expandToInclude(self.envelope)
+
+    @property
+    def envelope(self):
+        """
+         * Envelope of coordinates
+        """
+        if self._n == 0:
+            return Envelope()
+        x, y = self.data[:, 0], self.data[:, 1]
+        return Envelope(float(x.min()), float(y.min()), float(x.max()), float(y.max()))
+
+    @property
+    def isClosed(self) -> bool:
+        data = self.data
+        return self._n > 0 and bool(np.all(data[0, 0:2] == data[-1, 0:2]))
+
+    @property
+    def isRing(self) -> bool:
+        """
+         * Closed, with at least 3 distinct points
+        """
+        if self._n < 4 or not self.isClosed:
+            return False
+        return ArrayCoordinateSequence._removeRepeatedPoints(self)._n > 3
+
+    def signedArea(self) -> float:
+        """
+         * Signed area of ring, positive when ring is clockwise
+         * @see CGAlgorithms.signedArea
+        """
+        if self._n < 3:
+            return 0.0
+        data = self.data
+        x = data[:, 0] - data[0, 0]
+        y = data[:, 1]
+        return -float(np.sum(x[:-1] * y[1:] - x[1:] * y[:-1])) / 2.0
+
+    def length(self) -> float:
+        if self._n < 2:
+            return 0.0
+        data = self.data
+        return float(np.hypot(np.diff(data[:, 0]), np.diff(data[:, 1])).sum())
+
+    def apply_ro(self, filter):
+        for coord in self:
+            filter.filter_ro(coord)
+
+    def apply_rw(self, filter):
+        for coord in self:
+            filter.filter_rw(coord)
+
+    def clone(self):
+        return self.copy()
+
+    def almost_equals(self, other, tolerance):
+        if self is other:
+            return True
+        if other is None:
+            return False
+        if len(self) != len(other):
+            return False
+        delta = self.data[:, 0:2] - ArrayCoordinateSequence.toArray(other)[:, 0:2]
+        return not bool(np.any(np.hypot(delta[:, 0], delta[:, 1]) > tolerance))
+
+    def __eq__(self, other) -> bool:
+        if self is other:
+            return True
+        if other is None or len(self) != len(other):
+            return False
+        return bool(np.all(self.data[:, 0:2] == ArrayCoordinateSequence.toArray(other)[:, 0:2]))
+
+    def __ne__(self, other) -> bool:
+        return not self.__eq__(other)
+
+    __hash__ = None
+
+    def __str__(self) -> str:
+        return "({})".format(", ".join([str(c) for c in self]))
+
+    def printReverse(self) -> str:
+        return "({})".format(", ".join([str(c) for c in reversed(self)]))
+
+
 class CoordinateFilter():
     """
      * Geometry classes support the concept of applying a
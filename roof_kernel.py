@@ -0,0 +1,159 @@
+# -*- coding:utf-8 -*-
+
+# ##### BEGIN GPL LICENSE BLOCK #####
+#
+#  This program is free software; you can redistribute it and/or
+#  modify it under the terms of the GNU General Public License
+#  as published by the Free Software Foundation; either version 2
+#  of the License, or (at your option) any later version.
+#
+#  This program is distributed in the hope that it will be useful,
+#  but WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#  GNU General Public License for more details.
+#
+#  You should have received a copy of the GNU General Public License
+#  along with this program; if not, write to the Free Software Foundation,
+#  Inc., 51 Franklin Street, Fifth Floor, Boston, MA 02110- 1301, USA.
+#
+# ##### END GPL LICENSE BLOCK #####
+
+# <pep8 compliant>
+
+# ----------------------------------------------------------
+# Author: Stephen Leger (s-leger)
+#
+# ----------------------------------------------------------
+# Per pan roof tiles kernel
+# Pans are independent once roof topology is known, so
+# tiles of each pan are computed in worker processes
+# from a plain description, bissect and merged by caller
+# Pure numpy, does not depend on bpy nor mathutils
+# ----------------------------------------------------------
+import os
+import sys
+import numpy as np
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import get_context
+from .roof_tiles import get_template, grid_offsets, instanciate
+from .clip2d import INSIDE, BOUNDARY
+
+
+# pans count under which workers overhead is not worth it
+MIN_PANS = 4
+
+
+class TilePan():
+    """
+        Plain description of tiles of a pan
+        model: tile model name
+        tM: 3x4 pan matrix (rows), pan space to object space
+        size: tile size (sx, sy, sz)
+        grid: (n_x, n_y, dx, dy, x0) as grid_offsets args
+        alternate, extra: grid_offsets options
+        seed: random seed of material index
+        matids: (first material index, random range)
+        boundary: 2d ring of pan with borders, None when curved
+        holes: list of 2d rings
+    """
+    def __init__(self, model, tM, size, grid, alternate, extra, seed, matids, boundary, holes):
+        self.model = model
+        self.tM = tM
+        self.size = size
+        self.grid = grid
+        self.alternate = alternate
+        self.extra = extra
+        self.seed = seed
+        self.matids = matids
+        self.boundary = boundary
+        self.holes = holes
+
+
+def pan_tiles(pan):
+    """
+        Instanciate tiles of a pan and pre-clip footprint,
+        so only tiles on boundary go through bissect
+        return inside, boundary TileArrays
+        inside is None when pan boundary is not available
+    """
+    template = get_template(pan.model)
+    n_x, n_y, dx, dy, x0 = pan.grid
+    offsets = grid_offsets(n_x, n_y, dx, dy, x0,
+        alternate=pan.alternate,
+        extra=pan.extra)
+    n_tiles = offsets.shape[0]
+    idmat, rand = pan.matids
+    rng = np.random.RandomState(pan.seed)
+    tiles = instanciate(template, pan.tM, pan.size, offsets,
+        rng.randint(idmat, idmat + rand + 1, n_tiles))
+
+    if pan.boundary is None or None in pan.holes:
+        return None, tiles
+
+    # bottom bissect plane is not vertical so expand footprint
+    # by tile height
+    margin = pan.size[2] * float(abs(template.pts[:, 2]).max()) + 0.002
+    state = tiles.classify(pan.boundary, pan.holes, margin)
+    return tiles.select(state == INSIDE), tiles.select(state == BOUNDARY)
+
+
+
+class PanPool():
+    """
+        Process pool computing pans in parallel
+        max_workers: 0 for cpu count, 1 to disable
+        Workers are forked so modules are inherited, fork is only
+        safe on linux, other platforms run on main thread as do
+        failures to spawn workers
+    """
+    def __init__(self, max_workers=0):
+        self.max_workers = max_workers
+        self.executor = None
+        # workers failed, disabled until next setup
+        self.broken = False
+
+    @property
+    def workers(self):
+        if self.broken or not sys.platform.startswith("linux"):
+            return 1
+        if self.max_workers < 1:
+            return os.cpu_count() or 1
+        return self.max_workers
+
+    def setup(self, max_workers):
+        if max_workers != self.max_workers:
+            self.shutdown()
+        self.max_workers = max_workers
+        self.broken = False
+
+    def shutdown(self):
+        if self.executor is not None:
+            self.executor.shutdown(wait=False)
+            self.executor = None
+
+    def start(self):
+        try:
+            return ProcessPoolExecutor(max_workers=self.workers, mp_context=get_context("fork"))
+        except TypeError:
+            # python < 3.7, fork is the default on linux
+            return ProcessPoolExecutor(max_workers=self.workers)
+
+    def map(self, fn, items, parallel=True):
+        """
+            Results of fn for each item, in items order
+            parallel: False to run on main thread
+        """
+        workers = min(self.workers, len(items))
+        if parallel and workers > 1 and len(items) >= MIN_PANS:
+            try:
+                if self.executor is None:
+                    self.executor = self.start()
+                return list(self.executor.map(fn, items))
+            except Exception as ex:
+                print("PanPool.map failed, run on main thread: %s" % ex)
+                self.shutdown()
+                self.broken = True
+        return [fn(item) for item in items]
+
+
+pan_pool = PanPool()
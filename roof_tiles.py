@@ -0,0 +1,354 @@
+# -*- coding:utf-8 -*-
+
+# ##### BEGIN GPL LICENSE BLOCK #####
+#
+#  This program is free software; you can redistribute it and/or
+#  modify it under the terms of the GNU General Public License
+#  as published by the Free Software Foundation; either version 2
+#  of the License, or (at your option) any later version.
+#
+#  This program is distributed in the hope that it will be useful,
+#  but WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#  GNU General Public License for more details.
+#
+#  You should have received a copy of the GNU General Public License
+#  along with this program; if not, write to the Free Software Foundation,
+#  Inc., 51 Franklin Street, Fifth Floor, Boston, MA 02110- 1301, USA.
+#
+# ##### END GPL LICENSE BLOCK #####
+
+# <pep8 compliant>
+
+# ----------------------------------------------------------
+# Author: Stephen Leger (s-leger)
+#
+# ----------------------------------------------------------
+# Roof tiles instancing engine
+# Pure numpy, does not depend on bpy nor mathutils
+# ----------------------------------------------------------
+import numpy as np
+from .clip2d import classify_boxes, ring_segments, ring_area, clip_convex
+
+
+# tile templates in tile space
+# x in [0, 1] along pan axis, y in [-1, 0] along slope, z above surface
+TILE_MODELS = {
+    'BRAAS2': (
+        [
+            (0.06, -1.0, 1.0), (0.19, -1.0, 0.5), (0.31, -1.0, 0.5), (0.44, -1.0, 1.0),
+            (0.56, -1.0, 1.0), (0.69, -1.0, 0.5), (0.81, -1.0, 0.5), (0.94, -1.0, 1.0),
+            (0.06, 0.0, 0.5), (0.19, 0.0, 0.0), (0.31, 0.0, 0.0), (0.44, 0.0, 0.5),
+            (0.56, 0.0, 0.5), (0.69, 0.0, 0.0), (0.81, 0.0, 0.0), (0.94, 0.0, 0.5),
+            (-0.0, -1.0, 1.0), (-0.0, 0.0, 0.5), (1.0, -1.0, 1.0), (1.0, 0.0, 0.5)
+        ],
+        [
+            (16, 0, 8, 17), (0, 1, 9, 8), (1, 2, 10, 9), (2, 3, 11, 10),
+            (3, 4, 12, 11), (4, 5, 13, 12), (5, 6, 14, 13), (6, 7, 15, 14), (7, 18, 19, 15)
+        ]),
+    'BRAAS1': (
+        [
+            (0.1, -1.0, 1.0), (0.2, -1.0, 0.5), (0.6, -1.0, 0.5), (0.7, -1.0, 1.0),
+            (0.1, 0.0, 0.5), (0.2, 0.0, 0.0), (0.6, 0.0, 0.0), (0.7, 0.0, 0.5),
+            (-0.0, -1.0, 1.0), (-0.0, 0.0, 0.5), (1.0, -1.0, 1.0), (1.0, 0.0, 0.5)
+        ],
+        [(8, 0, 4, 9), (0, 1, 5, 4), (1, 2, 6, 5), (2, 3, 7, 6), (3, 10, 11, 7)]),
+    'ETERNIT': (
+        [
+            (0.11, -1.0, 1.0), (0.9, -1.0, 1.0), (0.0, -0.79, 0.79),
+            (1.0, -0.79, 0.79), (0.0, 2.0, -2.0), (1.0, 2.0, -2.0)
+        ],
+        [(0, 1, 3, 5, 4, 2)]),
+    'ONDULEE': (
+        [
+            (0.0, -1.0, 0.1), (0.05, -1.0, 1.0), (0.1, -1.0, 0.1),
+            (0.15, -1.0, 1.0), (0.2, -1.0, 0.1), (0.25, -1.0, 1.0),
+            (0.3, -1.0, 0.1), (0.35, -1.0, 1.0), (0.4, -1.0, 0.1),
+            (0.45, -1.0, 1.0), (0.5, -1.0, 0.1), (0.55, -1.0, 1.0),
+            (0.6, -1.0, 0.1), (0.65, -1.0, 1.0), (0.7, -1.0, 0.1),
+            (0.75, -1.0, 1.0), (0.8, -1.0, 0.1), (0.85, -1.0, 1.0),
+            (0.9, -1.0, 0.1), (0.95, -1.0, 1.0), (1.0, -1.0, 0.1),
+            (0.0, 0.0, 0.0), (0.05, 0.0, 0.9), (0.1, 0.0, 0.0),
+            (0.15, 0.0, 0.9), (0.2, 0.0, 0.0), (0.25, 0.0, 0.9),
+            (0.3, 0.0, 0.0), (0.35, 0.0, 0.9), (0.4, 0.0, 0.0),
+            (0.45, 0.0, 0.9), (0.5, 0.0, 0.0), (0.55, 0.0, 0.9),
+            (0.6, 0.0, 0.0), (0.65, 0.0, 0.9), (0.7, 0.0, 0.0),
+            (0.75, 0.0, 0.9), (0.8, 0.0, 0.0), (0.85, 0.0, 0.9),
+            (0.9, 0.0, 0.0), (0.95, 0.0, 0.9), (1.0, 0.0, 0.0)
+        ],
+        [
+            (0, 1, 22, 21), (1, 2, 23, 22), (2, 3, 24, 23),
+            (3, 4, 25, 24), (4, 5, 26, 25), (5, 6, 27, 26),
+            (6, 7, 28, 27), (7, 8, 29, 28), (8, 9, 30, 29),
+            (9, 10, 31, 30), (10, 11, 32, 31), (11, 12, 33, 32),
+            (12, 13, 34, 33), (13, 14, 35, 34), (14, 15, 36, 35),
+            (15, 16, 37, 36), (16, 17, 38, 37), (17, 18, 39, 38),
+            (18, 19, 40, 39), (19, 20, 41, 40)
+        ]),
+    'METAL': (
+        [
+            (0.0, -1.0, 0.0), (0.99, -1.0, 0.0), (1.0, -1.0, 0.0),
+            (0.0, 0.0, 0.0), (0.99, 0.0, 0.0), (1.0, 0.0, 0.0),
+            (0.99, -1.0, 1.0), (1.0, -1.0, 1.0), (1.0, 0.0, 1.0), (0.99, 0.0, 1.0)
+        ],
+        [(0, 1, 4, 3), (7, 2, 5, 8), (1, 6, 9, 4), (6, 7, 8, 9)]),
+    'LAUZE': (
+        [
+            (0.75, -0.8, 0.8), (0.5, -1.0, 1.0), (0.25, -0.8, 0.8),
+            (0.0, -0.5, 0.5), (1.0, -0.5, 0.5), (0.0, 0.5, -0.5), (1.0, 0.5, -0.5)
+        ],
+        [(1, 0, 4, 6, 5, 3, 2)]),
+    'PLACEHOLDER': (
+        [(0.0, -1.0, 1.0), (1.0, -1.0, 1.0), (0.0, 0.0, 0.0), (1.0, 0.0, 0.0)],
+        [(0, 1, 3, 2)]),
+    'ROMAN': (
+        [
+            (0.18, 0.0, 0.3), (0.24, 0.0, 0.58), (0.76, 0.0, 0.58),
+            (0.82, 0.0, 0.3), (0.05, -1.0, 0.5), (0.14, -1.0, 0.8),
+            (0.86, -1.0, 0.8), (0.95, -1.0, 0.5), (0.45, 0.0, 0.5),
+            (0.36, 0.0, 0.2), (-0.36, 0.0, 0.2), (-0.45, -0.0, 0.5),
+            (0.32, -1.0, 0.7), (0.26, -1.0, 0.42), (-0.26, -1.0, 0.42),
+            (-0.32, -1.0, 0.7), (0.5, 0.0, 0.74), (0.5, -1.0, 1.0),
+            (-0.0, -1.0, 0.26), (-0.0, 0.0, 0.0)
+        ],
+        [
+            (0, 4, 5, 1), (16, 17, 6, 2), (2, 6, 7, 3),
+            (13, 12, 8, 9), (18, 13, 9, 19), (15, 14, 10, 11),
+            (14, 18, 19, 10), (1, 5, 17, 16)
+        ]),
+    'ROUND': (
+        [
+            (0.0, -0.5, 0.5), (1.0, -0.5, 0.5), (0.0, 0.0, 0.0),
+            (1.0, 0.0, 0.0), (0.93, -0.71, 0.71), (0.78, -0.88, 0.88),
+            (0.39, -0.97, 0.97), (0.61, -0.97, 0.97), (0.07, -0.71, 0.71),
+            (0.22, -0.88, 0.88)
+        ],
+        [(6, 7, 5, 4, 1, 3, 2, 0, 8, 9)])
+    }
+
+
+class TileTemplate():
+    """
+        Packed tile template
+        pts: (P, 3) array of template points in tile space
+        loops: (L,) flat array of point index for each face loop
+        totals: (F,) number of loops of each face
+        uvs: (L, 2) uv of each loop, taken from tile space x y
+    """
+    def __init__(self, pts, faces):
+        self.pts = np.array(pts, dtype=np.float64)
+        self.totals = np.array([len(f) for f in faces], dtype=np.int32)
+        self.loops = np.array([i for f in faces for i in f], dtype=np.int32)
+        self.uvs = self.pts[self.loops, 0:2]
+
+    @property
+    def n_pts(self):
+        return self.pts.shape[0]
+
+    @property
+    def n_faces(self):
+        return self.totals.shape[0]
+
+    @property
+    def n_loops(self):
+        return self.loops.shape[0]
+
+
+def get_template(tile_model):
+    """
+        Return a TileTemplate for given model or None when not found
+    """
+    if tile_model not in TILE_MODELS:
+        return None
+    pts, faces = TILE_MODELS[tile_model]
+    return TileTemplate(pts, faces)
+
+
+def grid_offsets(n_x, n_y, dx, dy, x0, alternate=False, extra=False):
+    """
+        Tiles offsets in pan space, rows ordered from top to bottom
+        n_x, n_y: number of tiles on x and y axis
+        dx, dy: space between tiles
+        x0: start of row
+        alternate: odd rows start half a tile before and have one more tile
+        extra: add one tile to each row (offset)
+        return (N, 2) array of (x, -y) offsets
+    """
+    rows = np.arange(n_y)
+    nx = np.full(n_y, n_x, dtype=np.int64)
+    row_x0 = np.full(n_y, x0, dtype=np.float64)
+    if alternate:
+        odd = (rows % 2) == 1
+        row_x0[odd] -= 0.5 * dx
+        nx[odd] += 1
+    if extra:
+        nx += 1
+    n_tiles = int(nx.sum())
+    row = np.repeat(rows, nx)
+    # column index inside each row
+    start = np.repeat(np.cumsum(nx) - nx, nx)
+    col = np.arange(n_tiles) - start
+    offsets = np.empty((n_tiles, 2), dtype=np.float64)
+    offsets[:, 0] = row_x0[row] + col * dx
+    offsets[:, 1] = -row * dy
+    return offsets
+
+
+class TileArrays():
+    """
+        Flat mesh arrays for a set of tile instances
+        verts: (N * P, 3)
+        loops: (N * L,) vertex index of each loop
+        totals: (N * F,) loop count of each face
+        matids: (N * F,)
+        uvs: (N * L, 2)
+        n_tiles: number of tiles N, each tile has P verts F faces and L loops
+    """
+    def __init__(self, verts, loops, totals, matids, uvs, n_tiles):
+        self.verts = verts
+        self.loops = loops
+        self.totals = totals
+        self.matids = matids
+        self.uvs = uvs
+        self.n_tiles = n_tiles
+
+    @property
+    def nbytes(self):
+        return (self.verts.nbytes + self.loops.nbytes + self.totals.nbytes +
+            self.matids.nbytes + self.uvs.nbytes)
+
+    @property
+    def tile_pts(self):
+        return self.verts.shape[0] // max(1, self.n_tiles)
+
+    @property
+    def tile_faces(self):
+        return self.totals.shape[0] // max(1, self.n_tiles)
+
+    @property
+    def tile_loops(self):
+        return self.loops.shape[0] // max(1, self.n_tiles)
+
+    def select(self, mask):
+        """
+            Return a new TileArrays with tiles where mask is True
+            mask: (N,) bool array
+        """
+        n_tiles = self.n_tiles
+        p, f, l = self.tile_pts, self.tile_faces, self.tile_loops
+        index = np.flatnonzero(mask)
+        n_sel = index.shape[0]
+        loops = self.loops.reshape(n_tiles, l)[index]
+        loops = loops + ((np.arange(n_sel) - index) * p)[:, None].astype(loops.dtype)
+        return TileArrays(
+            self.verts.reshape(n_tiles, p, 3)[index].reshape(-1, 3),
+            loops.ravel(),
+            self.totals.reshape(n_tiles, f)[index].ravel(),
+            self.matids.reshape(n_tiles, f)[index].ravel(),
+            self.uvs.reshape(n_tiles, l, 2)[index].reshape(-1, 2),
+            n_sel
+            )
+
+    def classify(self, boundary, holes=[], margin=0):
+        """
+            Classify tiles footprint against a 2d polygon with holes
+            boundary: (M, 2) ring
+            holes: list of (K, 2) rings
+            margin: footprint expand, to account for bissect planes not vertical
+            return (N,) array of clip2d OUTSIDE, INSIDE, BOUNDARY
+        """
+        xy = self.verts.reshape(self.n_tiles, self.tile_pts, 3)[:, :, 0:2]
+        boxes = np.empty((self.n_tiles, 4), dtype=np.float64)
+        boxes[:, 0:2] = xy.min(axis=1) - margin
+        boxes[:, 2:4] = xy.max(axis=1) + margin
+        centers = 0.5 * (boxes[:, 0:2] + boxes[:, 2:4])
+        return classify_boxes(boxes, centers, boundary, holes)
+
+    @property
+    def n_faces(self):
+        return self.totals.shape[0]
+
+    def clip(self, boundary):
+        """
+            Clip flat single face tiles by a convex 2d ring
+            uvs are interpolated, assuming an affine mapping
+            boundary: (M, 2) convex ring
+            return TileArrays holding clipped faces as a single tile
+        """
+        verts, totals, matids, uvs = [], [], [], []
+        n_tiles, p, l = self.n_tiles, self.tile_pts, self.tile_loops
+        if n_tiles < 1:
+            return empty_arrays()
+        a, b = ring_segments(boundary)
+        sign = 1 if ring_area(a, b) >= 0 else -1
+        loops = self.loops.reshape(n_tiles, l) - (np.arange(n_tiles) * p)[:, None]
+        co = self.verts.reshape(n_tiles, p, 3)[np.arange(n_tiles)[:, None], loops]
+        tile_uvs = self.uvs.reshape(n_tiles, l, 2)
+        # affine xy -> uv mapping from 3 first loops of each tile
+        m = np.ones((n_tiles, 3, 3), dtype=np.float64)
+        m[:, :, 0:2] = co[:, 0:3, 0:2]
+        valid = np.abs(np.linalg.det(m)) > 1e-12
+        m[~valid] = np.eye(3)
+        uv_tM = np.linalg.solve(m, tile_uvs[:, 0:3])
+        for i in np.flatnonzero(valid):
+            pts = clip_convex(co[i, :, 0:2], a, b, sign)
+            n_pts = pts.shape[0]
+            if n_pts < 3:
+                continue
+            co_i = np.empty((n_pts, 3), dtype=np.float64)
+            co_i[:, 0:2] = pts
+            co_i[:, 2] = co[i, 0, 2]
+            verts.append(co_i)
+            totals.append(n_pts)
+            matids.append(self.matids[i])
+            uvs.append(pts.dot(uv_tM[i, 0:2]) + uv_tM[i, 2])
+        if len(verts) < 1:
+            return empty_arrays()
+        n_loops = sum(totals)
+        return TileArrays(
+            np.concatenate(verts),
+            np.arange(n_loops, dtype=np.int32),
+            np.array(totals, dtype=np.int32),
+            np.array(matids, dtype=np.int32),
+            np.concatenate(uvs),
+            1)
+
+
+def empty_arrays():
+    """
+        TileArrays without any tile
+    """
+    return TileArrays(
+        np.zeros((0, 3), dtype=np.float64),
+        np.zeros(0, dtype=np.int32),
+        np.zeros(0, dtype=np.int32),
+        np.zeros(0, dtype=np.int32),
+        np.zeros((0, 2), dtype=np.float64),
+        0)
+
+
+def instanciate(template, tM, size, offsets, matids):
+    """
+        Broadcast tile template over offsets in a single pass
+        template: TileTemplate
+        tM: 3x4 pan matrix (rows), pan space to object space
+        size: tile size (sx, sy, sz)
+        offsets: (N, 2) tiles offsets in pan space as returned by grid_offsets
+        matids: (N,) material index of each tile
+        return TileArrays
+    """
+    tM = np.asarray(tM, dtype=np.float64)
+    n_tiles = offsets.shape[0]
+    n_pts = template.n_pts
+    local = template.pts * np.asarray(size, dtype=np.float64)
+    # (N, P, 3) tile points in pan space
+    pts = np.empty((n_tiles, n_pts, 3), dtype=np.float64)
+    pts[:] = local
+    pts[:, :, 0:2] += offsets[:, None, :]
+    verts = pts.reshape(-1, 3).dot(tM[:, 0:3].T) + tM[:, 3]
+    loops = (template.loops[None, :] + (np.arange(n_tiles, dtype=np.int32) * n_pts)[:, None]).ravel()
+    totals = np.tile(template.totals, n_tiles)
+    face_matids = np.repeat(np.asarray(matids, dtype=np.int32), template.n_faces)
+    uvs = np.tile(template.uvs, (n_tiles, 1))
+    return TileArrays(verts, loops, totals, face_matids, uvs, n_tiles)
+
@@ -0,0 +1,284 @@
+# -*- coding:utf-8 -*-
+
+# ##### BEGIN GPL LICENSE BLOCK #####
+#
+#  This program is free software; you can redistribute it and/or
+#  modify it under the terms of the GNU General Public License
+#  as published by the Free Software Foundation; either version 2
+#  of the License, or (at your option) any later version.
+#
+#  This program is distributed in the hope that it will be useful,
+#  but WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#  GNU General Public License for more details.
+#
+#  You should have received a copy of the GNU General Public License
+#  along with this program; if not, write to the Free Software Foundation,
+#  Inc., 51 Franklin Street, Fifth Floor, Boston, MA 02110- 1301, USA.
+#
+# ##### END GPL LICENSE BLOCK #####
+
+# <pep8 compliant>
+
+# ----------------------------------------------------------
+# Author: Stephen Leger (s-leger)
+#
+# ----------------------------------------------------------
+# Check numpy roof tiles engine, and against per tile Matrix code
+# of couverture() it replaces when mathutils is available
+# Run from archipack folder:
+#   python -m pytest tests
+# ----------------------------------------------------------
+import importlib
+import os
+import sys
+import types
+from math import cos, sin, sqrt
+import numpy as np
+import pytest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def load(name):
+    """
+        Import a pure numpy module of archipack,
+        without running addon __init__ requiring bpy
+    """
+    if "archipack" not in sys.modules:
+        pkg = types.ModuleType("archipack")
+        pkg.__path__ = [ROOT]
+        sys.modules["archipack"] = pkg
+    return importlib.import_module("archipack." + name)
+
+
+roof_tiles = load("roof_tiles")
+clip2d = load("clip2d")
+
+# flat unit square tile, single face
+SQUARE = roof_tiles.TileTemplate([(0, 0, 0), (1, 0, 0), (1, 1, 0), (0, 1, 0)], [(0, 1, 2, 3)])
+IDENTITY = [[1, 0, 0, 0], [0, 1, 0, 0], [0, 0, 1, 0]]
+
+
+def squares(offsets, matids=None):
+    offsets = np.array(offsets, dtype=np.float64)
+    if matids is None:
+        matids = np.arange(offsets.shape[0])
+    return roof_tiles.instanciate(SQUARE, IDENTITY, (1, 1, 1), offsets, matids)
+
+
+def test_grid_offsets():
+    offsets = roof_tiles.grid_offsets(3, 2, 0.5, 0.25, 1)
+    np.testing.assert_allclose(offsets, [
+        (1, 0), (1.5, 0), (2, 0),
+        (1, -0.25), (1.5, -0.25), (2, -0.25)])
+
+
+def test_grid_offsets_alternate_extra():
+    offsets = roof_tiles.grid_offsets(2, 3, 1, 1, 0, alternate=True, extra=True)
+    # odd rows start half a tile before with one more tile, extra add one to every row
+    np.testing.assert_allclose(offsets, [
+        (0, 0), (1, 0), (2, 0),
+        (-0.5, -1), (0.5, -1), (1.5, -1), (2.5, -1),
+        (0, -2), (1, -2), (2, -2)])
+
+
+def test_instanciate_shapes():
+    template = roof_tiles.get_template(sorted(roof_tiles.TILE_MODELS.keys())[0])
+    offsets = roof_tiles.grid_offsets(4, 3, 0.3, 0.4, 0)
+    n_tiles = offsets.shape[0]
+    tiles = roof_tiles.instanciate(template, IDENTITY, (0.3, 0.4, 0.05), offsets, np.arange(n_tiles))
+    assert tiles.n_tiles == n_tiles
+    assert tiles.tile_pts == template.n_pts
+    assert tiles.tile_faces == template.n_faces
+    assert tiles.tile_loops == template.n_loops
+    assert tiles.verts.shape == (n_tiles * template.n_pts, 3)
+    assert tiles.uvs.shape == (n_tiles * template.n_loops, 2)
+    np.testing.assert_array_equal(tiles.matids, np.repeat(np.arange(n_tiles), template.n_faces))
+    # loops of each tile index own points
+    loops = tiles.loops.reshape(n_tiles, -1) // template.n_pts
+    np.testing.assert_array_equal(loops, np.arange(n_tiles)[:, None] + np.zeros_like(loops))
+
+
+def test_instanciate_matrix():
+    tM = [[0, -1, 0, 10], [1, 0, 0, 20], [0, 0, 1, 5]]
+    tiles = roof_tiles.instanciate(SQUARE, tM, (2, 3, 1), np.array([(1.0, -1.0)]), [7])
+    # pan x -> object y, pan y -> object -x
+    np.testing.assert_allclose(tiles.verts, [(11, 21, 5), (11, 23, 5), (8, 23, 5), (8, 21, 5)])
+    np.testing.assert_allclose(tiles.uvs, SQUARE.uvs)
+    np.testing.assert_array_equal(tiles.matids, [7])
+
+
+def test_select():
+    tiles = squares([(0, 0), (2, 0), (4, 0)])
+    sub = tiles.select(np.array([True, False, True]))
+    assert sub.n_tiles == 2
+    np.testing.assert_array_equal(sub.loops, [0, 1, 2, 3, 4, 5, 6, 7])
+    np.testing.assert_allclose(sub.verts[4:], tiles.verts[8:])
+    np.testing.assert_array_equal(sub.matids, [0, 2])
+    none = tiles.select(np.zeros(3, dtype=np.bool_))
+    assert none.n_tiles == 0
+    assert none.verts.shape == (0, 3)
+
+
+def test_classify():
+    tiles = squares([(1, 1), (-5, 1), (3.5, 1), (5, 5)])
+    boundary = np.array([(0, 0), (4, 0), (4, 4), (0, 4)], dtype=np.float64)
+    res = tiles.classify(boundary)
+    np.testing.assert_array_equal(res, [clip2d.INSIDE, clip2d.OUTSIDE, clip2d.BOUNDARY, clip2d.OUTSIDE])
+    hole = np.array([(0.5, 0.5), (2.5, 0.5), (2.5, 2.5), (0.5, 2.5)], dtype=np.float64)
+    assert tiles.classify(boundary, [hole])[0] == clip2d.OUTSIDE
+
+
+def test_clip():
+    tiles = squares([(0, 0), (1, 0)], [3, 4])
+    # keep left half of first tile and right tile is out
+    boundary = np.array([(-1, -1), (0.5, -1), (0.5, 2), (-1, 2)], dtype=np.float64)
+    res = tiles.clip(boundary)
+    assert res.n_tiles == 1
+    np.testing.assert_array_equal(res.totals, [4])
+    np.testing.assert_array_equal(res.matids, [3])
+    np.testing.assert_array_equal(res.loops, np.arange(4))
+    xy = res.verts[:, 0:2]
+    assert xy[:, 0].max() == pytest.approx(0.5)
+    assert xy[:, 0].min() == pytest.approx(0)
+    # uvs follow affine mapping of tile
+    np.testing.assert_allclose(res.uvs, xy)
+
+
+def test_clip_outside():
+    tiles = squares([(5, 5)])
+    boundary = np.array([(0, 0), (1, 0), (1, 1), (0, 1)], dtype=np.float64)
+    res = tiles.clip(boundary)
+    assert res.n_tiles == 0
+    assert res.nbytes == 0
+
+
+def test_empty_arrays():
+    empty = roof_tiles.empty_arrays()
+    assert empty.n_tiles == 0
+    assert empty.n_faces == 0
+    assert empty.clip(np.array([(0, 0), (1, 0), (1, 1)], dtype=np.float64)).n_tiles == 0
+
+
+def mul(a, b):
+    # matrix product is * in blender 2.7x and @ since 2.8
+    try:
+        return a @ b
+    except TypeError:
+        return a * b
+
+
+def couverture(t_pts, t_faces, tM, size, n_x, n_y, dx, dy, tile_side, tile_alternate, tile_offset, mids):
+    """
+        Per tile loop of archipack_roof.couverture() before numpy engine
+        mids: material index of each tile, in place of randint
+    """
+    from mathutils import Matrix, Vector
+    sx, sy, sz = size
+    t_pts = [Vector(p) for p in t_pts]
+    n_faces = len(t_faces)
+    t_uvs = [[(t_pts[i].x, t_pts[i].y) for i in f] for f in t_faces]
+
+    if tile_offset > 0:
+        offset = - tile_offset / 100
+    else:
+        offset = 0
+
+    verts = []
+    faces = []
+    matids = []
+    uvs = []
+    mids = iter(mids)
+
+    for k in range(n_y):
+
+        y = k * dy
+
+        x0 = offset * dx - tile_side
+        nx = n_x
+
+        if tile_alternate and k % 2 == 1:
+            x0 -= 0.5 * dx
+            nx += 1
+
+        if tile_offset > 0:
+            nx += 1
+
+        for j in range(nx):
+            x = x0 + j * dx
+            lM = mul(tM, Matrix([
+                [sx, 0, 0, x],
+                [0, sy, 0, -y],
+                [0, 0, sz, 0],
+                [0, 0, 0, 1]
+            ]))
+
+            v = len(verts)
+
+            verts.extend([mul(lM, p) for p in t_pts])
+            faces.extend([tuple(i + v for i in f) for f in t_faces])
+            mid = next(mids)
+            t_mats = [mid for i in range(n_faces)]
+            matids.extend(t_mats)
+            uvs.extend(t_uvs)
+
+    return verts, faces, matids, uvs
+
+
+@pytest.mark.parametrize("tile_offset", [0, 50])
+@pytest.mark.parametrize("tile_alternate", [False, True])
+@pytest.mark.parametrize("tile_model", sorted(roof_tiles.TILE_MODELS.keys()))
+def test_instanciate(tile_model, tile_alternate, tile_offset):
+    mathutils = pytest.importorskip("mathutils")
+    Matrix = mathutils.Matrix
+    Vector = mathutils.Vector
+    t_pts, t_faces = roof_tiles.TILE_MODELS[tile_model]
+    template = roof_tiles.get_template(tile_model)
+
+    # sloped and rotated pan, as computed in couverture()
+    a, slope = 0.6, 0.45
+    vx = Vector((cos(a), sin(a), 0))
+    vy = Vector((-sin(a), cos(a), slope)).normalized()
+    vz = vx.cross(vy)
+    x0, y0, z0 = 2.5, -1.25, 3.1
+    size = (0.3, 0.42, 0.06)
+    dx, dy = 0.28, 0.35
+    tile_side = 0.1
+    space_x, space_y = 4.3, 3.7 * sqrt(1 + slope * slope)
+    n_x = 1 + int(space_x / dx)
+    n_y = 1 + int(space_y / dy)
+    if tile_alternate:
+        n_y += 1
+
+    rows = [
+        [vx.x, vy.x, vz.x, x0],
+        [vx.y, vy.y, vz.y, y0],
+        [vx.z, vy.z, vz.z, z0]
+    ]
+    tM = Matrix(rows + [[0, 0, 0, 1]])
+
+    if tile_offset > 0:
+        offset = - tile_offset / 100
+    else:
+        offset = 0
+
+    offsets = roof_tiles.grid_offsets(n_x, n_y, dx, dy, offset * dx - tile_side,
+        alternate=tile_alternate,
+        extra=tile_offset > 0)
+    n_tiles = offsets.shape[0]
+    mids = np.random.RandomState(0).randint(7, 11, n_tiles)
+
+    tiles = roof_tiles.instanciate(template, rows, size, offsets, mids)
+
+    verts, faces, matids, uvs = couverture(
+        t_pts, t_faces, tM, size, n_x, n_y, dx, dy,
+        tile_side, tile_alternate, tile_offset, mids.tolist())
+
+    assert tiles.n_tiles == n_tiles
+    # mathutils use single precision floats
+    np.testing.assert_allclose(tiles.verts, np.array([v[:] for v in verts]), atol=1e-4)
+    np.testing.assert_array_equal(tiles.totals, [len(f) for f in faces])
+    np.testing.assert_array_equal(tiles.loops, [i for f in faces for i in f])
+    np.testing.assert_array_equal(tiles.matids, matids)
+    np.testing.assert_allclose(tiles.uvs, np.array([uv for f in uvs for uv in f]), atol=1e-6)